@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from db.schema import Admin
+
+from classes.fatal_exceptions import DatabaseQueryException
+from classes.sqlalchemy_protocols import SessionProtocol
+
+
+@dataclass
+class AuthCache:
+    # authorized chat id -> number of admins authorizing it, a chat shared by several admins stays while one of them remains
+    chat_ids: dict[int, int] = field(default_factory=dict)
+    loaded: bool = False
+
+
+# process wide cache shared by every route that checks authorization
+auth_cache = AuthCache()
+
+
+def load_auth_cache(session: SessionProtocol) -> None | Exception:
+    """Loads the authorized chat ids of all admins from the database into the cache.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    try:
+        admins: list[Admin] = session.query(Admin).all()
+    except SQLAlchemyError as e:
+        return DatabaseQueryException(exc=e)
+
+    chat_ids: dict[int, int] = {}
+    for admin in admins:
+        if admin.authorized_chat_id is None: continue
+        chat_id: int = int(admin.authorized_chat_id)  # type: ignore
+        chat_ids[chat_id] = chat_ids.get(chat_id, 0) + 1
+    auth_cache.chat_ids = chat_ids
+    auth_cache.loaded = True
+
+
+def update_auth_cache(old_chat_id: int | None, new_chat_id: int) -> None:
+    """Replaces the chat id authorized by an admin in the cache.
+
+    The old chat id stays authorized while another admin still authorizes it.
+
+    Args:
+        old_chat_id (int | None): chat id previously authorized by the admin, if any.
+        new_chat_id (int): chat id now authorized by the admin.
+    """
+
+    chat_ids: dict[int, int] = auth_cache.chat_ids
+    if old_chat_id is not None and old_chat_id in chat_ids:
+        chat_ids[old_chat_id] -= 1
+        if chat_ids[old_chat_id] == 0: del chat_ids[old_chat_id]
+    chat_ids[new_chat_id] = chat_ids.get(new_chat_id, 0) + 1
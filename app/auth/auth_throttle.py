@@ -0,0 +1,61 @@
+from collections import deque
+
+from time import monotonic
+
+# max number of /auth attempts a chat can make inside the window
+MAX_ATTEMPTS: int = 5
+# window in seconds in which the attempts are counted
+ATTEMPT_WINDOW: float = 60.0
+
+attempts: dict[int, deque[float]] = {}
+
+
+def register_attempt(chat_id: int) -> bool:
+    """Registers an authorization attempt for a chat.
+
+    Args:
+        chat_id (int): chat id from event.
+
+    Returns:
+        bool: True if the attempt is allowed, False if the chat exceeded the allowed attempts in the window.
+    """
+    
+    now: float = monotonic()
+    chat_attempts: deque[float] = attempts.setdefault(chat_id, deque())
+    
+    # drop attempts that are out of the window
+    while len(chat_attempts) > 0 and now - chat_attempts[0] > ATTEMPT_WINDOW:
+        chat_attempts.popleft()
+    
+    if len(chat_attempts) >= MAX_ATTEMPTS:
+        return False
+    
+    chat_attempts.append(now)
+    return True
+
+
+def get_retry_after(chat_id: int) -> float:
+    """Gets how many seconds a chat has to wait before trying to authorize again.
+
+    Args:
+        chat_id (int): chat id from event.
+
+    Returns:
+        float: seconds until the oldest attempt leaves the window.
+    """
+    
+    chat_attempts: deque[float] | None = attempts.get(chat_id)
+    if chat_attempts is None or len(chat_attempts) == 0:
+        return 0.0
+    
+    return max(0.0, ATTEMPT_WINDOW - (monotonic() - chat_attempts[0]))
+
+
+def reset_attempts(chat_id: int) -> None:
+    """Forgets the attempts of a chat after it authorizes successfully.
+
+    Args:
+        chat_id (int): chat id from event.
+    """
+    
+    attempts.pop(chat_id, None)
@@ -1,5 +1,9 @@
 from sqlalchemy.exc import SQLAlchemyError
 
+from asyncio import get_running_loop
+
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
 
 from db.schema import Admin
@@ -7,7 +11,25 @@ from db.schema import Admin
 from classes.fatal_exceptions import DatabaseQueryException
 from classes.sqlalchemy_protocols import SessionProtocol
 
-def authorize(login: str, password: str, session: SessionProtocol) -> bool | Exception:
+# bcrypt releases the GIL, so a couple of threads keep hashing off the event loop without competing with it
+password_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bcrypt")
+
+
+def check_password(password: str, hashed_password: str) -> bool:
+    """Compares a plain password with a bcrypt hash.
+
+    Args:
+        password (str): password to be hashed and compared.
+        hashed_password (str): bcrypt hash stored in the database.
+
+    Returns:
+        bool: true if the password matches the hash and false otherwize.
+    """
+    
+    return bcrypt.checkpw(bytes(password, encoding="utf-8"), bytes(hashed_password, encoding="utf-8"))
+
+
+async def authorize(login: str, password: str, session: SessionProtocol) -> bool | Exception:
     """Check if the login and password coresponds to any admin user in the database.
 
     Args:
@@ -27,7 +49,9 @@ def authorize(login: str, password: str, session: SessionProtocol) -> bool | Exc
     if admin is None:
         return False
 
-    if not bcrypt.checkpw(bytes(password, encoding="utf-8"), bytes(str(admin.password), encoding="utf-8")):
+    # run the hash comparison in the worker pool so it does not block the forwarding handlers
+    is_valid: bool = await get_running_loop().run_in_executor(password_executor, check_password, password, str(admin.password))
+    if not is_valid:
         return False
 
     return True
@@ -1,13 +1,12 @@
-from sqlalchemy.exc import SQLAlchemyError
+from app.auth.auth_cache import auth_cache, load_auth_cache
 
-from db.schema import Admin
-
-from classes.fatal_exceptions import DatabaseQueryException
 from classes.sqlalchemy_protocols import SessionProtocol
 
 def is_authorized(chat_id: int, session: SessionProtocol) -> bool | Exception:
     """Check if chat is authorized by any admin.
 
+    The database is only queried the first time, after that the in memory cache is used.
+
     Args:
         chat_id (int): integer id of the chat from which the message that triggered the register came from.
         SessionProtocol (Session): sqlalchemy session object.
@@ -15,14 +14,9 @@ def is_authorized(chat_id: int, session: SessionProtocol) -> bool | Exception:
     Returns:
         bool | Exception: True if chat is authorized, False otherwise and exception in case of database error.
     """
-    
-    try:
-        admins: list[Admin] = session.query(Admin).all()
-    except SQLAlchemyError as e:
-        return DatabaseQueryException(exc=e)
-    
-    chat_ids_in_db: list[int] = [admin.authorized_chat_id for admin in admins]  # type: ignore    
-    if chat_id not in chat_ids_in_db:
-        return False
 
-    return True
+    if not auth_cache.loaded:
+        res: None | Exception = load_auth_cache(session)
+        if isinstance(res, Exception): return res
+
+    return chat_id in auth_cache.chat_ids
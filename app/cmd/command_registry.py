@@ -0,0 +1,66 @@
+from typing import Any, Callable, Sequence
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CommandInfo:
+    name: str
+    section: str
+    usage: str
+    description: str
+
+
+# command name without the slash -> command info, in registration order
+command_registry: dict[str, CommandInfo] = {}
+
+
+def parse_docstring(doc: str, section: str) -> tuple[str, str, str]:
+    """Parses a route closure docstring in the form [<Section>:\\n\\n]<usage>[\\n\\n<description>].
+
+    Args:
+        doc (str): docstring of the route closure.
+        section (str): section of the previous command, used if the docstring does not start a new one.
+
+    Returns:
+        tuple[str, str, str]: section, usage and description.
+    """
+
+    parts: list[str] = [part.strip() for part in doc.strip().split("\n\n") if part.strip() != ""]
+    if len(parts) > 1 and parts[0].endswith(":"):
+        section = parts[0][:-1]
+        parts = parts[1:]
+
+    usage: str = parts[0]
+    description: str = " ".join([part.replace("\n", " ") for part in parts[1:]])
+    return section, usage, description
+
+
+def register_commands(handlers: Sequence[tuple[Callable[[Any], Any], Any]]) -> None:
+    """Collects the information of every route from the docstrings of the registered handlers, once at startup.
+
+    Args:
+        handlers (Sequence[tuple[Callable[[Any], Any], Any]]): event handlers of the client, in registration order.
+    """
+
+    section: str = ""
+    for handler, _ in handlers:
+        # connection handlers are not commands
+        if handler.__name__.startswith("connection_handler") or handler.__doc__ is None: continue
+
+        section, usage, description = parse_docstring(handler.__doc__, section)
+        name: str = usage.split()[0].lstrip("/")
+        command_registry[name] = CommandInfo(name, section, usage, description)
+
+
+def get_command(name: str) -> CommandInfo | None:
+    """Gets the information of a command.
+
+    Args:
+        name (str): command name, with or without the slash.
+
+    Returns:
+        CommandInfo | None: command information or None if there is no such command.
+    """
+
+    return command_registry.get(name.strip().lstrip("/"))
@@ -28,4 +28,28 @@ def handle_command(command: str, flags: tuple[str, ...]) -> tuple[str, ...] | Ex
         return InvalidCommandException(command=command)
     
     args: tuple[str, ...] = tuple([arg for arg in args_ if arg is not None])
-    return args
\ No newline at end of file
+    return args
+
+def handle_optional_command(command: str, flags: tuple[str, ...]) -> dict[str, str] | Exception:
+    """Parse a command in which every flag is optional.
+
+    Args:
+        command (str): command string from the message.
+        flags (tuple[str, ...]): flags accepted by the command.
+
+    Returns:
+        dict[str, str] | Exception: dictionary with the flags that were sent or exception if any.
+    """
+    
+    flags_num: int = command.count("--")
+    if flags_num == 0: return {}
+    
+    if not validate_command(command, flags_num):
+        return InvalidCommandException(command=command)
+    
+    flags_args: dict[str, str] = parse_command(tokenize_command(command))
+    
+    if any([flag not in flags for flag in flags_args]) or len(flags_args) != flags_num:
+        return InvalidCommandException(command=command)
+    
+    return flags_args
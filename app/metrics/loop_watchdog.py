@@ -0,0 +1,142 @@
+from asyncio import sleep
+
+from collections import deque
+
+from dataclasses import dataclass
+
+from datetime import datetime, timedelta
+
+from pathlib import Path
+
+from sys import _current_frames  # type: ignore
+
+from threading import Thread, get_ident
+
+from time import perf_counter, sleep as thread_sleep
+
+from types import FrameType
+
+from typing import Any, Callable, Coroutine
+
+from app.metrics.metrics import Counter, Histogram, register
+
+from classes.fatal_exceptions import LoopStallException
+
+# seconds between heartbeats of the loop
+HEARTBEAT_INTERVAL: float = 0.1
+# a callback running longer than this is reported as a stall
+STALL_THRESHOLD: float = 0.25
+# stalled seconds within ALERT_WINDOW that alert the bot chat, at most once per ALERT_WINDOW
+ALERT_STALLED_SECONDS: float = 5.0
+ALERT_WINDOW: float = 60.0
+STALL_BUFFER_SIZE: int = 100
+# only frames of this repository are kept in the reported stack
+ROOT: str = str(Path(__file__).resolve().parents[2])
+
+loop_lag_seconds = register(Histogram("forwarder_loop_lag_seconds", "Delay between when the loop heartbeat was due and when it ran."))
+loop_stalls = register(Counter("forwarder_loop_stalls_total", "Callbacks that blocked the loop for longer than the stall threshold."))
+
+
+@dataclass
+class StallEntry:
+    date: datetime
+    duration: float
+    # repository frames of the loop thread when the stall was detected, outermost first
+    stack: str
+
+    def __str__(self: "StallEntry") -> str:
+        return f"{self.date.isoformat(timespec='seconds')} {self.duration * 1000:.0f} ms in {self.stack}"
+
+
+def get_app_stack(frame: FrameType | None) -> str:
+    frames: list[str] = []
+    while frame is not None:
+        if frame.f_code.co_filename.startswith(ROOT):
+            frames.append(f"{frame.f_code.co_name} ({Path(frame.f_code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return " > ".join(reversed(frames)) if len(frames) > 0 else "library code"
+
+
+class LoopWatchdog:
+    def __init__(self: "LoopWatchdog"):
+        self.thread_id: int = get_ident()
+        self.heartbeat: float = perf_counter()
+        self.stalls: deque[StallEntry] = deque(maxlen=STALL_BUFFER_SIZE)
+        # stall being detected by the watch thread, finished by the next heartbeat
+        self.current_stall: StallEntry | None = None
+        self.last_alert: float = float("-inf")
+
+    def watch(self: "LoopWatchdog") -> None:
+        # runs in its own thread, so it sees the loop while it is blocked
+        while True:
+            thread_sleep(HEARTBEAT_INTERVAL)
+            if self.current_stall is not None or perf_counter() - self.heartbeat < STALL_THRESHOLD: continue
+            stack: str = get_app_stack(_current_frames().get(self.thread_id))
+            self.current_stall = StallEntry(datetime.utcnow(), 0.0, stack)
+
+    def finish_stall(self: "LoopWatchdog", lag: float) -> None:
+        stall: StallEntry | None = self.current_stall
+        if stall is None: return
+        stall.duration = lag
+        self.stalls.append(stall)
+        loop_stalls.inc()
+        self.current_stall = None
+
+    def get_alert(self: "LoopWatchdog", now: float) -> LoopStallException | None:
+        """Checks if the loop was stalled for too long recently.
+
+        Args:
+            now (float): current perf_counter.
+
+        Returns:
+            LoopStallException | None: alert or None if not needed or sent recently.
+        """
+
+        if now - self.last_alert < ALERT_WINDOW: return None
+        window_start: datetime = datetime.utcnow() - timedelta(seconds=ALERT_WINDOW)
+        recent: list[StallEntry] = [stall for stall in self.stalls if stall.date >= window_start]
+        stalled: float = sum([stall.duration for stall in recent])
+        if stalled < ALERT_STALLED_SECONDS: return None
+
+        self.last_alert = now
+        worst: StallEntry = max(recent, key=lambda stall: stall.duration)
+        return LoopStallException(exc=TimeoutError(str(worst)), stalled_seconds=round(stalled, 1), stalls=len(recent))
+
+
+# watchdog of the loop, set when it starts
+watchdog: list[LoopWatchdog | None] = [None]
+
+
+def get_recent_stalls() -> list[StallEntry]:
+    """Gets the stalls recorded by the watchdog, most recent last.
+
+    Returns:
+        list[StallEntry]: stalls, empty if the watchdog is not running.
+    """
+
+    return list(watchdog[0].stalls) if watchdog[0] is not None else []
+
+
+async def run_loop_watchdog(alert: Callable[[Exception], Coroutine[Any, Any, None]]) -> None:
+    """Measures the scheduling lag of the loop and alerts when it stalls for too long.
+
+    Must be started from the loop thread.
+
+    Args:
+        alert (Callable[[Exception], Coroutine[Any, Any, None]]): function sending the alert, e.g. the response handler.
+    """
+
+    watchdog[0] = monitor = LoopWatchdog()
+    Thread(target=monitor.watch, name="loop_watchdog", daemon=True).start()
+
+    while True:
+        due: float = perf_counter() + HEARTBEAT_INTERVAL
+        await sleep(HEARTBEAT_INTERVAL)
+        now: float = perf_counter()
+        lag: float = max(0.0, now - due)
+        monitor.heartbeat = now
+        loop_lag_seconds.observe(lag)
+
+        monitor.finish_stall(lag)
+        exception: LoopStallException | None = monitor.get_alert(now)
+        if exception is not None: await alert(exception)
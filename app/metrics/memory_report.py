@@ -0,0 +1,117 @@
+import tracemalloc
+
+from typing import Any
+
+from app.auth.auth_cache import auth_cache
+from app.metrics.rolling_stats import connection_stats
+from app.utils.capture import pending_records, recent_keys
+from app.utils.filter_cache import get_filters
+from app.utils.filter_pool import compiled_filters
+from app.utils.handle_log import pending_logs, recent_logs
+from app.utils.routing_snapshot import current_snapshot, peer_cache
+
+# frames kept per allocation, more frames cost more memory while tracing
+TRACE_FRAMES: int = 5
+TOP_ALLOCATIONS: int = 10
+
+# snapshot every report is compared with, taken when tracing starts or on reset
+baseline: list[tracemalloc.Snapshot | None] = [None]
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    # the baseline and every report are filtered the same way, or the excluded frames would show as freed
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+
+
+def start_tracing() -> None:
+    """Starts tracing allocations, if not started yet, and takes the baseline snapshot."""
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+    baseline[0] = take_snapshot()
+
+
+def stop_tracing() -> None:
+    """Stops tracing allocations and drops the baseline."""
+
+    baseline[0] = None
+    tracemalloc.stop()
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024: return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024  # type: ignore
+    return f"{size:.1f} GiB"
+
+
+def format_allocations(limit: int = TOP_ALLOCATIONS) -> str:
+    """Compares a new snapshot with the baseline and lists the allocation sites that grew the most.
+
+    Args:
+        limit (int, optional): number of sites. Defaults to TOP_ALLOCATIONS.
+
+    Returns:
+        str: allocation report.
+    """
+
+    if baseline[0] is None: return "Allocation tracing is not running."
+
+    snapshot: tracemalloc.Snapshot = take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    stats: list[tracemalloc.StatisticDiff] = snapshot.compare_to(baseline[0], "lineno")[:limit]
+    lines: list[str] = [
+        f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+        f"{'+' if stat.size_diff >= 0 else ''}{format_size(stat.size_diff)} ({stat.count_diff:+} blocks, {format_size(stat.size)} total)"
+        for stat in stats
+    ]
+    return f"Traced memory: {format_size(current)} (peak {format_size(peak)})\n\nTop growth since baseline:\n" + "\n".join(lines)
+
+
+def count_entity_cache(client: Any) -> int:
+    # telethon keeps resolved entities in a private cache, a dict attribute or the instance dict depending on the version
+    cache: Any = getattr(client, "_entity_cache", None)
+    if cache is None: return 0
+    hash_map: Any = getattr(cache, "hash_map", None)
+    return len(hash_map) if hash_map is not None else len(vars(cache))
+
+
+def get_cache_sizes(session: Any, client: Any) -> dict[str, int]:
+    """Counts the entries of every cache kept by the bot.
+
+    Args:
+        session (Any): sqlalchemy session instance.
+        client (Any): telegram client instance.
+
+    Returns:
+        dict[str, int]: cache name -> number of entries.
+    """
+
+    snapshot = current_snapshot[0]
+    plan = compiled_filters[0][1]
+    return {
+        "snapshot channels": len(snapshot.channels) if snapshot is not None else 0,
+        "snapshot connections": len(snapshot.connections) if snapshot is not None else 0,
+        "filters": len(get_filters()),
+        "compiled filter plan": len(plan.blacklist) + len(plan.replacements) + len(plan.link_removers),
+        "peer ids": len(peer_cache),
+        "authorized chats": len(auth_cache.chat_ids),
+        "recent logs": len(recent_logs),
+        "pending logs": len(pending_logs),
+        "connection stats": len(connection_stats),
+        "pending captures": len(pending_records),
+        "capture dedup keys": len(recent_keys),
+        "event handlers": len(client.list_event_handlers()),
+        # not part of the protocols, read defensively
+        "session identity map": len(getattr(session, "identity_map", ())),
+        "telethon entity cache": count_entity_cache(client),
+    }
+
+
+def format_cache_sizes(session: Any, client: Any) -> str:
+    sizes: dict[str, int] = get_cache_sizes(session, client)
+    width: int = max([len(name) for name in sizes])
+    return "Caches:\n" + "\n".join([f"{name.ljust(width)}  {size}" for name, size in sizes.items()])
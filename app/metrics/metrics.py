@@ -0,0 +1,141 @@
+from bisect import bisect_left
+
+from typing import Callable
+
+# label values of a sample, in the order of the metric label names
+Labels = tuple[str, ...]
+
+# buckets in seconds, from sub millisecond filtering to minutes of end to end delay
+DEFAULT_BUCKETS: tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def escape_label(value: str) -> str:
+    # escape label values as required by the prometheus text format
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs: list[str] = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra != "": pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if len(pairs) > 0 else ""
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    # values must be sorted
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Counter:
+    def __init__(self: "Counter", name: str, help_: str, label_names: Labels = ()):
+        self.name = name
+        self.help = help_
+        self.label_names = label_names
+        self.values: dict[Labels, float] = {}
+
+    def inc(self: "Counter", labels: Labels = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self: "Counter") -> list[str]:
+        lines: list[str] = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{format_labels(self.label_names, labels)} {value}" for labels, value in self.values.items()]
+        return lines
+
+
+class Gauge:
+    def __init__(self: "Gauge", name: str, help_: str, label_names: Labels = (), callback: Callable[[], float] | None = None):
+        self.name = name
+        self.help = help_
+        self.label_names = label_names
+        # gauges with a callback are only computed when scraped, adding nothing to the hot path
+        self.callback = callback
+        self.values: dict[Labels, float] = {}
+
+    def set(self: "Gauge", value: float, labels: Labels = ()) -> None:
+        self.values[labels] = value
+
+    def inc(self: "Gauge", labels: Labels = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def dec(self: "Gauge", labels: Labels = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) - amount
+
+    def render(self: "Gauge") -> list[str]:
+        lines: list[str] = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if self.callback is not None:
+            try:
+                self.values[()] = float(self.callback())
+            except Exception:
+                pass
+        lines += [f"{self.name}{format_labels(self.label_names, labels)} {value}" for labels, value in self.values.items()]
+        return lines
+
+
+class Histogram:
+    def __init__(self: "Histogram", name: str, help_: str, label_names: Labels = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [count per bucket (not cumulative, last is +Inf), sum]
+        self.counts: dict[Labels, list[int]] = {}
+        self.sums: dict[Labels, float] = {}
+
+    def observe(self: "Histogram", value: float, labels: Labels = ()) -> None:
+        counts: list[int] | None = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def render(self: "Histogram") -> list[str]:
+        lines: list[str] = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, counts in self.counts.items():
+            cumulative: int = 0
+            for bound, count in zip([*map(str, self.buckets), "+Inf"], counts):
+                cumulative += count
+                le: str = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, labels)} {self.sums[labels]}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+Metric = Counter | Gauge | Histogram
+registry: list[Metric] = []
+
+
+def register(metric: Metric) -> Metric:
+    """Adds a metric to the registry exposed by the metrics server.
+
+    Args:
+        metric (Metric): metric instance.
+
+    Returns:
+        Metric: the same metric, to allow registering on assignment.
+    """
+
+    registry.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    """Renders every registered metric in the prometheus text format.
+
+    Returns:
+        str: metrics exposition.
+    """
+
+    return "\n".join(sum([metric.render() for metric in registry], [])) + "\n"
+
+
+# forwarding metrics
+messages_received = register(Counter("forwarder_messages_received_total", "Messages received by a connection handler.", ("input", "output")))
+messages_blocked = register(Counter("forwarder_messages_blocked_total", "Messages not forwarded because of the blacklist.", ("input", "output")))
+messages_forwarded = register(Counter("forwarder_messages_forwarded_total", "Messages sent to the output channel.", ("input", "output")))
+send_errors = register(Counter("forwarder_send_errors_total", "Messages that failed to be sent to the output channel.", ("input", "output")))
+filter_seconds = register(Histogram("forwarder_filter_seconds", "Time spent applying filters to a message.", ("input", "output")))
+send_seconds = register(Histogram("forwarder_send_seconds", "Time spent sending a message to the output channel.", ("input", "output")))
+end_to_end_seconds = register(Histogram("forwarder_end_to_end_seconds", "Time from the message date in the input channel to the send acknowledgement.", ("input", "output")))
+sends_in_flight = register(Gauge("forwarder_sends_in_flight", "Messages being sent to output channels right now."))
+logs_dropped = register(Counter("forwarder_logs_dropped_total", "Logged errors dropped because the buffer of entries waiting for the database was full."))
@@ -0,0 +1,84 @@
+from asyncio import AbstractServer, StreamReader, StreamWriter, start_server
+
+from os import getenv
+
+from app.metrics.metrics import Gauge, register, render_metrics
+
+from classes.fatal_exceptions import MetricsServerException
+from classes.sqlalchemy_protocols import EngineProtocol
+from classes.telethon_protocols import TelegramClientProtocol
+
+DEFAULT_METRICS_HOST: str = "127.0.0.1"
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def register_runtime_gauges(client: TelegramClientProtocol, engine: EngineProtocol) -> None:
+    """Registers the gauges read from the client and the engine when the metrics are scraped.
+
+    Args:
+        client (TelegramClientProtocol): telegram client instance.
+        engine (EngineProtocol): sqlalchemy engine instance.
+    """
+
+    register(Gauge(
+        "forwarder_connection_handlers",
+        "Connection handlers registered in the telegram client.",
+        callback=lambda: len([
+            handler for handler, _ in client.list_event_handlers()
+            if handler.__name__.startswith("connection_handler")
+        ])
+    ))
+    # not every pool keeps track of checked out connections, e.g. the sqlite static pool
+    if hasattr(engine.pool, "checkedout"):
+        register(Gauge(
+            "forwarder_db_pool_checked_out",
+            "Database connections checked out from the pool.",
+            callback=lambda: engine.pool.checkedout()
+        ))
+
+
+async def handle_request(reader: StreamReader, writer: StreamWriter) -> None:
+    """Answers GET /metrics with the metrics exposition and anything else with 404.
+
+    Args:
+        reader (StreamReader): request stream.
+        writer (StreamWriter): response stream.
+    """
+
+    try:
+        request_line: bytes = await reader.readline()
+        # skip headers, the request has no body
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""): pass
+
+        parts: list[str] = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", render_metrics().encode("utf-8")
+        else:
+            status, body = "404 Not Found", b"Not Found\n"
+
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+    except (ConnectionError, UnicodeDecodeError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server() -> AbstractServer | None | Exception:
+    """Starts the metrics server when the METRICS_PORT environment variable is set.
+
+    Returns:
+        AbstractServer | None | Exception: server, None if metrics are disabled or exception if any.
+    """
+
+    port: str | None = getenv("METRICS_PORT")
+    if port is None or port == "": return None
+
+    host: str = getenv("METRICS_HOST") or DEFAULT_METRICS_HOST
+    try:
+        return await start_server(handle_request, host, int(port))
+    except (OSError, ValueError) as e:
+        return MetricsServerException(exc=e, address=f"{host}:{port}")
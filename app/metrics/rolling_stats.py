@@ -0,0 +1,159 @@
+from bisect import bisect_left
+
+from dataclasses import dataclass, field
+
+from time import time
+
+from app.metrics.metrics import DEFAULT_BUCKETS
+
+# one slot per minute for the last hour, memory does not grow with traffic
+SLOT_SECONDS: int = 60
+# plus the slot partly inside the longest window
+SLOTS: int = 61
+# window name -> number of slots
+WINDOWS: dict[str, int] = {"1m": 1, "15m": 15, "1h": 60}
+
+
+def get_weight(slot_minute: int, slots: int, now: float) -> float:
+    """Gets the share of a slot inside the window of the last slots minutes.
+
+    The window covers the current slot and the minutes before it, the oldest slot only for the part of it
+    in the window, so the window always spans the same time instead of restarting at every minute.
+
+    Args:
+        slot_minute (int): minute of the slot.
+        slots (int): number of minutes of the window.
+        now (float): current time.
+
+    Returns:
+        float: 1 for a slot fully in the window, the fraction for the oldest slot, 0 outside of it.
+    """
+
+    minute: int = int(now) // SLOT_SECONDS
+    if minute - slots < slot_minute <= minute: return 1.0
+    if slot_minute == minute - slots: return 1 - (now % SLOT_SECONDS) / SLOT_SECONDS
+    return 0.0
+
+
+class RollingCounter:
+    def __init__(self: "RollingCounter"):
+        self.counts: list[int] = [0] * SLOTS
+        # minute each slot belongs to, a slot is reset when a newer minute reuses it
+        self.minutes: list[int] = [-1] * SLOTS
+
+    def inc(self: "RollingCounter", now: float) -> None:
+        minute: int = int(now) // SLOT_SECONDS
+        slot: int = minute % SLOTS
+        if self.minutes[slot] != minute:
+            self.minutes[slot] = minute
+            self.counts[slot] = 0
+        self.counts[slot] += 1
+
+    def total(self: "RollingCounter", slots: int, now: float) -> int:
+        # the oldest slot is counted pro rata, so the total is an estimate
+        return round(sum([count * get_weight(slot_minute, slots, now) for count, slot_minute in zip(self.counts, self.minutes)]))
+
+
+class RollingHistogram:
+    def __init__(self: "RollingHistogram", buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # count per bucket of each slot, the last bucket is +Inf
+        self.counts: list[list[int]] = [[0] * (len(buckets) + 1) for _ in range(SLOTS)]
+        self.minutes: list[int] = [-1] * SLOTS
+
+    def observe(self: "RollingHistogram", value: float, now: float) -> None:
+        minute: int = int(now) // SLOT_SECONDS
+        slot: int = minute % SLOTS
+        if self.minutes[slot] != minute:
+            self.minutes[slot] = minute
+            self.counts[slot] = [0] * (len(self.buckets) + 1)
+        self.counts[slot][bisect_left(self.buckets, value)] += 1
+
+    def quantile(self: "RollingHistogram", fraction: float, slots: int, now: float) -> float | None:
+        """Estimates a quantile as the upper bound of the bucket containing it.
+
+        Args:
+            fraction (float): quantile between 0 and 1, e.g. 0.99.
+            slots (int): number of minutes of the window.
+            now (float): current time.
+
+        Returns:
+            float | None: upper bound in seconds, inf if above the last bucket or None without observations.
+        """
+
+        merged: list[float] = [0.0] * (len(self.buckets) + 1)
+        for counts, slot_minute in zip(self.counts, self.minutes):
+            weight: float = get_weight(slot_minute, slots, now)
+            if weight > 0:
+                merged = [total + count * weight for total, count in zip(merged, counts)]
+
+        total: float = sum(merged)
+        if total == 0: return None
+
+        cumulative: float = 0
+        for bound, count in zip([*self.buckets, float("inf")], merged):
+            cumulative += count
+            if cumulative >= fraction * total: return bound
+        return float("inf")
+
+
+@dataclass
+class ConnectionStats:
+    received: RollingCounter = field(default_factory=RollingCounter)
+    blocked: RollingCounter = field(default_factory=RollingCounter)
+    modified: RollingCounter = field(default_factory=RollingCounter)
+    forwarded: RollingCounter = field(default_factory=RollingCounter)
+    latency: RollingHistogram = field(default_factory=RollingHistogram)
+
+
+# (input name, output name) -> stats, kept when handlers are rebuilt
+connection_stats: dict[tuple[str, str], ConnectionStats] = {}
+
+
+def get_connection_stats(labels: tuple[str, str]) -> ConnectionStats:
+    """Gets the stats of a connection, creating them the first time.
+
+    Args:
+        labels (tuple[str, str]): input and output channel names.
+
+    Returns:
+        ConnectionStats: rolling stats of the connection.
+    """
+
+    stats: ConnectionStats | None = connection_stats.get(labels)
+    if stats is None:
+        stats = connection_stats[labels] = ConnectionStats()
+    return stats
+
+
+def format_latency(seconds: float | None) -> str:
+    if seconds is None: return "-"
+    if seconds == float("inf"): return f">{DEFAULT_BUCKETS[-1]:g}s"
+    return f"<={seconds:g}s"
+
+
+def format_stats(now: float | None = None) -> str:
+    """Formats the counters and latency of every connection for each window.
+
+    Args:
+        now (float | None, optional): current time. Defaults to time().
+
+    Returns:
+        str: stats message.
+    """
+
+    now = now if now is not None else time()
+    sections: list[str] = []
+    for (input_name, output_name), stats in connection_stats.items():
+        lines: list[str] = [f"{input_name} -> {output_name}"]
+        for window, slots in WINDOWS.items():
+            lines.append(
+                f"  {window}: received {stats.received.total(slots, now)}, "
+                f"blocked {stats.blocked.total(slots, now)}, "
+                f"modified {stats.modified.total(slots, now)}, "
+                f"forwarded {stats.forwarded.total(slots, now)}, "
+                f"p50 {format_latency(stats.latency.quantile(0.5, slots, now))}, "
+                f"p99 {format_latency(stats.latency.quantile(0.99, slots, now))}"
+            )
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
@@ -0,0 +1,63 @@
+from sys import _current_frames  # type: ignore
+
+from threading import Event, Thread, get_ident
+
+from types import FrameType
+
+# samples per second, each sample walks the stack of the loop thread once
+SAMPLE_INTERVAL: float = 0.01
+# frames kept per stack, deeper frames are cut from the root side
+MAX_DEPTH: int = 64
+
+
+def format_frame(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame: FrameType | None) -> str:
+    # root first, separated by ; as read by flamegraph.pl and speedscope
+    frames: list[str] = []
+    while frame is not None and len(frames) < MAX_DEPTH:
+        frames.append(format_frame(frame))
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class SamplingProfiler:
+    def __init__(self: "SamplingProfiler", thread_id: int | None = None, interval: float = SAMPLE_INTERVAL):
+        # thread running the event loop, the one calling start by default
+        self.thread_id = thread_id if thread_id is not None else get_ident()
+        self.interval = interval
+        # collapsed stack -> number of samples
+        self.stacks: dict[str, int] = {}
+        self.stopped = Event()
+        self.thread: Thread | None = None
+
+    def sample(self: "SamplingProfiler") -> None:
+        while not self.stopped.wait(self.interval):
+            frame: FrameType | None = _current_frames().get(self.thread_id)
+            # the loop thread is idle in the selector most of the time, samples show where it is when it is not
+            stack: str = collapse_stack(frame)
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def start(self: "SamplingProfiler") -> None:
+        self.thread = Thread(target=self.sample, name="sampling_profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self: "SamplingProfiler") -> None:
+        self.stopped.set()
+        if self.thread is not None: self.thread.join()
+
+    def collapsed(self: "SamplingProfiler") -> str:
+        """Formats the samples in the collapsed stack format, one stack per line with its count.
+
+        Returns:
+            str: collapsed stacks, heaviest first.
+        """
+
+        return "\n".join([
+            f"{stack} {count}"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1])
+            if stack != ""
+        ]) + "\n"
@@ -0,0 +1,228 @@
+from asyncio import get_running_loop, sleep
+
+from collections import deque
+
+from contextlib import contextmanager, nullcontext
+
+from contextvars import ContextVar
+
+from dataclasses import asdict, dataclass, field
+
+from functools import wraps
+
+from json import dumps
+
+from os import getenv
+
+from pathlib import Path
+
+from time import perf_counter, time
+
+from typing import Any, Callable, ContextManager, Coroutine, Iterator
+
+from zlib import crc32
+
+DEFAULT_TRACE_PATH: str = "trace/spans.jsonl"
+# seconds between writes of the finished spans to the trace file
+TRACE_FLUSH_INTERVAL: float = 1.0
+# spans kept in memory between writes, older ones are dropped
+TRACE_BUFFER_SIZE: int = 100000
+
+
+@dataclass
+class Span:
+    # correlation id shared by every span of the same source message or command
+    trace_id: str
+    name: str
+    # wall clock start, to line up spans of different handlers of the same message
+    start: float
+    duration: float
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+exporter_type = Callable[[list[Span]], None]
+
+
+class JsonlExporter:
+    def __init__(self: "JsonlExporter", path: str):
+        self.path = path
+        # spans of finished traces, written by run_trace_flusher in a worker thread
+        self.pending: deque[Span] = deque(maxlen=TRACE_BUFFER_SIZE)
+
+    def __call__(self: "JsonlExporter", spans: list[Span]) -> None:
+        self.pending.extend(spans)
+
+    def flush(self: "JsonlExporter") -> int:
+        """Appends the pending spans to the file, called from a worker thread.
+
+        Returns:
+            int: number of spans written.
+        """
+
+        spans: list[Span] = [self.pending.popleft() for _ in range(len(self.pending))]
+        if len(spans) == 0: return 0
+        try:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write("".join([dumps(asdict(span), default=str) + "\n" for span in spans]))
+        except OSError:
+            # tracing must never break forwarding
+            return 0
+        return len(spans)
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    spans: list[Span] = field(default_factory=list)
+
+    @contextmanager
+    def span(self: "Trace", name: str, **attributes: Any) -> Iterator[None]:
+        """Records the time spent inside the block as a span of the trace.
+
+        Args:
+            name (str): stage name, e.g. treat_message.
+        """
+
+        start, wall_start = perf_counter(), time()
+        try:
+            yield
+        finally:
+            self.spans.append(Span(self.trace_id, name, wall_start, perf_counter() - start, attributes))
+
+    def add(self: "Trace", name: str, start: float, duration: float, **attributes: Any) -> None:
+        """Adds a span measured outside the trace, e.g. the delay before the handler was called.
+
+        Args:
+            name (str): stage name.
+            start (float): wall clock start.
+            duration (float): seconds spent.
+        """
+
+        self.spans.append(Span(self.trace_id, name, start, duration, attributes))
+
+
+# fraction of messages and commands traced, 0 disables tracing
+sample_rate: list[float] = [0.0]
+exporter: list[exporter_type] = [JsonlExporter(DEFAULT_TRACE_PATH)]
+# trace of the message or command being handled by the current task
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+
+def configure_tracing() -> None:
+    """Reads the TRACE_SAMPLE_RATE and TRACE_PATH environment variables, the environment must be already loaded."""
+
+    set_sample_rate(float(getenv("TRACE_SAMPLE_RATE") or 0))
+    set_exporter(JsonlExporter(getenv("TRACE_PATH") or DEFAULT_TRACE_PATH))
+
+
+async def run_trace_flusher(interval: float = TRACE_FLUSH_INTERVAL) -> None:
+    """Periodically writes the spans of the finished traces in a worker thread, so the file is never written on the loop.
+
+    Args:
+        interval (float, optional): seconds between writes. Defaults to TRACE_FLUSH_INTERVAL.
+    """
+
+    loop = get_running_loop()
+    while True:
+        await sleep(interval)
+        current: exporter_type = exporter[0]
+        if isinstance(current, JsonlExporter) and len(current.pending) > 0:
+            await loop.run_in_executor(None, current.flush)
+
+
+def close_tracing() -> None:
+    """Writes the spans still in memory, called when the client disconnects."""
+
+    current: exporter_type = exporter[0]
+    if isinstance(current, JsonlExporter): current.flush()
+
+
+def set_sample_rate(rate: float) -> None:
+    """Changes the fraction of messages and commands traced.
+
+    Args:
+        rate (float): value between 0 and 1.
+    """
+
+    sample_rate[0] = rate
+
+
+def set_exporter(new_exporter: exporter_type) -> None:
+    """Replaces the function that receives the spans of each finished trace.
+
+    Args:
+        new_exporter (exporter_type): callable receiving the list of spans.
+    """
+
+    exporter[0] = new_exporter
+
+
+def is_sampled(trace_id: str) -> bool:
+    # decided by the id and not drawn per handler, so every handler of a message keeps or drops its spans together
+    return sample_rate[0] > 0 and crc32(trace_id.encode("utf-8")) / 2**32 < sample_rate[0]
+
+
+def start_trace(trace_id: str) -> Trace | None:
+    """Starts a trace for the current task if it is sampled.
+
+    Args:
+        trace_id (str): correlation id, e.g. <chat_id>:<message_id>.
+
+    Returns:
+        Trace | None: trace or None if not sampled.
+    """
+
+    # always reset, telethon runs every handler of an update in the same task
+    trace: Trace | None = Trace(trace_id) if is_sampled(trace_id) else None
+    current_trace.set(trace)
+    return trace
+
+
+def finish_trace(trace: Trace | None) -> None:
+    """Sends the spans of a trace to the exporter.
+
+    Args:
+        trace (Trace | None): trace returned by start_trace.
+    """
+
+    if trace is None: return
+    current_trace.set(None)
+    exporter[0](trace.spans)
+
+
+def trace_span(name: str, **attributes: Any) -> ContextManager[None]:
+    """Gets a span of the trace of the current task, or a no op when the task is not traced.
+
+    Args:
+        name (str): stage name.
+
+    Returns:
+        ContextManager[None]: context manager measuring the block.
+    """
+
+    trace: Trace | None = current_trace.get()
+    if trace is None: return nullcontext()
+    return trace.span(name, **attributes)
+
+
+def traced(handler: Callable[[Any], Coroutine[Any, Any, None]]) -> Callable[[Any], Coroutine[Any, Any, None]]:
+    """Traces a route handler, recording the whole command as a span named after the route.
+
+    Args:
+        handler (Callable[[Any], Coroutine[Any, Any, None]]): route handler receiving the telegram event.
+
+    Returns:
+        Callable[[Any], Coroutine[Any, Any, None]]: handler with the same name and docstring.
+    """
+
+    @wraps(handler)
+    async def wrapper(event: Any) -> None:
+        trace: Trace | None = start_trace(f"{event.chat_id}:{event.message.id}")
+        try:
+            with trace_span(handler.__name__):
+                await handler(event)
+        finally:
+            finish_trace(trace)
+
+    return wrapper
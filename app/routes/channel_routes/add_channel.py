@@ -6,6 +6,8 @@ from app.cmd.handle_command import handle_command
 
 from app.auth.is_authorized import is_authorized
 
+from app.utils.config_version import bump_config_version
+
 from app.validations.validate_url import validate_url
 
 from classes.validation_exceptions import ChannelAlreadyExistsException, InvalidCommandException, NotAuthorizedException
@@ -68,6 +70,7 @@ def commit_to_database(name: str, url: str, session: SessionProtocol) -> None |
     try:
         channel = Channel(id=str(uuid4()), name=name, url=url)
         session.add(channel)
+        bump_config_version(session)
         session.commit()
     except SQLAlchemyError as e:
         session.rollback()
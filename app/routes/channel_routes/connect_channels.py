@@ -7,6 +7,7 @@ from typing import Callable, Any, Coroutine, TypeAlias
 from app.utils.get_channel_filter_attr import get_channel_filter_attr
 from app.utils.get_loop import get_loop
 from app.utils.remanage_connections import get_event_handler, register_event_handler, remove_event_handler
+from app.utils.config_version import bump_config_version
 
 from app.cmd.handle_command import handle_command
 
@@ -96,6 +97,7 @@ def commit_to_database(session: SessionProtocol, input_channel: Channel, output_
     
     try:
         input_channel.outputs.append(output_channel)
+        bump_config_version(session)
         session.commit()
     except SQLAlchemyError as e:
         session.rollback()
@@ -142,7 +144,7 @@ def connect_channels(command: str | None, chat_id: int, session: SessionProtocol
     validated_input_channel, validated_output_channel = validated_channels
     
     # get event handler and event
-    handler, event = get_event_handler(input_channel, output_channel, client, session)
+    handler, event = get_event_handler(validated_input_channel, validated_output_channel, client)
     
     # register event handler
     register_res: None | Exception = register_event_handler(handler, event, client)
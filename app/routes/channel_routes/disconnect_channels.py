@@ -6,6 +6,7 @@ from typing import Callable, Any, Coroutine, TypeAlias
 
 from app.utils.get_channel_filter_attr import get_channel_filter_attr
 from app.utils.remanage_connections import register_event_handler, remove_event_handler
+from app.utils.config_version import bump_config_version
 
 from app.cmd.handle_command import handle_command
 
@@ -108,6 +109,7 @@ def commit_to_database(session: SessionProtocol, input_channel: Channel, output_
     
     try:
         input_channel.outputs.remove(output_channel)
+        bump_config_version(session)
         session.commit()
     except SQLAlchemyError as e:
         session.rollback()
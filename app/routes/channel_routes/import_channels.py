@@ -0,0 +1,236 @@
+from typing import Any, Callable, Coroutine, TypeAlias
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from uuid import uuid4
+
+from csv import reader
+
+from json import loads, JSONDecodeError
+
+from app.auth.is_authorized import is_authorized
+
+from app.utils.get_channel_filter_attr import get_channel_filter_attr
+from app.utils.get_loop import get_graph_loop
+from app.utils.config_version import bump_config_version
+
+from app.validations.validate_url import validate_url
+
+from classes.validation_exceptions import ChannelAlreadyExistsException, ChannelDoesNotExistException, ChannelLoopException
+from classes.validation_exceptions import ChannelsAlreadyConnectedException, InvalidCommandException, InvalidDocumentException
+from classes.validation_exceptions import NotAuthorizedException, SameInputAndOutputException
+from classes.fatal_exceptions import DatabaseCommitException, DatabaseQueryException
+from classes.sqlalchemy_protocols import SessionProtocol
+
+from db.schema import Channel, input_output
+
+# (name, url) of each channel and (input, output) name or url of each connection
+document_type: TypeAlias = tuple[list[tuple[str, str]], list[tuple[str, str]]]
+# (id, name, url) of each channel and (input_id, output_id) of each connection
+graph_type: TypeAlias = tuple[list[tuple[str, str, str]], list[tuple[str, str]]]
+rows_type: TypeAlias = tuple[list[dict[str, Any]], list[dict[str, Any]]]
+# downloads the document sent with the command, None if no file was sent
+download_type: TypeAlias = Callable[[], Coroutine[Any, Any, bytes | None]]
+
+
+def parse_json(text: str) -> document_type | Exception:
+    """Parses a json document in the form {"channels": [{"name", "url"}], "connections": [{"input", "output"}]}.
+
+    Args:
+        text (str): document content.
+
+    Returns:
+        document_type | Exception: channels and connections in the document or exception if it is mal-formed.
+    """
+
+    try:
+        data: Any = loads(text)
+        channels: list[tuple[str, str]] = [(str(c["name"]).strip(), str(c["url"]).strip()) for c in data.get("channels", [])]
+        connections: list[tuple[str, str]] = [(str(c["input"]).strip(), str(c["output"]).strip()) for c in data.get("connections", [])]
+    except (JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+        return InvalidDocumentException(message=f"Mal-formed json document: {e}")
+
+    return channels, connections
+
+
+def parse_csv(text: str) -> document_type | Exception:
+    """Parses a csv document with lines in the form channel,<name>,<url> or connection,<input>,<output>.
+
+    Args:
+        text (str): document content.
+
+    Returns:
+        document_type | Exception: channels and connections in the document or exception if it is mal-formed.
+    """
+
+    channels: list[tuple[str, str]] = []
+    connections: list[tuple[str, str]] = []
+
+    for line, row in enumerate(reader(text.splitlines()), start=1):
+        if len(row) == 0 or row[0].strip().startswith("#"): continue
+        if len(row) != 3: return InvalidDocumentException(message="Every line must have exactly three fields.", line=line)
+
+        kind, first, second = [field.strip() for field in row]
+        if kind == "channel": channels.append((first, second))
+        elif kind == "connection": connections.append((first, second))
+        else: return InvalidDocumentException(message="Lines must start with channel or connection.", line=line)
+
+    return channels, connections
+
+
+def parse_document(document: bytes | None) -> document_type | Exception:
+    """Parses the uploaded document as json or csv.
+
+    Args:
+        document (bytes | None): uploaded file content, None if no file was sent.
+
+    Returns:
+        document_type | Exception: channels and connections in the document or exception if it is mal-formed.
+    """
+
+    if document is None: return InvalidCommandException(message="Send the document together with the command.")
+
+    try:
+        text: str = document.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return InvalidDocumentException(message="Document must be utf-8 encoded.")
+
+    return parse_json(text) if text.lstrip().startswith("{") else parse_csv(text)
+
+
+def query_database(session: SessionProtocol) -> graph_type | Exception:
+    """Reads every channel and connection with one query each, without loading relationships.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        graph_type | Exception: channels and connections in the database or exception if any.
+    """
+
+    try:
+        channels: list[tuple[str, str, str]] = [tuple(row) for row in session.query(Channel.id, Channel.name, Channel.url).all()]
+        connections: list[tuple[str, str]] = [tuple(row) for row in session.query(input_output.c.input_id, input_output.c.output_id).all()]
+    except SQLAlchemyError as e:
+        return DatabaseQueryException(exc=e)
+
+    return channels, connections
+
+
+def validate(document: document_type, graph: graph_type) -> rows_type | Exception:
+    """Validates the whole document against the database in memory.
+
+    Args:
+        document (document_type): channels and connections from the document.
+        graph (graph_type): channels and connections from the database.
+
+    Returns:
+        rows_type | Exception: rows to insert in the Channel and InputOutput tables or exception if validation fails.
+    """
+
+    new_channels, new_connections = document
+    channels, connections = graph
+
+    names: dict[str, str] = {str(name): str(id_) for id_, name, _ in channels}
+    urls: dict[str, str] = {str(url): str(id_) for id_, _, url in channels}
+
+    channel_rows: list[dict[str, Any]] = []
+    for name, url in new_channels:
+        if not validate_url(url): return InvalidCommandException(message="Invalid url.", command=url)
+        if name in names or url in urls: return ChannelAlreadyExistsException(name=name, url=url)
+
+        id_: str = str(uuid4())
+        names[name] = id_
+        urls[url] = id_
+        channel_rows.append({"id": id_, "name": name, "url": url})
+
+    graph_: dict[str, set[str]] = {str(id_): set() for id_, _, _ in channels}
+    graph_.update({row["id"]: set() for row in channel_rows})
+    for input_id, output_id in connections:
+        graph_.setdefault(str(input_id), set()).add(str(output_id))
+
+    find_id = lambda value: (urls if get_channel_filter_attr(value) == "url" else names).get(value)
+
+    connection_rows: list[dict[str, Any]] = []
+    for input_value, output_value in new_connections:
+        input_id: str | None = find_id(input_value)
+        output_id: str | None = find_id(output_value)
+
+        if input_id is None: return ChannelDoesNotExistException(message=f"There is no channel with the name or url {input_value}.")
+        if output_id is None: return ChannelDoesNotExistException(message=f"There is no channel with the name or url {output_value}.")
+        if input_id == output_id: return SameInputAndOutputException(input_id=input_id, output_id=output_id)
+        if output_id in graph_[input_id]: return ChannelsAlreadyConnectedException(input_id=input_id, output_id=output_id)
+
+        graph_[input_id].add(output_id)
+        connection_rows.append({"input_id": input_id, "output_id": output_id})
+
+    # a single loop check over the resulting graph instead of one per connection
+    loop: tuple[str, ...] | None = get_graph_loop(graph_)
+    if loop is not None:
+        ids_to_names: dict[str, str] = {id_: name for name, id_ in names.items()}
+        return ChannelLoopException(loop=tuple([ids_to_names.get(id_, id_) for id_ in loop]))
+
+    return channel_rows, connection_rows
+
+
+def commit_to_database(rows: rows_type, session: SessionProtocol) -> None | Exception:
+    """Inserts all channels and connections in a single transaction.
+
+    Args:
+        rows (rows_type): rows to insert in the Channel and InputOutput tables.
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    channel_rows, connection_rows = rows
+
+    try:
+        if len(channel_rows) > 0: session.execute(Channel.__table__.insert(), channel_rows)
+        if len(connection_rows) > 0: session.execute(input_output.insert(), connection_rows)
+        bump_config_version(session)
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        return DatabaseCommitException(exc=e)
+
+
+async def import_channels(download: download_type, chat_id: int, session: SessionProtocol) -> str | Exception:
+    """Route to add many channels and connections from a json or csv document at once.
+
+    Args:
+        download (download_type): function downloading the uploaded file, only called once the chat is authorized.
+        chat_id (int): chat id from event.
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        str | Exception: ok message or exception if any
+    """
+
+    # check if user is authorized
+    is_auth: bool | Exception =  is_authorized(chat_id, session)
+    if isinstance(is_auth, Exception): return is_auth
+    if not is_auth: return NotAuthorizedException(chat_id=chat_id)
+
+    # download and parse document
+    document: bytes | None = await download()
+    parsed_document: document_type | Exception = parse_document(document)
+    if isinstance(parsed_document, Exception): return parsed_document
+
+    # query database
+    graph: graph_type | Exception = query_database(session)
+    if isinstance(graph, Exception): return graph
+
+    # make validations
+    rows: rows_type | Exception = validate(parsed_document, graph)
+    if isinstance(rows, Exception): return rows
+
+    # commit to database
+    res: None | Exception = commit_to_database(rows, session)
+    if isinstance(res, Exception): return res
+
+    # objects loaded before the import do not know about the new connections
+    session.expire_all()
+
+    return f"{len(rows[0])} channels and {len(rows[1])} connections imported successfully!"
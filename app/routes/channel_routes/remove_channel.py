@@ -7,6 +7,7 @@ from app.cmd.handle_command import handle_command
 from app.auth.is_authorized import is_authorized
 
 from app.utils.get_channel_filter_attr import get_channel_filter_attr
+from app.utils.config_version import bump_config_version
 
 from classes.validation_exceptions import ChannelDoesNotExistException, NotAuthorizedException
 from classes.fatal_exceptions import DatabaseCommitException, DatabaseQueryException
@@ -64,6 +65,7 @@ def commit_to_database(channel: Channel, session: SessionProtocol) -> None | Exc
         channel.inputs.clear()
         channel.outputs.clear()
         session.delete(channel)
+        bump_config_version(session)
         session.commit()
     except SQLAlchemyError as e:
         return DatabaseCommitException(exc=e)
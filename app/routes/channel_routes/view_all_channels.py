@@ -1,72 +1,104 @@
-from typing import Callable
+from typing import Any, Callable, Iterator
 
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.auth.is_authorized import is_authorized
 
+from app.utils.paginate import PageOptions, YIELD_PER, format_page_footer, get_page_options, paginate, send_listing_file, send_file_type
+
 from classes.validation_exceptions import NotAuthorizedException, NoChannelFoundException
 from classes.fatal_exceptions import DatabaseQueryException
 from classes.sqlalchemy_protocols import SessionProtocol
 
 from db.schema import Channel
 
+format_channel: Callable[[Any], str] = lambda channel: f"{channel.name} - {channel.url}"
 
-def query_database(session: SessionProtocol) -> list[Channel] | Exception:
-    """Reads all channels from the database.
 
-    Args:
+def query_database(options: PageOptions, session: SessionProtocol) -> tuple[list[Any], bool] | Exception:
+    """Reads a page of channels from the database.
 
+    Args:
+        options (PageOptions): pagination options.
         session (SessionProtocol): sqlalchemy session instance.
 
     Returns:
-        None | Exception: None if everything went well or exception if any.
+        tuple[list[Any], bool] | Exception: name and url of the channels in the page and whether there is a next page or exception if any.
     """
-    
+
     try:
-        channels: list[Channel] = session.query(Channel).all()
+        channels, has_more = paginate(session.query(Channel.name, Channel.url), Channel.name, options)
     except SQLAlchemyError as e:
         session.rollback()
         return DatabaseQueryException(exc=e)
-    
+
     if len(channels) == 0:
         return NoChannelFoundException(all=True)
-    return channels
+    return channels, has_more
+
 
+def stream_database(session: SessionProtocol) -> Iterator[str]:
+    """Reads every channel from the database in batches.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Yields:
+        str: formatted channel.
+    """
 
-def format_message(channels: list[Channel]) -> str:
+    query = session.query(Channel.name, Channel.url).order_by(Channel.name).execution_options(stream_results=True).yield_per(YIELD_PER)
+    for channel in query:
+        yield format_channel(channel)
+
+
+def format_message(channels: list[Any], has_more: bool) -> str:
     """Structures channels queried in a message.
 
     Args:
-        channels (list[Channel]): list of channels from database
+        channels (list[Any]): name and url of channels from database
+        has_more (bool): whether there is a next page.
 
     Returns:
         str: message to be sent to the user.
     """
-    
-    format_channel: Callable[[Channel], str] = lambda channel: f"{channel.name} - {channel.url}"
+
     formated_channels: str = "\n".join([format_channel(channel) for channel in channels])
-    message: str = f"Channels: \n {formated_channels}"
+    footer: str = format_page_footer("/view_all_channel", str(channels[-1].name), has_more)
+    message: str = f"Channels: \n {formated_channels}{footer}"
     return message
 
 
-def view_all_channels(chat_id: int, session: SessionProtocol) -> str | Exception: 
+async def view_all_channels(command: str | None, chat_id: int, session: SessionProtocol, send_file: send_file_type) -> str | Exception:
     """Route to read all channels from the database.
 
-    Args: 
+    Args:
+        command (str | None): command string from event.
         chat_id (int): chat id from event.
         session (SessionProtocol): sqlalchemy session instance.
+        send_file (send_file_type): function to send the listing as a file.
 
     Returns:
         str | Exception: ok message or exception if any
     """
-    
+
     is_auth: bool | Exception =  is_authorized(chat_id, session)
     if isinstance(is_auth, Exception): return is_auth
     if not is_auth: return NotAuthorizedException(chat_id=chat_id)
-    
-    channels: list[Channel] | Exception = query_database(session)
-    if isinstance(channels, Exception): return channels
-    
-    message: str = format_message(channels)
-    
+
+    options: PageOptions | Exception = get_page_options(command)
+    if isinstance(options, Exception): return options
+
+    # send every channel in a file instead of a page
+    if options.as_file:
+        sent: int | Exception = await send_listing_file(stream_database(session), "channels", send_file)
+        if isinstance(sent, Exception): return sent
+        if sent == 0: return NoChannelFoundException(all=True)
+        return f"{sent} channels sent."
+
+    page: tuple[list[Any], bool] | Exception = query_database(options, session)
+    if isinstance(page, Exception): return page
+
+    message: str = format_message(*page)
+
     return message
@@ -1,73 +1,110 @@
-from typing import Callable
+from typing import Callable, Iterator
 
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload
 
 from app.auth.is_authorized import is_authorized
 
+from app.utils.paginate import PageOptions, YIELD_PER, format_page_footer, get_page_options, paginate, send_listing_file, send_file_type
+
 from classes.validation_exceptions import NotAuthorizedException, NoChannelFoundException
 from classes.fatal_exceptions import DatabaseQueryException
 from classes.sqlalchemy_protocols import SessionProtocol
 
 from db.schema import Channel
 
+format_channel: Callable[[Channel], str] = lambda channel: f"{channel.name} - {channel.url}"
+get_outputs: Callable[[Channel], str] = lambda channel: "\n".join([format_channel(channel) for channel in channel.outputs])
+get_outputs_and_check: Callable[[Channel], str] = lambda channel: get_outputs(channel) if len(channel.outputs) > 0 else "No outputs found for this channel."
+format_connections: Callable[[Channel], str] = lambda channel: f"Channel: \n{format_channel(channel)}\nOutputs:\n{get_outputs_and_check(channel)}"
+
 
-def query_database(session: SessionProtocol) -> list[Channel] | Exception:
-    """Reads all channels  and their connections from the database.
+def query_database(options: PageOptions, session: SessionProtocol) -> tuple[list[Channel], bool] | Exception:
+    """Reads a page of channels and their connections from the database.
 
     Args:
+        options (PageOptions): pagination options.
         session (SessionProtocol): sqlalchemy session instance.
 
     Returns:
-        list[Channel] | Exception: list of channels from database if everything went well or exception if any.
+        tuple[list[Channel], bool] | Exception: channels in the page and whether there is a next page or exception if any.
     """
-    
+
     try:
-        channels: list[Channel] = session.query(Channel).all()
+        # load the outputs of the whole page in one extra query instead of one per channel
+        query = session.query(Channel).options(selectinload(Channel.outputs))
+        channels, has_more = paginate(query, Channel.name, options)
     except SQLAlchemyError as e:
         session.rollback()
         return DatabaseQueryException(exc=e)
-    
+
     if len(channels) == 0:
         return NoChannelFoundException(all=True)
-    return channels
+    return channels, has_more
+
+
+def stream_database(session: SessionProtocol) -> Iterator[str]:
+    """Reads every channel and its connections from the database in batches.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Yields:
+        str: formatted channel and its outputs.
+    """
+
+    query = session.query(Channel).options(selectinload(Channel.outputs)).order_by(Channel.name).execution_options(stream_results=True).yield_per(YIELD_PER)
+    for channel in query:
+        yield format_connections(channel) + "\n"
 
 
-def format_message(channels: list[Channel]) -> str:
+def format_message(channels: list[Channel], has_more: bool) -> str:
     """Structures channels queried in a message.
 
     Args:
         channels (list[Channel]): list of channels from database
+        has_more (bool): whether there is a next page.
 
     Returns:
         str: message to be sent to the user.
     """
-    
-    format_channel: Callable[[Channel], str] = lambda channel: f"{channel.name} - {channel.url}"
-    get_outputs: Callable[[Channel], str] = lambda channel: "\n".join([format_channel(channel) for channel in channel.outputs])
-    get_outputs_and_check: Callable[[Channel], str] = lambda channel: get_outputs(channel) if len(channel.outputs) > 0 else "No outputs found for this channel."
-    channels_: list[str] = [f"Channel: \n{format_channel(channel)}\nOutputs:\n{get_outputs_and_check(channel)}" for channel in channels]
-    message: str = "\n\n".join(channels_)
+
+    channels_: list[str] = [format_connections(channel) for channel in channels]
+    footer: str = format_page_footer("/view_connections", str(channels[-1].name), has_more)
+    message: str = "\n\n".join(channels_) + footer
     return message
 
 
-def view_connections(chat_id: int, session: SessionProtocol) -> str | Exception: 
+async def view_connections(command: str | None, chat_id: int, session: SessionProtocol, send_file: send_file_type) -> str | Exception:
     """Route to read all channels  and their connections from the database.
 
-    Args: 
+    Args:
+        command (str | None): command string from event.
         chat_id (int): chat id from event.
         session (SessionProtocol): sqlalchemy session instance.
+        send_file (send_file_type): function to send the listing as a file.
 
     Returns:
         str | Exception: ok message or exception if any
     """
-    
+
     is_auth: bool | Exception =  is_authorized(chat_id, session)
     if isinstance(is_auth, Exception): return is_auth
     if not is_auth: return NotAuthorizedException(chat_id=chat_id)
-    
-    channels: list[Channel] | Exception = query_database(session)
-    if isinstance(channels, Exception): return channels
-    
-    message: str = format_message(channels)
-    
+
+    options: PageOptions | Exception = get_page_options(command)
+    if isinstance(options, Exception): return options
+
+    # send every connection in a file instead of a page
+    if options.as_file:
+        sent: int | Exception = await send_listing_file(stream_database(session), "connections", send_file)
+        if isinstance(sent, Exception): return sent
+        if sent == 0: return NoChannelFoundException(all=True)
+        return f"Connections of {sent} channels sent."
+
+    page: tuple[list[Channel], bool] | Exception = query_database(options, session)
+    if isinstance(page, Exception): return page
+
+    message: str = format_message(*page)
+
     return message
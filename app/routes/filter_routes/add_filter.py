@@ -8,6 +8,8 @@ from app.cmd.handle_command import handle_command
 
 from app.auth.is_authorized import is_authorized
 
+from app.utils.config_version import bump_config_version
+
 from classes.validation_exceptions import FilterAlreadyExistsException, NotAuthorizedException, CircularFilterException, ConditionIsEqualToReplacementException
 from classes.fatal_exceptions import DatabaseCommitException
 from classes.sqlalchemy_protocols import SessionProtocol
@@ -83,6 +85,7 @@ def commit_to_database(condition: str, mode: str, session: SessionProtocol, repl
     try:
         filter_ = Filter(id=str(uuid4()), condition=condition, mode=mode, replacement=replacement)
         session.add(instance=filter_)
+        bump_config_version(session)
         session.commit()
     except SQLAlchemyError as e:
         session.rollback()
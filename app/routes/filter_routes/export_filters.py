@@ -0,0 +1,107 @@
+from typing import Any, Callable, Coroutine, TypeAlias
+
+from pathlib import Path
+
+from csv import writer
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.auth.is_authorized import is_authorized
+
+from classes.validation_exceptions import NoFilterFoundException, NotAuthorizedException
+from classes.fatal_exceptions import DatabaseQueryException, LogException
+from classes.telethon_protocols import MessageProtocol
+from classes.sqlalchemy_protocols import SessionProtocol
+
+from db.schema import Filter
+
+send_file_type: TypeAlias = Callable[[str], Coroutine[Any, Any, MessageProtocol]]
+
+EXPORT_DIR: str = "export"
+EXPORT_FILE: str = f"{EXPORT_DIR}/filters.csv"
+# number of rows fetched from the database cursor at a time
+YIELD_PER: int = 1000
+
+
+def write_export(session: SessionProtocol) -> int | Exception:
+    """Writes every filter to a csv file reading them from a server side cursor.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        int | Exception: number of filters written or exception if any.
+    """
+
+    try:
+        Path(EXPORT_DIR).mkdir(exist_ok=True)
+    except Exception as e:
+        return LogException(exc=e, message="Could not create export file.")
+
+    written: int = 0
+    try:
+        query = session.query(Filter.mode, Filter.condition, Filter.replacement) \
+            .order_by(Filter.mode, Filter.condition) \
+            .execution_options(stream_results=True) \
+            .yield_per(YIELD_PER)
+
+        with open(EXPORT_FILE, "w", newline="") as f:
+            csv_writer = writer(f)
+            for mode, condition, replacement in query:
+                csv_writer.writerow([mode, condition, replacement] if mode == "replacement" else [mode, condition])
+                written += 1
+    except SQLAlchemyError as e:
+        return DatabaseQueryException(exc=e)
+    except OSError as e:
+        return LogException(exc=e, message="Could not create export file.")
+
+    return written
+
+
+def cleanup_export() -> None | Exception:
+    """Removes the export file after it is sent.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    try:
+        Path(EXPORT_FILE).unlink(missing_ok=True)
+    except Exception as e:
+        return LogException(exc=e, message="Could not remove export file.")
+
+
+async def export_filters(chat_id: int, session: SessionProtocol, send_file: send_file_type) -> str | Exception:
+    """Route to send every filter in a csv document that can be read by /import_filters.
+
+    Args:
+        chat_id (int): chat id from event.
+        session (SessionProtocol): sqlalchemy session instance.
+        send_file (send_file_type): function to send the exported file.
+
+    Returns:
+        str | Exception: ok message or exception if any
+    """
+
+    # check if user is authorized
+    is_auth: bool | Exception =  is_authorized(chat_id, session)
+    if isinstance(is_auth, Exception): return is_auth
+    if not is_auth: return NotAuthorizedException(chat_id=chat_id)
+
+    # write file
+    written: int | Exception = write_export(session)
+    if isinstance(written, Exception): return written
+    if written == 0:
+        cleanup_export()
+        return NoFilterFoundException(message="No filter found.")
+
+    # send file
+    try:
+        await send_file(EXPORT_FILE)
+    except Exception as e:
+        return LogException(exc=e, message="Could not send export file.")
+
+    res: None | Exception = cleanup_export()
+    if isinstance(res, Exception): return res
+
+    return f"{written} filters exported."
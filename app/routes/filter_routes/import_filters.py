@@ -0,0 +1,237 @@
+from typing import Any, Callable, Coroutine, Iterable, Iterator, TypeAlias
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from uuid import uuid4
+
+from csv import reader
+
+from io import BytesIO, TextIOWrapper
+
+from json import loads, JSONDecodeError
+
+from re import compile as compile_regex
+
+from app.auth.is_authorized import is_authorized
+
+from app.utils.config_version import bump_config_version
+
+from classes.validation_exceptions import CircularFilterException, ConditionIsEqualToReplacementException, FilterAlreadyExistsException
+from classes.validation_exceptions import InvalidCommandException, InvalidDocumentException, NotAuthorizedException
+from classes.fatal_exceptions import DatabaseCommitException, DatabaseQueryException
+from classes.sqlalchemy_protocols import SessionProtocol
+
+from db.schema import Filter
+
+# (mode, condition, replacement) of each filter
+filter_row_type: TypeAlias = tuple[str, str, str | None]
+# downloads the document sent with the command, None if no file was sent
+download_type: TypeAlias = Callable[[], Coroutine[Any, Any, bytes | None]]
+
+MODES: tuple[str, ...] = ("blacklist", "replacement", "link_remover")
+# number of rows sent to the database in each insert statement
+CHUNK_SIZE: int = 500
+UTF8_BOM: bytes = b"\xef\xbb\xbf"
+NOT_WHITESPACE = compile_regex(rb"\S")
+
+
+def iter_csv(lines: Iterable[str]) -> Iterator[filter_row_type | Exception]:
+    """Yields filters from a csv document with lines in the form <mode>,<condition>[,<replacement>].
+
+    Args:
+        lines (Iterable[str]): document lines, read one at a time.
+
+    Yields:
+        filter_row_type | Exception: filter in each line or exception if the line is mal-formed.
+    """
+
+    try:
+        for line, row in enumerate(reader(lines), start=1):
+            if len(row) == 0 or row[0].strip().startswith("#"): continue
+
+            fields: list[str] = [field.strip() for field in row]
+            mode: str = fields[0]
+            if mode not in MODES:
+                yield InvalidDocumentException(message=f"Mode must be one of {', '.join(MODES)}.", line=line)
+                return
+
+            expected_len: int = 3 if mode == "replacement" else 2
+            if len(fields) != expected_len or "" in fields:
+                yield InvalidDocumentException(message=f"Filters of mode {mode} must have {expected_len} fields.", line=line)
+                return
+
+            yield mode, fields[1], fields[2] if mode == "replacement" else None
+    except UnicodeDecodeError:
+        # lines are decoded while they are read
+        yield InvalidDocumentException(message="Document must be utf-8 encoded.")
+
+
+def iter_json(text: str) -> Iterator[filter_row_type | Exception]:
+    """Yields filters from a json document in the form [{"mode", "condition", "replacement"}].
+
+    Args:
+        text (str): document content.
+
+    Yields:
+        filter_row_type | Exception: filter in each item or exception if the item is mal-formed.
+    """
+
+    try:
+        data: Any = loads(text)
+    except JSONDecodeError as e:
+        yield InvalidDocumentException(message=f"Mal-formed json document: {e}")
+        return
+
+    for line, item in enumerate(data if isinstance(data, list) else [data], start=1):
+        if not isinstance(item, dict) or item.get("mode") not in MODES or not item.get("condition"):
+            yield InvalidDocumentException(message="Every item must have a valid mode and condition.", line=line)
+            return
+
+        mode: str = str(item["mode"])
+        replacement: Any = item.get("replacement")
+        if mode == "replacement" and not replacement:
+            yield InvalidDocumentException(message="Replacement filters must have a replacement.", line=line)
+            return
+
+        yield mode, str(item["condition"]).strip(), str(replacement).strip() if mode == "replacement" else None
+
+
+def iter_document(document: bytes | None) -> Iterator[filter_row_type | Exception]:
+    """Yields filters from the uploaded document as json or csv.
+
+    Args:
+        document (bytes | None): uploaded file content, None if no file was sent.
+
+    Yields:
+        filter_row_type | Exception: filters in the document or exception if it is mal-formed.
+    """
+
+    if document is None:
+        yield InvalidCommandException(message="Send the document together with the command.")
+        return
+
+    # the format is told by the first character, without decoding the whole document
+    first = NOT_WHITESPACE.search(document, len(UTF8_BOM) if document.startswith(UTF8_BOM) else 0)
+    if first is None or first.group(0) not in (b"[", b"{"):
+        yield from iter_csv(TextIOWrapper(BytesIO(document), encoding="utf-8-sig", newline=""))
+        return
+
+    # a json array is only valid as a whole, so it is parsed at once
+    try:
+        text: str = document.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        yield InvalidDocumentException(message="Document must be utf-8 encoded.")
+        return
+
+    yield from iter_json(text)
+
+
+def query_database(session: SessionProtocol) -> list[filter_row_type] | Exception:
+    """Reads the mode, condition and replacement of every filter without building ORM objects.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        list[filter_row_type] | Exception: filters from database or exception if any.
+    """
+
+    try:
+        filters: list[filter_row_type] = [tuple(row) for row in session.query(Filter.mode, Filter.condition, Filter.replacement).all()]
+    except SQLAlchemyError as e:
+        return DatabaseQueryException(exc=e)
+
+    return filters
+
+
+def validate(new_filters: Iterator[filter_row_type | Exception], filters: list[filter_row_type]) -> list[dict[str, Any]] | Exception:
+    """Validates every filter of the document against the database and the document itself in a single pass.
+
+    Args:
+        new_filters (Iterator[filter_row_type | Exception]): filters from the document.
+        filters (list[filter_row_type]): filters from database.
+
+    Returns:
+        list[dict[str, Any]] | Exception: rows to insert in the Filter table or exception if validation fails.
+    """
+
+    # conditions are unique across every mode
+    conditions: set[str] = {str(condition) for _, condition, _ in filters}
+    replacement_conditions: set[str] = {str(condition) for mode, condition, _ in filters if mode == "replacement"}
+    replacements: set[str] = {str(replacement) for mode, _, replacement in filters if mode == "replacement"}
+
+    rows: list[dict[str, Any]] = []
+    for new_filter in new_filters:
+        if isinstance(new_filter, Exception): return new_filter
+        mode, condition, replacement = new_filter
+
+        if condition == replacement:
+            return ConditionIsEqualToReplacementException(condition=condition, replacement=replacement)
+        if condition in conditions:
+            return FilterAlreadyExistsException(condition=condition, replacement=replacement, mode=mode)
+        if mode == "replacement" and (condition in replacements or replacement in replacement_conditions):
+            return CircularFilterException(condition=condition, replacement=replacement, mode=mode)
+
+        conditions.add(condition)
+        if mode == "replacement":
+            replacement_conditions.add(condition)
+            replacements.add(str(replacement))
+
+        rows.append({"id": str(uuid4()), "condition": condition, "replacement": replacement, "mode": mode})
+
+    return rows
+
+
+def commit_to_database(rows: list[dict[str, Any]], session: SessionProtocol) -> None | Exception:
+    """Inserts the filters in chunks inside a single transaction.
+
+    Args:
+        rows (list[dict[str, Any]]): rows to insert in the Filter table.
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    try:
+        for start in range(0, len(rows), CHUNK_SIZE):
+            session.execute(Filter.__table__.insert(), rows[start:start + CHUNK_SIZE])
+        bump_config_version(session)
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        return DatabaseCommitException(exc=e)
+
+
+async def import_filters(download: download_type, chat_id: int, session: SessionProtocol) -> str | Exception:
+    """Route to add many filters from a json or csv document at once.
+
+    Args:
+        download (download_type): function downloading the uploaded file, only called once the chat is authorized.
+        chat_id (int): chat id from event.
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        str | Exception: ok message or exception if any
+    """
+
+    # check if user is authorized
+    is_auth: bool | Exception =  is_authorized(chat_id, session)
+    if isinstance(is_auth, Exception): return is_auth
+    if not is_auth: return NotAuthorizedException(chat_id=chat_id)
+
+    # query database
+    filters: list[filter_row_type] | Exception = query_database(session)
+    if isinstance(filters, Exception): return filters
+
+    # download the document, then parse and validate it while reading it
+    document: bytes | None = await download()
+    rows: list[dict[str, Any]] | Exception = validate(iter_document(document), filters)
+    if isinstance(rows, Exception): return rows
+    if len(rows) == 0: return InvalidDocumentException(message="No filter found in the document.")
+
+    # commit to database
+    res: None | Exception = commit_to_database(rows, session)
+    if isinstance(res, Exception): return res
+
+    return f"{len(rows)} filters imported successfully!"
@@ -4,6 +4,8 @@ from app.cmd.handle_command import handle_command
 
 from app.auth.is_authorized import is_authorized
 
+from app.utils.config_version import bump_config_version
+
 from classes.validation_exceptions import FilterDoesNotExistException, NotAuthorizedException
 from classes.fatal_exceptions import DatabaseCommitException
 from classes.sqlalchemy_protocols import SessionProtocol
@@ -60,6 +62,7 @@ def commit_to_database(filter_: Filter, session: SessionProtocol) -> None | Exce
     
     try:
         session.delete(filter_)
+        bump_config_version(session)
         session.commit()
     except SQLAlchemyError as e:
         session.rollback()
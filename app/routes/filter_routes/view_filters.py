@@ -1,94 +1,141 @@
-from typing import Callable
+from typing import Any, Callable, Iterator
 
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.auth.is_authorized import is_authorized
 
+from app.utils.paginate import PageOptions, YIELD_PER, format_page_footer, get_page_options, paginate, send_listing_file, send_file_type
+
 from classes.validation_exceptions import NoFilterFoundException, NotAuthorizedException
 from classes.fatal_exceptions import DatabaseCommitException
 from classes.sqlalchemy_protocols import SessionProtocol
 
 from db.schema import Filter
-    
 
-def query_database(mode: str, session: SessionProtocol) -> list[Filter] | Exception:
-    """Queries the database for filter.
+format_filter_without_replacement: Callable[[Any], str] = lambda filter_: f"{filter_.condition}"
+format_filter_with_replacement: Callable[[Any], str] = lambda filter_: f"{filter_.condition} -> {filter_.replacement}"
+# command used to view each mode, for the next page footer
+view_commands: dict[str, str] = {
+    "blacklist": "/view_blacklist",
+    "replacement": "/view_replacements",
+    "link_remover": "/view_link_removers"
+}
+
+
+def query_database(mode: str, options: PageOptions, session: SessionProtocol) -> tuple[list[Any], bool] | Exception:
+    """Queries the database for a page of filters.
 
     Args:
         mode (str): blacklist, replacement or link_remover.
+        options (PageOptions): pagination options.
         session (SessionProtocol): sqlalchemy session instance.
     Returns:
-        list[Filter] | Exception: filter from database if any or exception if any.
+        tuple[list[Any], bool] | Exception: filters in the page and whether there is a next page or exception if any.
     """
-        
+
     try:
-        filter_: list[Filter] = session.query(Filter).filter(Filter.mode == mode).all()
+        query = session.query(Filter.condition, Filter.replacement, Filter.mode).filter(Filter.mode == mode)
+        filter_, has_more = paginate(query, Filter.condition, options)
     except SQLAlchemyError as e:
         return DatabaseCommitException(exc=e)
-    
-    return filter_
+
+    return filter_, has_more
+
+
+def stream_database(mode: str, session: SessionProtocol) -> Iterator[str]:
+    """Reads every filter of a mode from the database in batches.
+
+    Args:
+        mode (str): blacklist, replacement or link_remover.
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Yields:
+        str: formatted filter.
+    """
+
+    format_filter = format_filter_with_replacement if mode == "replacement" else format_filter_without_replacement
+    query = session.query(Filter.condition, Filter.replacement) \
+        .filter(Filter.mode == mode) \
+        .order_by(Filter.condition) \
+        .execution_options(stream_results=True) \
+        .yield_per(YIELD_PER)
+    for filter_ in query:
+        yield format_filter(filter_)
 
 
-def validate(filter_: list[Filter]) -> list[Filter] | Exception:
+def validate(filter_: list[Any]) -> list[Any] | Exception:
     """Validates the filter.
 
     Args:
         filter_ (Filter): validated filter from database or exception if any.
-        
+
     Returns:
         None | Exception: validated filter if everything went well or exception if validation fails.
     """
 
     if len(filter_) == 0: return NoFilterFoundException()
     return filter_
-    
 
 
-def format_message(filters: list[Filter]) -> str:
+
+def format_message(filters: list[Any], has_more: bool) -> str:
     """Structures filters queried in a message.
 
     Args:
-        filters (list[Filter]): list of filters from database
+        filters (list[Any]): list of filters from database
+        has_more (bool): whether there is a next page.
 
     Returns:
         str: message to be sent to the user.
     """
-    
-    format_filter_without_replacement: Callable[[Filter], str] = lambda filter_: f"{filter_.condition}"
-    format_filter_with_replacement: Callable[[Filter], str] = lambda filter_: f"{filter_.condition} -> {filter_.replacement}"
+
     format_filter = format_filter_with_replacement if filters[0].mode == "replacement" else format_filter_without_replacement
     formated_filters: str = "\n".join([format_filter(filter_) for filter_ in filters])
-    message: str = f"Filters: \n {formated_filters}"
+    footer: str = format_page_footer(view_commands[str(filters[0].mode)], str(filters[-1].condition), has_more)
+    message: str = f"Filters: \n {formated_filters}{footer}"
     return message
 
 
-def view_filters(chat_id: int, session: SessionProtocol, mode: str) -> str | Exception: 
+async def view_filters(command: str | None, chat_id: int, session: SessionProtocol, mode: str, send_file: send_file_type) -> str | Exception:
     """Route to view all filters of a determined mode from database.
 
     Args:
+        command (str | None): command string from event.
         chat_id (int): chat id from event.
         session (SessionProtocol): sqlalchemy session instance.
         mode (str): blacklist, replacement or link_remover.
+        send_file (send_file_type): function to send the listing as a file.
 
     Returns:
         str | Exception: ok message or exception if any
     """
-    
+
     # check if user is authorized
     is_auth: bool | Exception =  is_authorized(chat_id, session)
     if isinstance(is_auth, Exception): return is_auth
     if not is_auth: return NotAuthorizedException(chat_id=chat_id)
-    
+
+    # parse command
+    options: PageOptions | Exception = get_page_options(command)
+    if isinstance(options, Exception): return options
+
+    # send every filter in a file instead of a page
+    if options.as_file:
+        sent: int | Exception = await send_listing_file(stream_database(mode, session), mode, send_file)
+        if isinstance(sent, Exception): return sent
+        if sent == 0: return NoFilterFoundException()
+        return f"{sent} filters sent."
+
     # query database
-    filters: list[Filter] | Exception = query_database(mode, session)
-    if isinstance(filters, Exception): return filters
-    
+    page: tuple[list[Any], bool] | Exception = query_database(mode, options, session)
+    if isinstance(page, Exception): return page
+    filters, has_more = page
+
     # validate filter
-    validated_filter: list[Filter] | Exception = validate(filters)
+    validated_filter: list[Any] | Exception = validate(filters)
     if isinstance(validated_filter, Exception): return validated_filter
-    
+
     # format message
-    message: str = format_message(validated_filter)
-    if isinstance(message, Exception): return message
-    
-    return message
\ No newline at end of file
+    message: str = format_message(validated_filter, has_more)
+
+    return message
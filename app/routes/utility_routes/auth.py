@@ -3,15 +3,17 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.cmd.handle_command import handle_command
 
 from app.auth.authorize import authorize
+from app.auth.auth_cache import update_auth_cache
+from app.auth.auth_throttle import get_retry_after, register_attempt, reset_attempts
 
-from classes.validation_exceptions import AuthorizationException
+from classes.validation_exceptions import AuthorizationException, TooManyAttemptsException
 from classes.fatal_exceptions import DatabaseCommitException
 from classes.sqlalchemy_protocols import SessionProtocol
 
 from db.schema import Admin
 
 
-def validator(login: str, password: str, session: SessionProtocol) -> None | Exception:
+async def validator(login: str, password: str, session: SessionProtocol) -> None | Exception:
     """Validates the login and password.
 
     Args:
@@ -23,7 +25,7 @@ def validator(login: str, password: str, session: SessionProtocol) -> None | Exc
         None | Exception: None if everything went well or exception if validation fails.
     """
     
-    res: bool | Exception = authorize(login, password, session)
+    res: bool | Exception = await authorize(login, password, session)
     if isinstance(res, Exception): return res
     if not res: return AuthorizationException(login=login, password=password)
 
@@ -43,14 +45,18 @@ def registerer(login: str, password: str, chat_id: int, session: SessionProtocol
     
     try:
         admin: Admin = session.query(Admin).filter(Admin.login == login).first()  # type: ignore
+        old_chat_id: int | None = admin.authorized_chat_id  # type: ignore
         setattr(admin, "authorized_chat_id", chat_id)
         session.commit()
     except SQLAlchemyError as e:
         session.rollback()
         return DatabaseCommitException(exc=e)
+    
+    # only update the cache once the change is persisted
+    update_auth_cache(old_chat_id, chat_id)
 
 
-def auth(command: str | None, chat_id: int, session: SessionProtocol) -> str | Exception: 
+async def auth(command: str | None, chat_id: int, session: SessionProtocol) -> str | Exception: 
     """Route to authorize a chat to the database.
 
     Args:
@@ -71,8 +77,12 @@ def auth(command: str | None, chat_id: int, session: SessionProtocol) -> str | E
     login: str = args[0]
     password: str = args[1]
     
-    is_all_valid: None | Exception = validator(login, password, session)
+    # throttle attempts before paying for the password hashing
+    if not register_attempt(chat_id): return TooManyAttemptsException(chat_id=chat_id, retry_after=get_retry_after(chat_id))
+    
+    is_all_valid: None | Exception = await validator(login, password, session)
     if isinstance(is_all_valid, Exception): return is_all_valid
+    reset_attempts(chat_id)
     
     res: None | Exception = registerer(login, password, chat_id, session)
     if isinstance(res, Exception): return res
@@ -1,33 +1,59 @@
-from typing import Callable
+from functools import lru_cache
 
-from inspect import getsource
+from app.cmd.command_registry import CommandInfo, command_registry, get_command
 
-from ast import AST, AsyncFunctionDef, parse, walk, get_docstring
 
+@lru_cache(maxsize=1)
+def format_help_message() -> str:
+    """Creates the message listing every command, once, from the command registry.
 
-def help_(router: Callable[[str], None | Exception]) -> str:
-    """Gets docstring of all route closures in router function to create a help message.
+    Returns:
+        str: message with all commands.
+    """
+
+    sections: dict[str, list[str]] = {}
+    for command in command_registry.values():
+        # replace spaces with indented new lines to make it look better
+        sections.setdefault(command.section, []).append(command.usage.replace(" ", "\n    "))
+
+    formated_sections: list[str] = [
+        (f"{section}:\n\n" if section != "" else "") + "\n\n".join(usages)
+        for section, usages in sections.items()
+    ]
+    message: str = "Commands:\n\n" + "\n\n".join(formated_sections) + "\n\nUse /help <command> for more details."
+    return message
+
+
+def format_command_message(command: CommandInfo) -> str:
+    """Creates the message describing a single command.
 
     Args:
-        router (Callable[[str], None  |  Exception]): router function (main).
+        command (CommandInfo): command information from the registry.
 
     Returns:
-        str: message with all commands.
+        str: message with the usage and description of the command.
     """
-    
-    # parse source code of router function
-    source: str = getsource(router)
-    tree: AST = parse(source)
-    
-    # filter async functions from tree
-    functions: list[AsyncFunctionDef] = [f for f in walk(tree) if isinstance(f, AsyncFunctionDef)]
-
-    # get docstrings of all functions
-    function_docs_: list[str | None] = [get_docstring(f) for f in functions]
-    function_docs: list[str] = [f for f in function_docs_ if f is not None]
-    
-    # replace spaces with indented new lines to make it look better
-    function_docs = [f.replace(" ", "\n    ") for f in function_docs]
-    
-    message: str = "Commands:\n\n" + "\n\n".join(function_docs)
-    return message
+
+    description: str = f"\n\n{command.description}" if command.description != "" else ""
+    return f"{command.section}:\n\n{command.usage}{description}"
+
+
+def help_(command: str | None) -> str:
+    """Gets the help message of all commands or of a single command.
+
+    Args:
+        command (str | None): command string from event, e.g. /help or /help add_channel.
+
+    Returns:
+        str: message with all commands or with the details of the requested one.
+    """
+
+    tokens: list[str] = (command or "").split()
+    if len(tokens) < 2:
+        return format_help_message()
+
+    command_info: CommandInfo | None = get_command(tokens[1])
+    if command_info is None:
+        return f"Unknown command {tokens[1]}.\n\n{format_help_message()}"
+
+    return format_command_message(command_info)
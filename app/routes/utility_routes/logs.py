@@ -0,0 +1,105 @@
+from typing import Any, Callable, Coroutine, TypeAlias
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.cmd.handle_command import handle_command
+
+from app.auth.is_authorized import is_authorized
+
+from app.metrics.metrics import logs_dropped
+from app.utils.handle_log import LogEntry, get_pending_logs, get_recent_logs, handle_log
+
+from classes.validation_exceptions import InvalidCommandException, NotAuthorizedException
+from classes.fatal_exceptions import DatabaseQueryException
+from classes.telethon_protocols import MessageProtocol
+from classes.sqlalchemy_protocols import SessionProtocol
+
+from db.schema import Log
+
+send_file_type: TypeAlias = Callable[[str], Coroutine[Any, Any, MessageProtocol]]
+
+DEFAULT_LIMIT: int = 50
+
+
+def parse_limit(command: str) -> int | Exception:
+    """Gets the number of entries requested, the flag is optional.
+
+    Args:
+        command (str): command string from event.
+
+    Returns:
+        int | Exception: number of entries or exception if the command is invalid.
+    """
+    
+    if "--" not in command:
+        return DEFAULT_LIMIT
+    
+    flags: tuple[str, ...] = ("limit", )
+    args: tuple[str, ...] | Exception = handle_command(command, flags)
+    if isinstance(args, Exception): return args
+    
+    if not args[0].isdigit(): return InvalidCommandException(message="Limit must be a positive integer.", command=command)
+    return int(args[0])
+
+
+def query_database(limit: int, session: SessionProtocol) -> list[LogEntry] | Exception:
+    """Reads the most recent entries persisted in the Log table.
+
+    Args:
+        limit (int): max number of entries.
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        list[LogEntry] | Exception: entries from oldest to newest or exception if any.
+    """
+
+    try:
+        rows: list[Any] = session.query(Log.date, Log.message).order_by(Log.date.desc()).limit(limit).all()
+    except SQLAlchemyError as e:
+        session.rollback()
+        return DatabaseQueryException(exc=e)
+
+    return [LogEntry(row.date, row.message) for row in reversed(rows)]
+
+
+async def logs(command: str | None, chat_id: int, session: SessionProtocol, send_file: send_file_type) -> str | Exception: 
+    """Route to send the most recent log entries as a file.
+
+    Args:
+        command (str | None): command string from event.
+        chat_id (int): chat id from event.
+        session (SessionProtocol): sqlalchemy session instance.
+        send_file (send_file_type): function to send the log file.
+
+    Returns:
+        str | Exception: ok message or exception if any
+    """
+    
+    # check if user is authorized
+    is_auth: bool | Exception =  is_authorized(chat_id, session)
+    if isinstance(is_auth, Exception): return is_auth
+    if not is_auth: return NotAuthorizedException(chat_id=chat_id)
+    
+    # parse command
+    command = command if command is not None else ""
+    limit: int | Exception = parse_limit(command)
+    if isinstance(limit, Exception): return limit
+    
+    # read the persisted entries and the ones waiting for the next flush
+    persisted: list[LogEntry] | Exception = query_database(limit, session) if limit > 0 else []
+    if isinstance(persisted, Exception):
+        # the database may be the error being looked for, the entries of this run are kept in memory
+        entries: list[LogEntry] = get_recent_logs(limit)
+    else:
+        entries: list[LogEntry] = sorted(persisted + get_pending_logs(), key=lambda entry: entry.date)[-limit:] if limit > 0 else []
+    if len(entries) == 0: return "No logs recorded."
+    
+    # send all entries in a single file
+    res: None | Exception = await handle_log(entries, send_file)
+    if isinstance(res, Exception): return res
+    
+    message: str = f"{len(entries)} log entries sent."
+    if isinstance(persisted, Exception): message += " The database is unavailable, only the entries since the start were read."
+    dropped: float = logs_dropped.values.get((), 0.0)
+    if dropped > 0: message += f" {int(dropped)} entries were dropped since the start while the database was unavailable."
+    return message
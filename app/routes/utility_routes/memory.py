@@ -0,0 +1,54 @@
+from asyncio import get_running_loop
+
+from app.auth.is_authorized import is_authorized
+
+from app.metrics.memory_report import baseline, format_allocations, format_cache_sizes, start_tracing, stop_tracing
+
+from classes.validation_exceptions import InvalidCommandException, NotAuthorizedException
+from classes.telethon_protocols import TelegramClientProtocol
+from classes.sqlalchemy_protocols import SessionProtocol
+
+ACTIONS: tuple[str, ...] = ("report", "reset", "stop")
+
+
+async def memory(command: str | None, chat_id: int, session: SessionProtocol, client: TelegramClientProtocol) -> str | Exception:
+    """Route to report cache sizes and the allocation sites that grew since the baseline.
+
+    Args:
+        command (str | None): command string from event, e.g. /memory, /memory reset or /memory stop.
+        chat_id (int): chat id from event.
+        session (SessionProtocol): sqlalchemy session instance.
+        client (TelegramClientProtocol): telegram client instance.
+
+    Returns:
+        str | Exception: report message or exception if any
+    """
+
+    # check if user is authorized
+    is_auth: bool | Exception =  is_authorized(chat_id, session)
+    if isinstance(is_auth, Exception): return is_auth
+    if not is_auth: return NotAuthorizedException(chat_id=chat_id)
+
+    # parse command
+    command = command if command is not None else ""
+    tokens: list[str] = command.split()
+    action: str = tokens[1] if len(tokens) > 1 else "report"
+    if action not in ACTIONS:
+        return InvalidCommandException(message=f"Action must be one of {', '.join(ACTIONS)}.", command=command)
+
+    caches: str = format_cache_sizes(session, client)
+
+    if action == "stop":
+        stop_tracing()
+        return f"Allocation tracing stopped.\n\n{caches}"
+
+    # snapshots copy every traced block and the diff walks them, both in a worker thread so forwarding goes on
+    loop = get_running_loop()
+
+    # the first report only starts tracing, allocations are compared from then on
+    if action == "reset" or baseline[0] is None:
+        await loop.run_in_executor(None, start_tracing)
+        return f"Allocation tracing started, send /memory later to see what grew.\n\n{caches}"
+
+    allocations: str = await loop.run_in_executor(None, format_allocations)
+    return f"{allocations}\n\n{caches}"
@@ -0,0 +1,110 @@
+from asyncio import get_running_loop, sleep
+
+from pathlib import Path
+
+from typing import Any, Callable, Coroutine, TypeAlias
+
+from app.auth.is_authorized import is_authorized
+
+from app.metrics.sampling_profiler import SamplingProfiler
+
+from classes.validation_exceptions import DiagnosticsRunningException, InvalidCommandException, NotAuthorizedException
+from classes.fatal_exceptions import LogException
+from classes.telethon_protocols import MessageProtocol
+from classes.sqlalchemy_protocols import SessionProtocol
+
+send_file_type: TypeAlias = Callable[[str], Coroutine[Any, Any, MessageProtocol]]
+
+DEFAULT_SECONDS: int = 10
+MAX_SECONDS: int = 60
+PROFILE_FILE: str = "log/profile.collapsed"
+
+# only one profiler samples the loop at a time
+running: list[bool] = [False]
+
+
+def parse_seconds(command: str) -> int | Exception:
+    """Gets the number of seconds to profile, the argument is optional.
+
+    Args:
+        command (str): command string from event, e.g. /profile 30.
+
+    Returns:
+        int | Exception: seconds or exception if the command is invalid.
+    """
+
+    tokens: list[str] = command.split()
+    if len(tokens) < 2: return DEFAULT_SECONDS
+
+    if not tokens[1].isdigit() or not 0 < int(tokens[1]) <= MAX_SECONDS:
+        return InvalidCommandException(message=f"Seconds must be an integer between 1 and {MAX_SECONDS}.", command=command)
+    return int(tokens[1])
+
+
+def write_profile(content: str) -> None | Exception:
+    """Writes the collapsed stacks to the profile file.
+
+    Args:
+        content (str): collapsed stacks.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    try:
+        Path(PROFILE_FILE).parent.mkdir(parents=True, exist_ok=True)
+        with open(PROFILE_FILE, "w") as f:
+            f.write(content)
+    except OSError as e:
+        return LogException(exc=e, message="Could not create profile file.")
+
+
+async def profile(command: str | None, chat_id: int, session: SessionProtocol, send_file: send_file_type) -> str | Exception:
+    """Route to sample the event loop for some seconds and send the collapsed stacks as a file.
+
+    Args:
+        command (str | None): command string from event.
+        chat_id (int): chat id from event.
+        session (SessionProtocol): sqlalchemy session instance.
+        send_file (send_file_type): function to send the profile file.
+
+    Returns:
+        str | Exception: ok message or exception if any
+    """
+
+    # check if user is authorized
+    is_auth: bool | Exception =  is_authorized(chat_id, session)
+    if isinstance(is_auth, Exception): return is_auth
+    if not is_auth: return NotAuthorizedException(chat_id=chat_id)
+
+    # parse command
+    command = command if command is not None else ""
+    seconds: int | Exception = parse_seconds(command)
+    if isinstance(seconds, Exception): return seconds
+
+    if running[0]: return DiagnosticsRunningException(command=command)
+    running[0] = True
+
+    # the loop keeps handling messages while the profiler thread samples it
+    loop = get_running_loop()
+    profiler = SamplingProfiler()
+    profiler.start()
+    try:
+        await sleep(seconds)
+    finally:
+        # joining the sampling thread waits for its last sample, not on the loop
+        await loop.run_in_executor(None, profiler.stop)
+        running[0] = False
+
+    res: None | Exception = await loop.run_in_executor(None, write_profile, profiler.collapsed())
+    if isinstance(res, Exception): return res
+
+    try:
+        await send_file(PROFILE_FILE)
+    except Exception as e:
+        return LogException(exc=e, message="Could not send profile file.")
+    finally:
+        # the stacks name the bot functions, they are not kept on disk once sent
+        Path(PROFILE_FILE).unlink(missing_ok=True)
+
+    return f"{sum(profiler.stacks.values())} samples in {seconds} seconds sent. Open the file with speedscope or flamegraph.pl."
@@ -0,0 +1,36 @@
+from app.auth.is_authorized import is_authorized
+
+from app.metrics.rolling_stats import format_stats
+from app.metrics.loop_watchdog import StallEntry, get_recent_stalls
+
+from classes.validation_exceptions import NotAuthorizedException
+from classes.sqlalchemy_protocols import SessionProtocol
+
+STALLS_SHOWN: int = 5
+
+
+def stats(chat_id: int, session: SessionProtocol) -> str | Exception:
+    """Route to view the messages received, blocked, modified and forwarded by each connection and the recent loop stalls.
+
+    Args:
+        chat_id (int): chat id from event.
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        str | Exception: stats message or exception if any
+    """
+
+    # check if user is authorized
+    is_auth: bool | Exception =  is_authorized(chat_id, session)
+    if isinstance(is_auth, Exception): return is_auth
+    if not is_auth: return NotAuthorizedException(chat_id=chat_id)
+
+    # counters live in memory, the database is not read
+    message: str = format_stats()
+    if message == "": message = "No messages received since the bot started."
+
+    stalls: list[StallEntry] = get_recent_stalls()[-STALLS_SHOWN:]
+    if len(stalls) > 0:
+        message += "\n\nRecent loop stalls:\n" + "\n".join([str(stall) for stall in stalls])
+
+    return f"Stats (last 1m, 15m and 1h):\n\n{message}"
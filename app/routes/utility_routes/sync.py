@@ -1,4 +1,5 @@
 from app.auth.is_authorized import is_authorized
+from app.auth.auth_cache import load_auth_cache
 
 from classes.validation_exceptions import  NotAuthorizedException
 from classes.sqlalchemy_protocols import SessionProtocol
@@ -18,5 +19,9 @@ def sync(chat_id: int, session: SessionProtocol) -> str | Exception:
     is_auth: bool | Exception =  is_authorized(chat_id, session)
     if isinstance(is_auth, Exception): return is_auth
     if not is_auth: return NotAuthorizedException(chat_id=chat_id)
+    
+    # reload authorized chats in case the database was changed by hand
+    res: None | Exception = load_auth_cache(session)
+    if isinstance(res, Exception): return res
 
     return "Connections syncronized."
\ No newline at end of file
@@ -0,0 +1,252 @@
+from asyncio import get_running_loop, sleep
+
+from collections import deque
+
+from dataclasses import asdict, dataclass
+
+from datetime import datetime
+
+from gzip import open as gzip_open
+
+from hashlib import blake2b
+
+from json import dumps, loads
+
+from os import getenv, urandom
+
+from pathlib import Path
+
+from re import split, sub
+
+from typing import Iterator
+
+from app.utils.filter_cache import get_filters
+from app.utils.handle_log import record_log
+from app.utils.routing_snapshot import FilterData
+
+from classes.fatal_exceptions import CaptureException
+
+# seconds between writes of the recorded messages to the capture file
+CAPTURE_FLUSH_INTERVAL: float = 5.0
+# recorded messages kept in memory if the file cannot be written, older ones are dropped
+CAPTURE_BUFFER_SIZE: int = 10000
+# messages already recorded, so a message forwarded to several outputs is recorded once
+RECENT_KEYS_SIZE: int = 1000
+LETTERS: str = "abcdefghijklmnopqrstuvwxyz"
+# letters and digits, underscores are kept like punctuation
+WORD: str = r"[^\W_]+"
+
+
+@dataclass
+class CaptureRecord:
+    # database id of the input channel, resolved to its url by the replay
+    input_id: str
+    date: float
+    # raw while pending, anonymised when written
+    text: str
+
+
+def get_capture_path() -> str | None:
+    """Gets the capture file, recording is enabled only when the CAPTURE_PATH environment variable is set.
+
+    Returns:
+        str | None: path of the compressed JSONL file or None if disabled.
+    """
+
+    return getenv("CAPTURE_PATH") or None
+
+
+# set when the flusher starts, after the environment is loaded
+capture_enabled: list[bool] = [False]
+# words are replaced by a keyed hash, a fixed CAPTURE_KEY gives the same words across recordings
+capture_key: list[bytes] = [urandom(16)]
+pending_records: deque[CaptureRecord] = deque(maxlen=CAPTURE_BUFFER_SIZE)
+recent_keys: deque[tuple[str, int]] = deque(maxlen=RECENT_KEYS_SIZE)
+# (filters list the conditions were taken from, conditions kept as they are)
+kept_conditions: list[tuple[list[FilterData] | None, list[str]]] = [(None, [])]
+
+
+def get_kept_conditions() -> list[str]:
+    # text matching a filter condition is not anonymised, so the replay treats messages the same way
+    filters: list[FilterData] = get_filters()
+    if kept_conditions[0][0] is not filters:
+        kept_conditions[0] = (filters, sorted({str(filter_.condition) for filter_ in filters if str(filter_.condition) != ""}))
+    return kept_conditions[0][1]
+
+
+def get_kept_spans(text: str, conditions: list[str]) -> list[tuple[int, int]]:
+    """Gets the spans of the text matching a condition, as substrings like the filters match them.
+
+    Args:
+        text (str): message text.
+        conditions (list[str]): filter conditions.
+
+    Returns:
+        list[tuple[int, int]]: sorted, merged (start, end) spans.
+    """
+
+    spans: list[tuple[int, int]] = []
+    for condition in conditions:
+        start: int = text.find(condition)
+        while start != -1:
+            spans.append((start, start + len(condition)))
+            start = text.find(condition, start + 1)
+
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if len(merged) > 0 and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def pseudo_word(word: str) -> str:
+    digest: bytes = blake2b(word.encode("utf-8"), key=capture_key[0], digest_size=16).digest()
+    return "".join([LETTERS[digest[index % len(digest)] % len(LETTERS)] for index in range(len(word))])
+
+
+def anonymise_words(text: str) -> str:
+    replace = lambda match: pseudo_word(match.group(0))
+    tokens: list[str] = []
+    for token in split(r"(\s+)", text):
+        # same link heuristic as the link remover, the host is kept so link removers still match
+        if "." in token[1:-2] and "/" in token:
+            scheme, separator, rest = token.rpartition("://")
+            host, slash, path = rest.partition("/")
+            tokens.append(scheme + separator + host + slash + sub(WORD, replace, path))
+        else:
+            tokens.append(sub(WORD, replace, token))
+    return "".join(tokens)
+
+
+def anonymise(text: str, conditions: list[str]) -> str:
+    """Replaces every word by a pseudo word of the same length, keeping whitespace, punctuation, emojis, link domains and the text matching a condition.
+
+    Args:
+        text (str): message text.
+        conditions (list[str]): filter conditions, kept wherever they match, also inside words.
+
+    Returns:
+        str: anonymised text.
+    """
+
+    parts: list[str] = []
+    previous_end: int = 0
+    for start, end in get_kept_spans(text, conditions):
+        parts.append(anonymise_words(text[previous_end:start]))
+        parts.append(text[start:end])
+        previous_end = end
+    parts.append(anonymise_words(text[previous_end:]))
+    return "".join(parts)
+
+
+def record_message(input_id: str, message_id: int, date: datetime, text: str) -> None:
+    """Records a message received by a connection handler, once per input channel.
+
+    Args:
+        input_id (str): database id of the input channel.
+        message_id (int): telegram id of the message.
+        date (datetime): message date.
+        text (str): message text.
+    """
+
+    key: tuple[str, int] = (input_id, message_id)
+    if key in recent_keys: return
+    recent_keys.append(key)
+    # anonymised by the flusher in a worker thread, the forwarding path only queues the text
+    pending_records.append(CaptureRecord(input_id, date.timestamp(), text))
+
+
+def write_capture(path: str, records: list[CaptureRecord], conditions: list[str]) -> int | Exception:
+    """Anonymises the records and appends them to the capture, each write adds a gzip member to the file.
+
+    Does not touch the event loop state, so it runs in a worker thread.
+
+    Args:
+        path (str): capture file.
+        records (list[CaptureRecord]): records with their raw text.
+        conditions (list[str]): filter conditions kept in the text, see get_kept_conditions.
+
+    Returns:
+        int | Exception: number of records written or exception if any.
+    """
+
+    lines: list[str] = [
+        dumps(asdict(CaptureRecord(record.input_id, record.date, anonymise(record.text, conditions))), ensure_ascii=False) + "\n"
+        for record in records
+    ]
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with gzip_open(path, "at", encoding="utf-8") as f:
+            f.write("".join(lines))
+    except OSError as e:
+        return CaptureException(exc=e, path=path)
+    return len(records)
+
+
+def take_pending_records() -> list[CaptureRecord]:
+    return [pending_records.popleft() for _ in range(len(pending_records))]
+
+
+def restore_pending_records(records: list[CaptureRecord]) -> None:
+    # written again on the next flush, before the records received meanwhile
+    pending_records.extendleft(reversed(records))
+
+
+async def run_capture_flusher(interval: float = CAPTURE_FLUSH_INTERVAL) -> None:
+    """Periodically writes the recorded messages to the capture file, if recording is enabled.
+
+    Args:
+        interval (float, optional): seconds between flushes. Defaults to CAPTURE_FLUSH_INTERVAL.
+    """
+
+    path: str | None = get_capture_path()
+    if path is None: return
+
+    key: str | None = getenv("CAPTURE_KEY")
+    if key is not None: capture_key[0] = key.encode("utf-8")[:64]
+    capture_enabled[0] = True
+
+    failing: bool = False
+    while True:
+        await sleep(interval)
+        if len(pending_records) == 0: continue
+
+        records: list[CaptureRecord] = take_pending_records()
+        res: int | Exception = await get_running_loop().run_in_executor(None, write_capture, path, records, get_kept_conditions())
+        # the records stay in memory and are written again on the next flush, the failure is logged once
+        if isinstance(res, Exception): restore_pending_records(records)
+        if isinstance(res, CaptureException) and not failing:
+            print(f"Could not write the capture: {repr(res)}")
+            record_log(res)
+        failing = isinstance(res, Exception)
+
+
+def read_capture(path: str) -> Iterator[CaptureRecord]:
+    """Reads the records of a capture in the order they were received.
+
+    Args:
+        path (str): capture file.
+
+    Yields:
+        CaptureRecord: recorded message.
+    """
+
+    with gzip_open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield CaptureRecord(**loads(line))
+
+
+def close_capture() -> None | Exception:
+    """Writes the records still in memory, called when the client disconnects.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    path: str | None = get_capture_path()
+    if path is None or not capture_enabled[0] or len(pending_records) == 0: return None
+
+    res: int | Exception = write_capture(path, take_pending_records(), get_kept_conditions())
+    if isinstance(res, Exception): return res
@@ -0,0 +1,144 @@
+from asyncio import get_running_loop, sleep
+
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.utils.remanage_connections import apply_snapshot, apply_snapshot_changes
+from app.utils.routing_snapshot import RoutingSnapshot, current_snapshot, save_snapshot
+from app.utils.warm_start import RECONCILE_RETRY_INTERVAL, build_snapshot_in_new_session
+
+from classes.fatal_exceptions import DatabaseCommitException, DatabaseQueryException
+from classes.telethon_protocols import TelegramClientProtocol
+from classes.sqlalchemy_protocols import EngineProtocol, SessionProtocol
+
+from db.init_db import create_session
+from db.schema import ConfigVersion
+
+# id of the single row of the ConfigVersion table
+CONFIG_VERSION_ID: int = 1
+# seconds between reads of the version, one primary key lookup each
+CONFIG_POLL_INTERVAL: float = 1.0
+
+# set once the version row exists, created in the background so a database outage does not stop the startup
+config_version_ready: list[bool] = [False]
+
+
+def bump_config_version(session: SessionProtocol) -> None:
+    """Increments the configuration version in the current transaction, so it is committed with the change.
+
+    Raises SQLAlchemyError like the commit it comes before, for the route to roll back.
+    Also raised until the version row exists, a change committed without it would not reach the other instances.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+    """
+
+    if not config_version_ready[0]:
+        raise SQLAlchemyError("The configuration version row is not created yet, retry once the database is reachable.")
+    session.execute(
+        update(ConfigVersion)
+        .where(ConfigVersion.id == CONFIG_VERSION_ID)
+        .values(version=ConfigVersion.version + 1)
+    )
+
+
+def create_config_version(engine: EngineProtocol) -> None | Exception:
+    """Creates the ConfigVersion table and its row if the database was created before them.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    session: SessionProtocol = create_session(engine)
+    try:
+        ConfigVersion.__table__.create(engine, checkfirst=True)  # type: ignore
+        if session.query(ConfigVersion).filter(ConfigVersion.id == CONFIG_VERSION_ID).first() is None:
+            session.add(ConfigVersion(id=CONFIG_VERSION_ID, version=0))
+            session.commit()
+        config_version_ready[0] = True
+    except SQLAlchemyError as e:
+        session.rollback()
+        return DatabaseCommitException(exc=e)
+    finally:
+        session.close()
+
+
+def read_config_version(engine: EngineProtocol) -> int | Exception:
+    """Reads the configuration version with its own session, so it can run in a worker thread.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+
+    Returns:
+        int | Exception: version or exception if any.
+    """
+
+    session: SessionProtocol = create_session(engine)
+    try:
+        version: int | None = session.query(ConfigVersion.version).filter(ConfigVersion.id == CONFIG_VERSION_ID).scalar()
+    except SQLAlchemyError as e:
+        return DatabaseQueryException(exc=e)
+    finally:
+        session.close()
+    return int(version) if version is not None else 0
+
+
+async def apply_config_change(engine: EngineProtocol, client: TelegramClientProtocol) -> int | Exception:
+    """Rebuilds the handlers and filters that changed since the current snapshot and saves the new one.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+        client (TelegramClientProtocol): telegram client instance.
+
+    Returns:
+        int | Exception: number of handlers removed and added or exception if any.
+    """
+
+    snapshot: RoutingSnapshot | Exception = await get_running_loop().run_in_executor(None, build_snapshot_in_new_session, engine)
+    if isinstance(snapshot, Exception): return snapshot
+    # read after the build, a local route may have changed the handlers and the snapshot meanwhile
+    previous: RoutingSnapshot | None = current_snapshot[0]
+
+    changes: int | str | Exception = apply_snapshot_changes(previous, snapshot, client) if previous is not None else apply_snapshot(snapshot, client)
+    if isinstance(changes, Exception): return changes
+
+    res: None | Exception = save_snapshot(snapshot)
+    if isinstance(res, Exception): return res
+    return changes if isinstance(changes, int) else len(snapshot.connections)
+
+
+async def run_config_watcher(engine: EngineProtocol, client: TelegramClientProtocol, interval: float = CONFIG_POLL_INTERVAL) -> None:
+    """Polls the configuration version and applies the changes made by other instances sharing the database.
+
+    Changes made by this instance were already applied by its routes, so they rebuild nothing.
+    The version row is created first, retried while the database is unreachable.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+        client (TelegramClientProtocol): telegram client instance.
+        interval (float, optional): seconds between polls. Defaults to CONFIG_POLL_INTERVAL.
+    """
+
+    loop = get_running_loop()
+    while True:
+        res: None | Exception = await loop.run_in_executor(None, create_config_version, engine)
+        if not isinstance(res, Exception): break
+        print(f"Configuration routes are disabled until the version row is created: {repr(res)}")
+        await sleep(RECONCILE_RETRY_INTERVAL)
+
+    seen: int | Exception = await loop.run_in_executor(None, read_config_version, engine)
+    while True:
+        await sleep(interval)
+        version: int | Exception = await loop.run_in_executor(None, read_config_version, engine)
+        # while the database is down the same version is read again on the next poll
+        if isinstance(version, Exception) or version == seen: continue
+
+        changes: int | Exception = await apply_config_change(engine, client)
+        if isinstance(changes, Exception):
+            print(f"Could not apply configuration version {version}: {repr(changes)}")
+            continue
+        if changes > 0: print(f"Configuration version {version} applied, {changes} handlers changed.")
+        seen = version
@@ -4,11 +4,15 @@ from telethon.sync import TelegramClient
 
 from asyncio import AbstractEventLoop
 
+from os import getenv
+
+from app.utils.fake_client import FakeTelegramClient, get_fake_settings
+
 from classes.telethon_protocols import TelegramClientProtocol
 
 
 def create_client(name: str, api_id: int, api_hash: str, loop: AbstractEventLoop) -> TelegramClientProtocol:
-    """Creates a TelegramClient instance.
+    """Creates a TelegramClient instance, or an offline fake one when the FAKE_TELEGRAM environment variable is true.
 
     Args:
         name (str): name of the client.
@@ -20,4 +24,7 @@ def create_client(name: str, api_id: int, api_hash: str, loop: AbstractEventLoop
         TelegramClientProtocol: TelegramClient instance.
     """
     
+    if (getenv("FAKE_TELEGRAM") or "").lower() == "true":
+        return FakeTelegramClient(name, api_id, api_hash, loop, get_fake_settings())
+    
     return TelegramClient(name, api_id, api_hash, loop=loop)  # type: ignore
\ No newline at end of file
@@ -0,0 +1,230 @@
+# pyright:reportMissingTypeStubs=false
+
+from asyncio import AbstractEventLoop, Future, get_event_loop, sleep
+
+from dataclasses import dataclass, field
+
+from datetime import datetime, timezone
+
+from os import getenv
+
+from random import Random
+
+from time import perf_counter
+
+from typing import Any, Callable, Iterable, Sequence
+
+from zlib import crc32
+
+from telethon.errors import FloodWaitError
+
+
+@dataclass
+class FakeMessage:
+    id: int
+    peer_id: Any
+    date: datetime
+    message: str
+    media: bytes | None = None
+
+    async def download_media(self: "FakeMessage", file: Any = None) -> Any:
+        return self.media
+
+
+@dataclass
+class FakeEvent:
+    message: FakeMessage
+    chat_id: int
+
+
+@dataclass
+class FakeSettings:
+    # seconds each send takes
+    latency: float = 0.0
+    # fraction of sends answered with a flood wait
+    flood_rate: float = 0.0
+    flood_seconds: int = 1
+    # flood waits up to this are slept through, like telethon does, longer ones are raised
+    flood_sleep_threshold: int = 60
+    # synthetic messages injected after start, 0 disables them
+    messages: int = 0
+    # messages per second, 0 injects as fast as the handlers allow
+    rate: float = 0.0
+    # sent messages are kept to check the output, disable for long runs
+    keep_sent: bool = True
+    seed: int = 0
+    texts: list[str] = field(default_factory=lambda: ["Synthetic message"])
+
+
+def get_fake_settings() -> FakeSettings:
+    """Reads the fake client settings from the FAKE_* environment variables.
+
+    Returns:
+        FakeSettings: settings, defaults for the missing variables.
+    """
+
+    return FakeSettings(
+        latency=float(getenv("FAKE_LATENCY") or 0),
+        flood_rate=float(getenv("FAKE_FLOOD_RATE") or 0),
+        flood_seconds=int(getenv("FAKE_FLOOD_SECONDS") or 1),
+        messages=int(getenv("FAKE_MESSAGES") or 0),
+        rate=float(getenv("FAKE_RATE") or 0),
+        keep_sent=(getenv("FAKE_KEEP_SENT") or "true").lower() == "true",
+    )
+
+
+class FakeTelegramClient:
+    """In process telegram client implementing TelegramClientProtocol, used to run the bot without network."""
+
+    def __init__(
+        self: "FakeTelegramClient",
+        session: str,
+        api_id: int,
+        api_hash: str,
+        loop: AbstractEventLoop | None = None,
+        settings: FakeSettings | None = None
+    ):
+        self.session = session
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.loop = loop if loop is not None else get_event_loop()
+        self.settings = settings if settings is not None else FakeSettings()
+        self.random = Random(self.settings.seed)
+        self.handlers: list[tuple[Callable[[Any], Any], Any]] = []
+        # id of the event builder -> chat ids it listens to, None for every chat
+        self.handler_chats: dict[int, set[int] | None] = {}
+        # (entity, message) of every send, when keep_sent is set
+        self.sent: list[tuple[Any, Any]] = []
+        self.sent_count: int = 0
+        self.flood_waits: int = 0
+        self.message_id: int = 0
+        # chats the account is a member of, returned by get_dialogs
+        self.dialogs: list[Any] = []
+        self.disconnected: Future[None] = self.loop.create_future()
+
+    def start(self: "FakeTelegramClient", phone: Callable[[], str] | None = None) -> "FakeTelegramClient":
+        return self
+
+    def disconnect(self: "FakeTelegramClient") -> None:
+        if not self.disconnected.done(): self.disconnected.set_result(None)
+
+    def run_until_disconnected(self: "FakeTelegramClient") -> None:
+        if self.settings.messages > 0:
+            self.loop.create_task(self.run_synthetic_load())
+        self.loop.run_until_complete(self.disconnected)
+
+    # handlers
+    def add_event_handler(self: "FakeTelegramClient", callback: Callable[[Any], Any], event: Any) -> None:
+        chats: Iterable[Any] | None = getattr(event, "chats", None)
+        self.handler_chats[id(event)] = {self.get_chat_id(chat) for chat in chats} if chats is not None else None
+        self.handlers.append((callback, event))
+
+    def remove_event_handler(self: "FakeTelegramClient", callback: Callable[[Any], Any], event: Any = None) -> int:
+        before: int = len(self.handlers)
+        self.handlers = [
+            (handler, builder) for handler, builder in self.handlers
+            if handler is not callback or (event is not None and builder is not event)
+        ]
+        self.handler_chats = {id(builder): self.handler_chats[id(builder)] for _, builder in self.handlers}
+        return before - len(self.handlers)
+
+    def list_event_handlers(self: "FakeTelegramClient") -> Sequence[tuple[Callable[[Any], Any], Any]]:
+        return list(self.handlers)
+
+    def on(self: "FakeTelegramClient", event: Any) -> Callable[[Callable[[Any], Any]], Callable[[Any], Any]]:
+        def decorator(callback: Callable[[Any], Any]) -> Callable[[Any], Any]:
+            self.add_event_handler(callback, event)
+            return callback
+        return decorator
+
+    # requests
+    async def send_message(self: "FakeTelegramClient", entity: Any, message: Any) -> FakeMessage:
+        if self.settings.latency > 0: await sleep(self.settings.latency)
+        if self.settings.flood_rate > 0 and self.random.random() < self.settings.flood_rate:
+            self.flood_waits += 1
+            if self.settings.flood_seconds > self.settings.flood_sleep_threshold:
+                raise FloodWaitError(request=None, capture=self.settings.flood_seconds)
+            await sleep(self.settings.flood_seconds)
+
+        self.sent_count += 1
+        if self.settings.keep_sent: self.sent.append((entity, message))
+        return self.create_message(entity, str(message))
+
+    async def send_file(self: "FakeTelegramClient", entity: Any, file: Any) -> FakeMessage:
+        return await self.send_message(entity, file)
+
+    async def get_peer_id(self: "FakeTelegramClient", peer: Any) -> int:
+        return self.get_chat_id(peer)
+
+    async def get_dialogs(self: "FakeTelegramClient") -> list[Any]:
+        return list(self.dialogs)
+
+    async def get_messages(self: "FakeTelegramClient", entity: Any, min_id: int = 0, max_id: int = 0, limit: int | None = None) -> list[Any]:
+        # no history is kept, synthetic messages are never replayed
+        return []
+
+    # events
+    def get_chat_id(self: "FakeTelegramClient", chat: Any) -> int:
+        # stable negative id per url, like telegram channel ids
+        return chat if isinstance(chat, int) else -(1000000000000 + crc32(str(chat).encode("utf-8")))
+
+    def create_message(self: "FakeTelegramClient", chat: Any, text: str, media: bytes | None = None, date: datetime | None = None) -> FakeMessage:
+        self.message_id += 1
+        return FakeMessage(self.message_id, self.get_chat_id(chat), date if date is not None else datetime.now(timezone.utc), text, media)
+
+    def matches(self: "FakeTelegramClient", builder: Any, chat_id: int, text: str) -> bool:
+        chats: set[int] | None = self.handler_chats.get(id(builder))
+        if chats is not None and chat_id not in chats: return False
+        pattern: Any = getattr(builder, "pattern", None)
+        return pattern is None or bool(pattern(text))
+
+    async def inject(self: "FakeTelegramClient", chat: Any, text: str, media: bytes | None = None, date: datetime | None = None) -> int:
+        """Dispatches a new message to the matching handlers, one after the other like telethon does.
+
+        Args:
+            chat (Any): url or id of the chat the message is from.
+            text (str): message text.
+            media (bytes | None, optional): document returned by download_media. Defaults to None.
+            date (datetime | None, optional): message date. Defaults to now.
+
+        Returns:
+            int: number of handlers called.
+        """
+
+        chat_id: int = self.get_chat_id(chat)
+        event = FakeEvent(self.create_message(chat, text, media, date), chat_id)
+        handlers: list[Callable[[Any], Any]] = [handler for handler, builder in self.handlers if self.matches(builder, chat_id, text)]
+        for handler in handlers:
+            await handler(event)
+        return len(handlers)
+
+    def get_input_chats(self: "FakeTelegramClient") -> list[Any]:
+        # chats listened by the connection handlers
+        return sorted({
+            chat
+            for handler, builder in self.handlers if handler.__name__.startswith("connection_handler")
+            for chat in (getattr(builder, "chats", None) or [])
+        }, key=str)
+
+    async def run_synthetic_load(self: "FakeTelegramClient") -> None:
+        """Injects the configured number of messages into the input chats at the configured rate, then disconnects."""
+
+        chats: list[Any] = self.get_input_chats()
+        if len(chats) == 0:
+            print("No connections to send synthetic messages to.")
+            return self.disconnect()
+
+        start: float = perf_counter()
+        for i in range(self.settings.messages):
+            if self.settings.rate > 0:
+                delay: float = start + i / self.settings.rate - perf_counter()
+                if delay > 0: await sleep(delay)
+            await self.inject(chats[i % len(chats)], self.settings.texts[i % len(self.settings.texts)])
+
+        elapsed: float = perf_counter() - start
+        print(
+            f"{self.settings.messages} messages injected in {elapsed:.2f} s "
+            f"({self.settings.messages / elapsed if elapsed > 0 else 0:.0f} msg/s), "
+            f"{self.sent_count} sent, {self.flood_waits} flood waits."
+        )
+        self.disconnect()
@@ -0,0 +1,26 @@
+from app.utils.routing_snapshot import FilterData
+
+# filters used by every connection handler, replaced as a whole whenever filters change
+current_filters: list[list[FilterData]] = [[]]
+
+
+def get_filters() -> list[FilterData]:
+    """Gets the filters currently applied to forwarded messages.
+
+    Returns:
+        list[FilterData]: current filters.
+    """
+    
+    return current_filters[0]
+
+
+def set_filters(filters: list[FilterData]) -> None:
+    """Replaces the filters applied to forwarded messages, only if they changed.
+
+    The same list is kept when the content is equal, so the caches keyed by its identity, like the filter pool, stay valid.
+
+    Args:
+        filters (list[FilterData]): new filters.
+    """
+    
+    if filters != current_filters[0]: current_filters[0] = filters
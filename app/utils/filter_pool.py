@@ -0,0 +1,126 @@
+from asyncio import get_running_loop
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from dataclasses import dataclass
+
+from multiprocessing import get_context
+
+from os import getenv
+
+from app.utils.routing_snapshot import FilterData
+from app.utils.treat_message import CompiledFilters, compile_filters, treat_compiled_message
+
+# characters of the message times number of filters below which the message is treated inline,
+# under it the round trip to a worker takes longer than the filters
+DEFAULT_OFFLOAD_COST: int = 1000000
+
+
+@dataclass
+class FilterPool:
+    # filters the workers were started with
+    filters: list[FilterData]
+    executor: ProcessPoolExecutor
+
+
+# set after the environment is loaded, 0 workers treats every message inline
+pool_workers: list[int] = [0]
+offload_cost: list[int] = [DEFAULT_OFFLOAD_COST]
+current_pool: list[FilterPool | None] = [None]
+# (filters, compiled filters), in the bot process for the inline path and in each worker for its version
+compiled_filters: list[tuple[list[FilterData] | None, CompiledFilters]] = [(None, CompiledFilters([], [], []))]
+
+
+def configure_filter_pool() -> None:
+    """Reads the FILTER_WORKERS and FILTER_OFFLOAD_COST environment variables, the environment must be already loaded."""
+
+    set_filter_pool(int(getenv("FILTER_WORKERS") or 0), int(getenv("FILTER_OFFLOAD_COST") or DEFAULT_OFFLOAD_COST))
+
+
+def set_filter_pool(workers: int, cost: int) -> None:
+    """Sets the number of worker processes and the offload threshold, closing the current pool.
+
+    Args:
+        workers (int): worker processes, 0 disables offloading.
+        cost (int): characters times filters from which a message is sent to the pool.
+    """
+
+    close_filter_pool()
+    pool_workers[0] = workers
+    offload_cost[0] = cost
+
+
+def get_compiled_filters(filters: list[FilterData]) -> CompiledFilters:
+    # the filters list is replaced as a whole on every change, so identity tells the version
+    if compiled_filters[0][0] is not filters:
+        compiled_filters[0] = (filters, compile_filters(filters))
+    return compiled_filters[0][1]
+
+
+def init_worker(filters: list[FilterData]) -> None:
+    # runs once in each worker, the filters are not sent again with every message
+    get_compiled_filters(filters)
+
+
+def treat_in_worker(message: str) -> str | None:
+    return treat_compiled_message(message, compiled_filters[0][1])
+
+
+def get_pool(filters: list[FilterData]) -> ProcessPoolExecutor:
+    """Gets the pool whose workers have these filters, replacing the pool of the previous filters.
+
+    Args:
+        filters (list[FilterData]): current filters.
+
+    Returns:
+        ProcessPoolExecutor: pool started with the filters.
+    """
+
+    pool: FilterPool | None = current_pool[0]
+    if pool is not None and pool.filters is filters: return pool.executor
+
+    # messages already sent to the old pool finish with the previous filters
+    if pool is not None: pool.executor.shutdown(wait=False)
+    # spawned workers do not inherit the telethon and watchdog threads
+    executor = ProcessPoolExecutor(max_workers=pool_workers[0], mp_context=get_context("spawn"), initializer=init_worker, initargs=(filters,))
+    current_pool[0] = FilterPool(filters, executor)
+    return executor
+
+
+def get_cost(message: str, filters: list[FilterData]) -> int:
+    return len(message) * len(filters)
+
+
+async def treat_message_offloaded(message: str, filters: list[FilterData]) -> str | None:
+    """Treats the message in a worker process when it is expensive enough and offloading is enabled, inline otherwise.
+
+    Args:
+        message (str): message to be treated.
+        filters (list[FilterData]): filters from the filter cache.
+
+    Returns:
+        str | None: treated message or None if the message should be ignored.
+    """
+
+    if pool_workers[0] == 0 or get_cost(message, filters) < offload_cost[0]:
+        return treat_compiled_message(message, get_compiled_filters(filters))
+
+    executor: ProcessPoolExecutor = get_pool(filters)
+    try:
+        return await get_running_loop().run_in_executor(executor, treat_in_worker, message)
+    except BrokenProcessPool:
+        # a worker died, its pool is shut down and the next expensive message starts a new one
+        executor.shutdown(wait=False, cancel_futures=True)
+        pool: FilterPool | None = current_pool[0]
+        if pool is not None and pool.executor is executor: current_pool[0] = None
+        return treat_compiled_message(message, get_compiled_filters(filters))
+
+
+def close_filter_pool() -> None:
+    """Stops the worker processes, called when the client disconnects."""
+
+    pool: FilterPool | None = current_pool[0]
+    if pool is None: return
+    pool.executor.shutdown(wait=True, cancel_futures=True)
+    current_pool[0] = None
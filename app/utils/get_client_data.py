@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 
-from app.utils.env import get_env_var, load_env
+from app.utils.env import get_env_var
 
 from classes.validation_exceptions import EnvironmentVariableException
 
@@ -13,17 +13,13 @@ class ClientData:
     url: str
 
 
-def get_client_data(env: str) -> ClientData | Exception:
-    """Gets data from the environment variables required to initialize the client.
-
-    Args:
-        env (str): environment to load [dev or prod].
+def get_client_data() -> ClientData | Exception:
+    """Gets data from the environment variables required to initialize the client, the environment must be already loaded.
 
     Returns:
         ClientData | Exception: dataclass contianing all necessary data to initialize the client or exception if any.
     """
     
-    load_env(env)
     api_id: str | Exception = get_env_var("API_ID")
     api_hash: str | Exception = get_env_var("API_HASH")
     phone: str | Exception = get_env_var("PHONE")
@@ -21,3 +21,45 @@ def get_loop(channels: list[Channel], passed_channels: tuple[Channel, ...] = tup
             return None
         
         return get_loop(channel.outputs, (*passed_channels, channel))
+
+
+def get_graph_loop(graph: dict[str, set[str]]) -> tuple[str, ...] | None:
+    """Find a loop in a graph of channel ids if there is one, visiting each node and edge only once.
+
+    Args:
+        graph (dict[str, set[str]]): dictionary associating each channel id with the ids of its outputs.
+
+    Returns:
+        tuple[str, ...] | None: tuple of channel ids that form a loop or None if there is none.
+    """
+    
+    # 0 -> not visited, 1 -> in the current path, 2 -> done
+    state: dict[str, int] = {}
+    
+    for root in graph:
+        if state.get(root, 0) != 0: continue
+        
+        # iterative depth first search to avoid recursion limits on long chains
+        path: list[str] = [root]
+        stack: list[list[str]] = [list(graph.get(root, ()))]
+        state[root] = 1
+        
+        while len(stack) > 0:
+            if len(stack[-1]) == 0:
+                state[path.pop()] = 2
+                stack.pop()
+                continue
+            
+            node: str = stack[-1].pop()
+            node_state: int = state.get(node, 0)
+            
+            if node_state == 1:
+                return *path[path.index(node):], node
+            if node_state == 2:
+                continue
+            
+            state[node] = 1
+            path.append(node)
+            stack.append(list(graph.get(node, ())))
+    
+    return None
@@ -1,26 +1,209 @@
 from pathlib import Path
 
+from asyncio import get_running_loop, sleep
+
+from collections import deque
+
+from dataclasses import dataclass
+
+from datetime import datetime
+
+from logging import Formatter, Logger, getLogger
+from logging.handlers import RotatingFileHandler
+
 from typing import Any, Callable, Coroutine
 
-from classes.fatal_exceptions import FatalException, LogException
+from uuid import uuid4
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.metrics.metrics import logs_dropped
+
+from classes.fatal_exceptions import DatabaseCommitException, FatalException, LogException
+from classes.sqlalchemy_protocols import EngineProtocol, SessionProtocol
+
+from db.init_db import create_session
+from db.schema import Log
+
+# number of recent entries kept in memory to be read by /logs
+LOG_BUFFER_SIZE: int = 1000
+# seconds between flushes of pending entries to the database
+FLUSH_INTERVAL: float = 5.0
+# max number of entries written to the database in a single commit
+FLUSH_BATCH_SIZE: int = 200
+
+LOG_DIR: str = "log"
+LOG_FILE: str = f"{LOG_DIR}/log.log"
+FALLBACK_LOG_FILE: str = f"{LOG_DIR}/fallback.log"
 
 
-def create_log(exc: FatalException) -> None | Exception:
-    """Creates log text file containing the content of an exception.
+@dataclass
+class LogEntry:
+    date: datetime
+    message: str
+
+    def __str__(self: "LogEntry") -> str:
+        return f"[{self.date.isoformat(timespec='seconds')}] {self.message}"
+
+
+# ring buffer with the most recent entries, persisted or not, read by /logs when the database is unavailable
+recent_logs: deque[LogEntry] = deque(maxlen=LOG_BUFFER_SIZE)
+# entries waiting to be flushed to the database
+pending_logs: deque[LogEntry] = deque(maxlen=LOG_BUFFER_SIZE)
+# entries dropped from pending_logs while it was full, reported by the next flush
+dropped_logs: list[int] = [0]
+
+
+def record_log(exc: FatalException) -> None:
+    """Records an exception in memory to be flushed to the database later.
 
     Args:
         exc (FatalException): exception to log.
+    """
+
+    entry = LogEntry(datetime.utcnow(), repr(exc))
+    recent_logs.append(entry)
+    # the oldest pending entry is dropped when the database is unavailable for long
+    if len(pending_logs) == pending_logs.maxlen:
+        dropped_logs[0] += 1
+        logs_dropped.inc()
+    pending_logs.append(entry)
+
+
+def get_recent_logs(limit: int) -> list[LogEntry]:
+    """Gets the most recent log entries.
+
+    Args:
+        limit (int): max number of entries to return.
+
+    Returns:
+        list[LogEntry]: entries from oldest to newest.
+    """
+
+    return list(recent_logs)[-limit:] if limit > 0 else []
+
+
+def get_pending_logs() -> list[LogEntry]:
+    """Gets the entries not flushed to the database yet.
+
+    Returns:
+        list[LogEntry]: entries from oldest to newest.
+    """
+
+    return list(pending_logs)
+
+
+def get_fallback_logger() -> Logger | Exception:
+    """Gets a logger writing to a rotating file, used when the database cannot be written.
+
+    Returns:
+        Logger | Exception: logger instance or exception if any.
+    """
+
+    logger: Logger = getLogger("forwarder.fallback")
+    if len(logger.handlers) > 0: return logger
+
+    try:
+        Path(LOG_DIR).mkdir(exist_ok=True)
+        handler = RotatingFileHandler(FALLBACK_LOG_FILE, maxBytes=1_000_000, backupCount=3)
+    except Exception as e:
+        return LogException(exc=e)
+
+    handler.setFormatter(Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.propagate = False
+    return logger
+
+
+def write_fallback_log(entries: list[LogEntry]) -> None | Exception:
+    """Writes entries to the rotating fallback file.
+
+    Args:
+        entries (list[LogEntry]): entries to write.
 
     Returns:
         None | Exception: None if everything went well or exception if any.
     """
-    
+
+    logger: Logger | Exception = get_fallback_logger()
+    if isinstance(logger, Exception): return logger
+
+    for entry in entries:
+        logger.error(str(entry))
+
+
+def flush_logs(engine: EngineProtocol) -> int | Exception:
+    """Writes pending entries to the Log table in batches, with its own session so it can run in a worker thread.
+
+    A failed batch never rolls back the changes of a route.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+
+    Returns:
+        int | Exception: number of entries flushed or exception if any.
+    """
+
+    flushed: int = 0
+    dropped: int = dropped_logs[0]
+    dropped_logs[0] -= dropped
+    session: SessionProtocol = create_session(engine)
+    try:
+        while len(pending_logs) > 0 or dropped > 0:
+            batch: list[LogEntry] = [pending_logs.popleft() for _ in range(min(FLUSH_BATCH_SIZE, len(pending_logs)))]
+            if dropped > 0:
+                batch.append(LogEntry(datetime.utcnow(), f"{dropped} log entries were dropped because the buffer of entries waiting for the database was full."))
+                dropped = 0
+
+            try:
+                session.add_all([Log(id=str(uuid4()), date=entry.date, message=entry.message) for entry in batch])
+                session.commit()
+            except SQLAlchemyError as e:
+                session.rollback()
+                # keep the entries somewhere if the database is unavailable
+                remaining: list[LogEntry] = batch + list(pending_logs)
+                pending_logs.clear()
+                write_fallback_log(remaining)
+                return DatabaseCommitException(exc=e)
+
+            flushed += len(batch)
+    finally:
+        session.close()
+
+    return flushed
+
+
+async def run_log_flusher(engine: EngineProtocol, interval: float = FLUSH_INTERVAL) -> None:
+    """Periodically flushes pending entries to the database in a worker thread, so a slow commit does not block forwarding.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+        interval (float, optional): seconds between flushes. Defaults to FLUSH_INTERVAL.
+    """
+
+    loop = get_running_loop()
+    while True:
+        await sleep(interval)
+        if len(pending_logs) > 0 or dropped_logs[0] > 0:
+            await loop.run_in_executor(None, flush_logs, engine)
+
+
+def create_log(entries: list[LogEntry]) -> None | Exception:
+    """Creates log text file containing the log entries.
+
+    Args:
+        entries (list[LogEntry]): entries to write.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
     res: None | Exception = cleanup_log()
     if isinstance(res, Exception): return res
-    
-    try:  
-        with open("log/log.log", "w") as f:
-            f.write(repr(exc))
+
+    try:
+        with open(LOG_FILE, "w") as f:
+            f.write("\n".join([str(entry) for entry in entries]))
     except Exception as e:
         return LogException(exc=e)
 
@@ -31,35 +214,34 @@ def cleanup_log() -> None | Exception:
     Returns:
         None | Exception: None if everything went well or exception if any.
     """
-    
+
     try:
-        if not Path("temp").exists():
-                Path("temp").mkdir()
-        if Path("log/log.log").exists():
-            Path("log/log.log").unlink()
+        if not Path(LOG_DIR).exists():
+            Path(LOG_DIR).mkdir()
+        if Path(LOG_FILE).exists():
+            Path(LOG_FILE).unlink()
     except Exception as e:
         return LogException(exc=e)
-    
-    
-async def handle_log(exc: FatalException, f: Callable[[str], Coroutine[Any, Any, Any]]) -> None | Exception:
+
+
+async def handle_log(entries: list[LogEntry], f: Callable[[str], Coroutine[Any, Any, Any]]) -> None | Exception:
     """Handles the creation of a log file and the sending of the log file to the user.
 
     Args:
-        exc (FatalException): exception to log.
+        entries (list[LogEntry]): entries to send.
         f (Callable[[str], Coroutine[Any, Any, Any]]): function to send the log file.
 
     Returns:
         None | Exception: None if everything went well or exception if any.
     """
-    
-    res: None | Exception = create_log(exc)
+
+    res: None | Exception = create_log(entries)
     if isinstance(res, Exception): return res
-    
+
     try:
-        await f("log/log.log")
+        await f(LOG_FILE)
     except Exception as e:
         return LogException(exc=e)
-    
+
     res: None | Exception = cleanup_log()
     if isinstance(res, Exception): return res
-    
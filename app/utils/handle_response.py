@@ -1,11 +1,10 @@
-from typing import Any, Callable, Coroutine, TypeAlias
-
-from classes.telethon_protocols import TelegramClientProtocol, MessageProtocol
+from classes.telethon_protocols import TelegramClientProtocol
 from classes.fatal_exceptions import FatalException
 
-from app.utils.handle_log import handle_log
+from app.utils.handle_log import record_log
+from app.utils.split_message import split_message
 
-send_file_type: TypeAlias = Callable[[str], Coroutine[Any, Any, MessageProtocol]]
+from app.metrics.tracing import trace_span
 
 
 async def handle_response(res: Exception | str, client: TelegramClientProtocol, url: str) -> None:
@@ -18,11 +17,11 @@ async def handle_response(res: Exception | str, client: TelegramClientProtocol,
         """
         
         message = f"Error: {res}" if isinstance(res, Exception) else res
-        await client.send_message(url, message)
+        # long responses are sent in several messages to stay under telegram's limit
+        with trace_span("send_response"):
+            for chunk in split_message(message):
+                await client.send_message(url, chunk)
         
+        # fatal exceptions are buffered and persisted in batches, use /logs to read them
         if not isinstance(res, FatalException): return
-        send_file: send_file_type = lambda file: client.send_file(url, file)
-        log_res: None |Exception = await handle_log(res, send_file)
-        
-        if isinstance(log_res, Exception):
-            await client.send_message(url, f"Error: {log_res}")
\ No newline at end of file
+        record_log(res)
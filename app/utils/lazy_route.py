@@ -0,0 +1,25 @@
+from importlib import import_module
+
+from typing import Any, Callable
+
+
+def lazy_route(module_name: str, function_name: str) -> Callable[..., Any]:
+    """Creates a route that only imports its module the first time it is called.
+
+    Args:
+        module_name (str): module containing the route, e.g. app.routes.utility_routes.logs.
+        function_name (str): name of the route function in the module.
+
+    Returns:
+        Callable[..., Any]: function with the same arguments and return of the route.
+    """
+    
+    route: list[Callable[..., Any]] = []
+    
+    def call_route(*args: Any, **kwargs: Any) -> Any:
+        if len(route) == 0:
+            route.append(getattr(import_module(module_name), function_name))
+        return route[0](*args, **kwargs)
+    
+    call_route.__name__ = function_name
+    return call_route
@@ -0,0 +1,298 @@
+from asyncio import get_running_loop, sleep
+
+from dataclasses import dataclass
+
+from datetime import datetime, timedelta
+
+from os import getenv, getpid
+
+from socket import gethostname
+
+from time import time
+
+from typing import Any, Callable, Coroutine
+
+from uuid import uuid4
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.metrics.metrics import Gauge, register
+from app.utils.remanage_connections import apply_snapshot, forwarding_enabled, remove_event_handler
+from app.utils.routing_snapshot import current_snapshot
+from app.utils.shutdown import disable_checkpoints, replay_checkpoints
+from app.utils.warm_start import RECONCILE_RETRY_INTERVAL
+
+from classes.fatal_exceptions import DatabaseCommitException
+from classes.telethon_protocols import TelegramClientProtocol
+from classes.sqlalchemy_protocols import EngineProtocol, SessionProtocol
+
+from db.init_db import create_session
+from db.schema import LeaderLease
+
+# seconds another instance waits after the last renewal before taking the lease
+DEFAULT_LEASE_TTL: float = 15.0
+
+leader = register(Gauge("forwarder_leader", "1 while this instance holds the leader lease and forwards, 0 while it is on standby."))
+
+
+@dataclass
+class LeaseState:
+    name: str
+    holder: str
+    ttl: float
+    # fencing token while holding the lease, None on standby
+    token: int | None = None
+    # time() until which no other instance can take the lease, counted from before the last renewal
+    expires_at: float = 0.0
+
+
+# set when the instance enters standby
+lease_state: list[LeaseState | None] = [None]
+
+
+def get_lease_name() -> str | None:
+    """Gets the lease shared by the active and standby instances, enabled only when the LEADER_LEASE environment variable is set.
+
+    Returns:
+        str | None: lease name or None if disabled.
+    """
+
+    return getenv("LEADER_LEASE") or None
+
+
+def get_holder_id() -> str:
+    # unique per process, so a restarted instance never renews the lease of its previous run
+    return f"{gethostname()}-{getpid()}-{uuid4().hex[:8]}"
+
+
+def hold_lease(engine: EngineProtocol, name: str, holder: str, token: int | None, ttl: float) -> int | None | Exception:
+    """Renews the lease when holding it, or takes it when it is free or expired, with its own session.
+
+    Both are a single conditional update, so two instances can never hold the lease at the same time.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+        name (str): lease name.
+        holder (str): id of this instance.
+        token (int | None): fencing token of the lease held, None on standby.
+        ttl (float): seconds the lease is held without renewal.
+
+    Returns:
+        int | None | Exception: fencing token while holding the lease, None if another instance holds it or exception if any.
+    """
+
+    now: datetime = datetime.utcnow()
+    expires_at: datetime = now + timedelta(seconds=ttl)
+    session: SessionProtocol = create_session(engine)
+    try:
+        if token is not None:
+            # fails if another instance took the lease since, the token fences this instance out
+            res: Any = session.execute(
+                update(LeaderLease)
+                .where(LeaderLease.name == name, LeaderLease.holder == holder, LeaderLease.token == token)
+                .values(expires_at=expires_at)
+            )
+        else:
+            res: Any = session.execute(
+                update(LeaderLease)
+                .where(LeaderLease.name == name, LeaderLease.expires_at < now)
+                .values(holder=holder, token=LeaderLease.token + 1, expires_at=expires_at)
+            )
+            if res.rowcount == 0 and session.query(LeaderLease.name).filter(LeaderLease.name == name).first() is None:
+                session.add(LeaderLease(name=name, holder=holder, token=1, expires_at=expires_at))
+                session.commit()
+                return 1
+        session.commit()
+        if res.rowcount == 0: return None
+        return int(session.query(LeaderLease.token).filter(LeaderLease.name == name).scalar())
+    except IntegrityError:
+        # another instance created the lease first
+        session.rollback()
+        return None
+    except SQLAlchemyError as e:
+        session.rollback()
+        return DatabaseCommitException(exc=e)
+    finally:
+        session.close()
+
+
+def create_lease_table(engine: EngineProtocol) -> None | Exception:
+    """Creates the LeaderLease table if the database was created before it.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    try:
+        LeaderLease.__table__.create(engine, checkfirst=True)  # type: ignore
+    except SQLAlchemyError as e:
+        return DatabaseCommitException(exc=e)
+
+
+def release_lease(engine: EngineProtocol, name: str, holder: str, token: int) -> None | Exception:
+    """Expires the lease now, so the standby takes it on its next attempt instead of after the ttl.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+        name (str): lease name.
+        holder (str): id of this instance.
+        token (int): fencing token of the lease held.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    session: SessionProtocol = create_session(engine)
+    try:
+        session.execute(
+            update(LeaderLease)
+            .where(LeaderLease.name == name, LeaderLease.holder == holder, LeaderLease.token == token)
+            .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        return DatabaseCommitException(exc=e)
+    finally:
+        session.close()
+
+
+def prepare_standby() -> None:
+    """Disables forwarding until the lease is taken, without reaching the database.
+
+    Must be called before any connection handler is registered, so a standby never forwards during startup.
+    """
+
+    forwarding_enabled[0] = False
+    leader.set(0)
+
+
+def stop_forwarding(client: TelegramClientProtocol) -> None | Exception:
+    """Removes the connection handlers, the routing snapshot and the resolved peers stay in memory for a fast takeover.
+
+    The command handlers stay, so a standby still answers /help, /stats and the other commands.
+
+    Args:
+        client (TelegramClientProtocol): telegram client instance.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    forwarding_enabled[0] = False
+    leader.set(0)
+    # the instance taking over saves the checkpoints from now on
+    disable_checkpoints()
+    for handler, event in client.list_event_handlers():
+        if not handler.__name__.startswith("connection_handler"): continue
+        res: None | Exception = remove_event_handler(handler, event, client)
+        if isinstance(res, Exception): return res
+
+
+def start_forwarding(client: TelegramClientProtocol) -> str | Exception:
+    """Registers the connection handlers of the current snapshot.
+
+    Args:
+        client (TelegramClientProtocol): telegram client instance.
+
+    Returns:
+        str | Exception: success message or exception if any.
+    """
+
+    forwarding_enabled[0] = True
+    leader.set(1)
+    if current_snapshot[0] is None: return "No routing snapshot to forward from yet."
+    return apply_snapshot(current_snapshot[0], client)
+
+
+def enter_standby(client: TelegramClientProtocol, name: str) -> LeaseState | Exception:
+    """Removes the connection handlers until the lease is taken, the command handlers stay registered.
+
+    Args:
+        client (TelegramClientProtocol): telegram client instance.
+        name (str): lease name.
+
+    Returns:
+        LeaseState | Exception: lease state or exception if any.
+    """
+
+    state = LeaseState(name, get_holder_id(), float(getenv("LEASE_TTL") or DEFAULT_LEASE_TTL))
+    res: None | Exception = stop_forwarding(client)
+    if isinstance(res, Exception): return res
+
+    lease_state[0] = state
+    return state
+
+
+async def run_leader_lease(
+    engine: EngineProtocol,
+    client: TelegramClientProtocol,
+    state: LeaseState,
+    alert: Callable[[str | Exception], Coroutine[Any, Any, None]]
+) -> None:
+    """Takes the lease when it is free and renews it while holding it, forwarding only while holding it.
+
+    The lease table is created first, retried while the database is unreachable, and the instance stays on standby meanwhile.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+        client (TelegramClientProtocol): telegram client instance.
+        state (LeaseState): lease state returned by enter_standby.
+        alert (Callable[[str | Exception], Coroutine[Any, Any, None]]): function sending leadership changes, e.g. the response handler.
+    """
+
+    loop = get_running_loop()
+    # a renewal is tried three times per ttl, so a slow one does not lose the lease
+    heartbeat: float = state.ttl / 3
+
+    while True:
+        created: None | Exception = await loop.run_in_executor(None, create_lease_table, engine)
+        if not isinstance(created, Exception): break
+        print(f"Database not available, waiting to take the leader lease: {repr(created)}")
+        await sleep(RECONCILE_RETRY_INTERVAL)
+
+    while True:
+        started: float = time()
+        token: int | None | Exception = await loop.run_in_executor(None, hold_lease, engine, state.name, state.holder, state.token, state.ttl)
+
+        if isinstance(token, int):
+            state.expires_at = started + state.ttl
+            if state.token is None:
+                state.token = token
+                res: str | Exception = start_forwarding(client)
+                await alert(res if isinstance(res, Exception) else f"This instance took the leader lease (token {token}) and is forwarding.")
+                # the checkpoints the previous holder saved on a shared CHECKPOINT_PATH
+                if not isinstance(res, Exception): loop.create_task(replay_checkpoints(client))
+        elif state.token is not None and (token is None or time() >= state.expires_at - heartbeat):
+            # lost the lease, or could not renew it before another instance may take it
+            state.token = None
+            res: None | Exception = stop_forwarding(client)
+            print(f"Leader lease lost, this instance is on standby: {repr(res if isinstance(res, Exception) else token)}")
+        elif isinstance(token, Exception):
+            print(f"Could not reach the leader lease: {repr(token)}")
+
+        await sleep(heartbeat)
+
+
+def close_leader_lease(engine: EngineProtocol, client: TelegramClientProtocol) -> None | Exception:
+    """Stops forwarding and releases the lease if held, called when the client disconnects.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+        client (TelegramClientProtocol): telegram client instance.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    state: LeaseState | None = lease_state[0]
+    if state is None or state.token is None: return None
+
+    token: int = state.token
+    state.token = None
+    stop_forwarding(client)
+    return release_lease(engine, state.name, state.holder, token)
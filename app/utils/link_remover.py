@@ -41,6 +41,8 @@ def get_indices_of_delimiters(placeholder_message: str, delimiters: list[str]) -
     
 
 def get_indices_of_segments(placeholder_message: str, delimiter_positions: list[Pos]) -> list[Pos]:
+    # a message without delimiters is a single segment
+    if len(delimiter_positions) == 0: return [(0, len(placeholder_message))]
     return [(0, delimiter_positions[0][0] + 1)] + [  # first segment: 0 to start of next delimiter
         (prev_end, curr_end)  # middle segments: the end of the previous to the end of the current
         for (_, prev_end), (_, curr_end) in zip(delimiter_positions, delimiter_positions[1:])  # loops through tuples of two consecutive positions
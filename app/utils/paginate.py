@@ -0,0 +1,154 @@
+from typing import Any, Callable, Coroutine, Iterable, TypeAlias
+
+from binascii import Error as BinasciiError
+
+from dataclasses import dataclass
+
+from pathlib import Path
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.cmd.handle_command import handle_optional_command
+
+from classes.validation_exceptions import InvalidCommandException
+from classes.fatal_exceptions import DatabaseQueryException, LogException
+from classes.telethon_protocols import MessageProtocol
+from classes.sqlalchemy_protocols import QueryProtocol
+
+send_file_type: TypeAlias = Callable[[str], Coroutine[Any, Any, MessageProtocol]]
+
+# number of items in each page
+PAGE_SIZE: int = 50
+# number of rows fetched from the database cursor at a time when sending a file
+YIELD_PER: int = 500
+# cursor is the after key encoded by the next page footer, so keys with "--" or "=" survive the tokenizer
+PAGE_FLAGS: tuple[str, ...] = ("after", "cursor", "page", "file")
+LISTING_DIR: str = "export"
+
+
+@dataclass
+class PageOptions:
+    after: str | None = None
+    page: int | None = None
+    as_file: bool = False
+
+
+def get_page_options(command: str | None) -> PageOptions | Exception:
+    """Parses the optional pagination flags of a view command.
+
+    Args:
+        command (str | None): command string from event.
+
+    Returns:
+        PageOptions | Exception: pagination options or exception if the command is invalid.
+    """
+
+    command = command if command is not None else ""
+    flags_args: dict[str, str] | Exception = handle_optional_command(command, PAGE_FLAGS)
+    if isinstance(flags_args, Exception): return flags_args
+
+    page: str | None = flags_args.get("page")
+    if page is not None and (not page.isdigit() or int(page) == 0):
+        return InvalidCommandException(message="Page must be a positive integer.", command=command)
+
+    if len([flag for flag in ("after", "cursor", "page") if flag in flags_args]) > 1:
+        return InvalidCommandException(message="Use only one of after, cursor and page.", command=command)
+
+    after: str | None = flags_args.get("after")
+    if "cursor" in flags_args:
+        after = decode_cursor(flags_args["cursor"])
+        if after is None: return InvalidCommandException(message="Invalid cursor.", command=command)
+
+    return PageOptions(
+        after=after,
+        page=int(page) if page is not None else None,
+        as_file=flags_args.get("file", "false").lower() in ("true", "yes", "1")
+    )
+
+
+def encode_cursor(key: str) -> str:
+    # hexadecimal never contains the "--" and "=" separators of the tokenizer
+    return key.encode("utf-8").hex()
+
+
+def decode_cursor(cursor: str) -> str | None:
+    try:
+        return bytes.fromhex(cursor).decode("utf-8")
+    except (ValueError, BinasciiError):
+        return None
+
+
+def paginate(query: QueryProtocol, key: Any, options: PageOptions) -> tuple[list[Any], bool]:
+    """Gets a single page of a query ordered by a unique key.
+
+    With after the page is found by the key itself (keyset), so the database skips straight to it.
+
+    Args:
+        query (QueryProtocol): query to paginate.
+        key (Any): unique column to order and seek by.
+        options (PageOptions): pagination options.
+
+    Returns:
+        tuple[list[Any], bool]: items in the page and whether there is a next page.
+    """
+
+    if options.after is not None:
+        query = query.filter(key > options.after)
+    query = query.order_by(key)
+    if options.page is not None:
+        query = query.offset((options.page - 1) * PAGE_SIZE)
+
+    # fetch one more item to know if there is a next page
+    items: list[Any] = query.limit(PAGE_SIZE + 1).all()
+    return items[:PAGE_SIZE], len(items) > PAGE_SIZE
+
+
+def format_page_footer(command_name: str, last_key: str, has_more: bool) -> str:
+    """Creates the footer pointing to the next page.
+
+    Args:
+        command_name (str): command used to view the listing, with its required flags.
+        last_key (str): key of the last item in the page.
+        has_more (bool): whether there is a next page.
+
+    Returns:
+        str: footer to append to the message, empty if there is no next page.
+    """
+
+    if not has_more: return ""
+    return f"\n\nNext page:\n{command_name} --cursor={encode_cursor(last_key)}"
+
+
+async def send_listing_file(lines: Iterable[str], name: str, send_file: send_file_type) -> int | Exception:
+    """Writes the lines of a listing to a file as they are read and sends it.
+
+    Args:
+        lines (Iterable[str]): lines of the listing, may be lazily read from the database.
+        name (str): name of the file without extension.
+        send_file (send_file_type): function to send the file.
+
+    Returns:
+        int | Exception: number of lines sent or exception if any.
+    """
+
+    path: Path = Path(LISTING_DIR) / f"{name}.txt"
+    written: int = 0
+
+    try:
+        Path(LISTING_DIR).mkdir(exist_ok=True)
+        with open(path, "w") as f:
+            for line in lines:
+                f.write(line + "\n")
+                written += 1
+    except SQLAlchemyError as e:
+        return DatabaseQueryException(exc=e)
+    except OSError as e:
+        return LogException(exc=e, message="Could not create listing file.")
+
+    try:
+        if written > 0: await send_file(str(path))
+        path.unlink(missing_ok=True)
+    except Exception as e:
+        return LogException(exc=e, message="Could not send listing file.")
+
+    return written
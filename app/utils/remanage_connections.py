@@ -6,17 +6,30 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from telethon.sync import events
 
-from app.utils.treat_message import treat_message
+from time import perf_counter, time
+
+from app.metrics.rolling_stats import ConnectionStats, get_connection_stats
+from app.metrics.tracing import Trace, finish_trace, start_trace, trace_span
+from app.metrics.metrics import end_to_end_seconds, filter_seconds, messages_blocked, messages_forwarded, messages_received, send_errors, send_seconds, sends_in_flight
+
+from app.utils.filter_pool import treat_message_offloaded
+from app.utils.filter_cache import set_filters, get_filters
+from app.utils.capture import capture_enabled, record_message
+from app.utils.shutdown import accept_message, finish_delivery, start_delivery
+from app.utils.routing_snapshot import ChannelData, RoutingSnapshot, build_snapshot, get_channel_data_pairs, peer_cache, save_snapshot
 
 from classes.telethon_protocols import EventBuilderProtocol, EventProtocol, TelegramClientProtocol
 from classes.fatal_exceptions import CannotRemoveEventHandlerException, CannotAddEventHandlerException, DatabaseQueryException
 from classes.sqlalchemy_protocols import SessionProtocol
 
-from db.schema import Channel, Filter
+from db.schema import Channel
 
 
 handler_type: TypeAlias = Callable[[EventProtocol], Coroutine[Any, Any, None]]
 
+# False while another instance holds the leader lease, connection handlers are then only kept in the snapshot
+forwarding_enabled: list[bool] = [True]
+
 
 def remove_event_handler(handler: handler_type, event:  EventBuilderProtocol, client: TelegramClientProtocol) -> None | Exception:
     """Remove event handler from client.
@@ -33,7 +46,7 @@ def remove_event_handler(handler: handler_type, event:  EventBuilderProtocol, cl
     try:
         client.remove_event_handler(handler, event)
     except Exception as e:
-        CannotRemoveEventHandlerException(handler=handler, event=event, exc=e)
+        return CannotRemoveEventHandlerException(handler=handler, event=event, exc=e)
 
 
 def query_channels(session: SessionProtocol) -> list[Channel] | Exception:
@@ -77,28 +90,80 @@ def get_channel_pairs(channels: list[Channel]) -> list[tuple[Channel, Channel]]:
 
 
 
-def get_event_handler(input_channel: Channel, output_channel: Channel, client: TelegramClientProtocol, session: SessionProtocol) -> tuple[handler_type, events.NewMessage]:
+def get_handler_name(input_id: str, output_id: str) -> str:
+    return f"connection_handler - ({input_id}) -> ({output_id})"
+
+
+def get_event_handler(input_channel: Channel | ChannelData, output_channel: Channel | ChannelData, client: TelegramClientProtocol) -> tuple[handler_type, events.NewMessage]:
     """Get event handler for a channel pair.
 
     Args:
-        input_channel (Channel): input channel instance.
-        output_channel (Channel): output channel instance.
+        input_channel (Channel | ChannelData): input channel instance.
+        output_channel (Channel | ChannelData): output channel instance.
         client (TelegramClientProtocol): telegram client instance.
-        session (SessionProtocol): sqlalchemy session instance.
 
     Returns:
         tuple[handler_type, events.NewMessage]: event handler and event instance.
     """
     
+    # only keep plain values in the closure, not the orm objects
+    input_id, input_url = str(input_channel.id), str(input_channel.url)
+    output_id, output_url = str(output_channel.id), str(output_channel.url)
+    
+    # metric labels, built once per handler instead of once per message
+    labels: tuple[str, str] = (str(input_channel.name), str(output_channel.name))
+    stats: ConnectionStats = get_connection_stats(labels)
+    
     async def handler(event: EventProtocol):
-        filters: list[Filter] = session.query(Filter).all()
-        treated_message: None | str = treat_message(event.message.message, filters)
-        if treated_message is None: return
-        await client.send_message(output_channel.url, treated_message)
+        # once the shutdown started the message is left to the replay of the next start
+        if not accept_message(input_url, event.message.id): return
+        messages_received.inc(labels)
+        stats.received.inc(time())
+        if capture_enabled[0]: record_message(input_id, event.message.id, event.message.date, event.message.message)
+        # every handler of the same source message shares the correlation id
+        trace: Trace | None = start_trace(f"{event.chat_id}:{event.message.id}")
+        start_delivery(input_url, event.message.id)
+        try:
+            if trace is not None:
+                # telegram dates have second precision, so this is only an estimate of the dispatch delay
+                received: float = event.message.date.timestamp()
+                trace.add("receive", received, time() - received, input=input_id, output=output_id)
+            
+            start: float = perf_counter()
+            with trace_span("treat_message"):
+                treated_message: None | str = await treat_message_offloaded(event.message.message, get_filters())
+            filter_seconds.observe(perf_counter() - start, labels)
+            if treated_message is None:
+                messages_blocked.inc(labels)
+                stats.blocked.inc(time())
+                return
+            if treated_message != event.message.message: stats.modified.inc(time())
+            
+            start = perf_counter()
+            sends_in_flight.inc()
+            try:
+                with trace_span("send_message"):
+                    await client.send_message(peer_cache.get(output_url, output_url), treated_message)
+            except Exception:
+                send_errors.inc(labels)
+                raise
+            finally:
+                sends_in_flight.dec()
+            send_seconds.observe(perf_counter() - start, labels)
+            now: float = time()
+            end_to_end: float = now - event.message.date.timestamp()
+            end_to_end_seconds.observe(end_to_end, labels)
+            stats.latency.observe(end_to_end, now)
+            messages_forwarded.inc(labels)
+            stats.forwarded.inc(now)
+        finally:
+            finish_trace(trace)
+            finish_delivery(input_url, event.message.id)
     
     # save input and output urls in the handler's name to be able to identify it later
-    handler.__name__ = f"connection_handler - ({input_channel.id}) -> ({output_channel.id})"
-    return handler, events.NewMessage(chats=[input_channel.url])
+    handler.__name__ = get_handler_name(input_id, output_id)
+    # use the resolved peer when known so the event does not need to resolve the url
+    return handler, events.NewMessage(chats=[peer_cache.get(input_url, input_url)])
   
     
 def register_event_handler(handler: handler_type, event: EventBuilderProtocol, client: TelegramClientProtocol) -> None | Exception:
@@ -113,18 +178,21 @@ def register_event_handler(handler: handler_type, event: EventBuilderProtocol, c
         None | Exception: None if everything went well or exception if any.
     """
     
+    # a standby does not forward, the handlers are built from the snapshot when it takes the lease
+    if not forwarding_enabled[0]: return None
+    
     try:
         client.add_event_handler(handler, event)
     except Exception as e:
-        CannotAddEventHandlerException(handler=handler, event=event, exc=e)  
+        return CannotAddEventHandlerException(handler=handler, event=event, exc=e)  
 
 
 
-def remanage_connections(session: SessionProtocol, client: TelegramClientProtocol) -> str | Exception:
-    """Remove all event handlers from client and add new ones.
+def apply_snapshot(snapshot: RoutingSnapshot, client: TelegramClientProtocol) -> str | Exception:
+    """Remove all event handlers from client and add the ones described by the snapshot.
 
     Args:
-        session (SessionProtocol): sqlalchemy session instance.
+        snapshot (RoutingSnapshot): routing snapshot.
         client (TelegramClientProtocol): telegram client instance.
 
     Returns:
@@ -138,15 +206,12 @@ def remanage_connections(session: SessionProtocol, client: TelegramClientProtoco
     ]
     exceptions: list[Exception] = [e for e in res if isinstance(e, Exception)]
     if len(exceptions) > 0: return exceptions[0]
-        
-    channels: list[Channel] | Exception = query_channels(session)
-    if isinstance(channels, Exception): return channels
     
-    channel_pairs: list[tuple[Channel, Channel]] = get_channel_pairs(channels)
+    set_filters(snapshot.filters)
     
     event_handlers: list[tuple[handler_type, events.NewMessage]] = [
-        get_event_handler(input_channel, output_channel, client, session) 
-        for input_channel, output_channel in channel_pairs
+        get_event_handler(input_channel, output_channel, client) 
+        for input_channel, output_channel in get_channel_data_pairs(snapshot)
     ]
     
     res: list[Exception | None] = [
@@ -157,3 +222,93 @@ def remanage_connections(session: SessionProtocol, client: TelegramClientProtoco
     if len(exceptions) > 0: return exceptions[0]
     
     return "Telegram connections remanaged successfully!"
+
+
+def apply_snapshot_changes(previous: RoutingSnapshot, snapshot: RoutingSnapshot, client: TelegramClientProtocol) -> int | Exception:
+    """Replaces only the event handlers of the connections that changed between two snapshots, and the filters if they changed.
+
+    Args:
+        previous (RoutingSnapshot): snapshot the current handlers were built from.
+        snapshot (RoutingSnapshot): new snapshot.
+        client (TelegramClientProtocol): telegram client instance.
+
+    Returns:
+        int | Exception: number of handlers removed and added or exception if any.
+    """
+    
+    previous_pairs: dict[tuple[str, str], tuple[ChannelData, ChannelData]] = {
+        (input_channel.id, output_channel.id): (input_channel, output_channel) for input_channel, output_channel in get_channel_data_pairs(previous)
+    }
+    pairs: dict[tuple[str, str], tuple[ChannelData, ChannelData]] = {
+        (input_channel.id, output_channel.id): (input_channel, output_channel) for input_channel, output_channel in get_channel_data_pairs(snapshot)
+    }
+    # a connection whose channel got another name or url is built again
+    removed: list[tuple[str, str]] = [key for key, channels in previous_pairs.items() if pairs.get(key) != channels]
+    added: list[tuple[str, str]] = [key for key, channels in pairs.items() if previous_pairs.get(key) != channels]
+    
+    handlers: dict[str, tuple[handler_type, EventBuilderProtocol]] = {
+        handler.__name__: (handler, event) for handler, event in client.list_event_handlers()
+        if handler.__name__.startswith("connection_handler")
+    }
+    for input_id, output_id in removed:
+        handler_event: tuple[handler_type, EventBuilderProtocol] | None = handlers.get(get_handler_name(input_id, output_id))
+        if handler_event is None: continue
+        res: None | Exception = remove_event_handler(*handler_event, client)
+        if isinstance(res, Exception): return res
+    
+    # a local route may have registered the handler already, while the new snapshot was built
+    added = [key for key in added if key in removed or get_handler_name(*key) not in handlers]
+    for key in added:
+        handler, event = get_event_handler(*pairs[key], client)
+        res: None | Exception = register_event_handler(handler, event, client)
+        if isinstance(res, Exception): return res
+    
+    # the same list is kept when nothing changed, so caches keyed by it stay valid
+    set_filters(snapshot.filters)
+    
+    return len(removed) + len(added)
+
+
+def refresh_snapshot(session: SessionProtocol) -> RoutingSnapshot | Exception:
+    """Reloads the filters and writes a new snapshot after a configuration change.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        RoutingSnapshot | Exception: new snapshot or exception if any.
+    """
+    
+    snapshot: RoutingSnapshot | Exception = build_snapshot(session)
+    if isinstance(snapshot, Exception): return snapshot
+    
+    set_filters(snapshot.filters)
+    
+    res: None | Exception = save_snapshot(snapshot)
+    if isinstance(res, Exception): return res
+    
+    return snapshot
+
+
+def remanage_connections(session: SessionProtocol, client: TelegramClientProtocol) -> str | Exception:
+    """Remove all event handlers from client and add new ones.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+        client (TelegramClientProtocol): telegram client instance.
+
+    Returns:
+        str | Exception: success message or exception if any.
+    """
+    
+    snapshot: RoutingSnapshot | Exception = build_snapshot(session)
+    if isinstance(snapshot, Exception): return snapshot
+    
+    res: str | Exception = apply_snapshot(snapshot, client)
+    if isinstance(res, Exception): return res
+    
+    # keep a copy on disk to start forwarding on the next boot without the database
+    save_res: None | Exception = save_snapshot(snapshot)
+    if isinstance(save_res, Exception): return save_res
+    
+    return res
@@ -0,0 +1,214 @@
+from typing import Any
+
+from dataclasses import asdict, dataclass, field
+
+from datetime import datetime
+
+from hashlib import sha256
+
+from json import dumps, loads, JSONDecodeError
+
+from os import getenv, replace
+
+from pathlib import Path
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from classes.fatal_exceptions import DatabaseQueryException, SnapshotException
+from classes.sqlalchemy_protocols import SessionProtocol
+
+from db.schema import Channel, Filter, input_output
+
+# bumped when the layout of the file changes, older files are ignored
+SNAPSHOT_FORMAT: int = 1
+DEFAULT_SNAPSHOT_PATH: str = "snapshot/routing.json"
+
+
+@dataclass(frozen=True)
+class ChannelData:
+    id: str
+    name: str
+    url: str
+
+
+@dataclass(frozen=True)
+class FilterData:
+    condition: str
+    replacement: str | None
+    mode: str
+
+
+@dataclass
+class RoutingSnapshot:
+    version: int
+    channels: list[ChannelData]
+    # (input_id, output_id)
+    connections: list[tuple[str, str]]
+    filters: list[FilterData]
+    # channel url -> telegram peer id, so handlers can be built without resolving usernames
+    peers: dict[str, int] = field(default_factory=dict)
+
+
+# peer ids known by this process, filled from the snapshot and from telegram
+peer_cache: dict[str, int] = {}
+# last snapshot written or loaded
+current_snapshot: list[RoutingSnapshot | None] = [None]
+
+
+def get_snapshot_path() -> str:
+    """Gets the path of the snapshot file.
+
+    Returns:
+        str: SNAPSHOT_PATH environment variable or the default path.
+    """
+
+    return getenv("SNAPSHOT_PATH") or DEFAULT_SNAPSHOT_PATH
+
+
+def build_snapshot(session: SessionProtocol) -> RoutingSnapshot | Exception:
+    """Reads channels, connections and filters from the database with one column query each.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+
+    Returns:
+        RoutingSnapshot | Exception: snapshot of the current configuration or exception if any.
+    """
+
+    try:
+        channels: list[ChannelData] = [
+            ChannelData(str(id_), str(name), str(url))
+            for id_, name, url in session.query(Channel.id, Channel.name, Channel.url).all()
+        ]
+        connections: list[tuple[str, str]] = [
+            (str(input_id), str(output_id))
+            for input_id, output_id in session.query(input_output.c.input_id, input_output.c.output_id).all()
+        ]
+        filters: list[FilterData] = [
+            FilterData(str(condition), str(replacement) if replacement is not None else None, str(mode))
+            for condition, replacement, mode in session.query(Filter.condition, Filter.replacement, Filter.mode).all()
+        ]
+    except SQLAlchemyError as e:
+        session.rollback()
+        return DatabaseQueryException(exc=e)
+
+    peers: dict[str, int] = {channel.url: peer_cache[channel.url] for channel in channels if channel.url in peer_cache}
+    version: int = current_snapshot[0].version + 1 if current_snapshot[0] is not None else 1
+    return RoutingSnapshot(version, channels, connections, filters, peers)
+
+
+def get_channel_data_pairs(snapshot: RoutingSnapshot) -> list[tuple[ChannelData, ChannelData]]:
+    """Get all input output pairs of a snapshot.
+
+    Args:
+        snapshot (RoutingSnapshot): routing snapshot.
+
+    Returns:
+        list[tuple[ChannelData, ChannelData]]: list of input output pairs.
+    """
+
+    channels: dict[str, ChannelData] = {channel.id: channel for channel in snapshot.channels}
+    return [
+        (channels[input_id], channels[output_id])
+        for input_id, output_id in snapshot.connections
+        if input_id in channels and output_id in channels
+    ]
+
+
+def is_same_configuration(snapshot: RoutingSnapshot, other: RoutingSnapshot) -> bool:
+    """Checks if two snapshots describe the same channels, connections and filters, ignoring order and peers.
+
+    Args:
+        snapshot (RoutingSnapshot): routing snapshot.
+        other (RoutingSnapshot): routing snapshot to compare with.
+
+    Returns:
+        bool: True if both configurations are the same.
+    """
+
+    return set(snapshot.channels) == set(other.channels) \
+        and set(snapshot.connections) == set(other.connections) \
+        and set(snapshot.filters) == set(other.filters)
+
+
+def get_checksum(payload: str) -> str:
+    """Gets the checksum of a serialized snapshot.
+
+    Args:
+        payload (str): serialized snapshot.
+
+    Returns:
+        str: sha256 hex digest.
+    """
+
+    return sha256(payload.encode("utf-8")).hexdigest()
+
+
+def save_snapshot(snapshot: RoutingSnapshot, path: str | None = None) -> None | Exception:
+    """Writes the snapshot to disk atomically, so a crash never leaves a half written file.
+
+    Args:
+        snapshot (RoutingSnapshot): routing snapshot.
+        path (str | None, optional): file path. Defaults to get_snapshot_path().
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    path = path if path is not None else get_snapshot_path()
+    payload: str = dumps(asdict(snapshot), separators=(",", ":"), sort_keys=True)
+    content: str = dumps({
+        "format": SNAPSHOT_FORMAT,
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "checksum": get_checksum(payload),
+        "payload": payload
+    })
+
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        temp_path: str = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(content)
+        replace(temp_path, path)
+    except OSError as e:
+        return SnapshotException(exc=e, path=path)
+
+    current_snapshot[0] = snapshot
+
+
+def load_snapshot(path: str | None = None) -> RoutingSnapshot | None | Exception:
+    """Reads the snapshot from disk and checks its format and checksum.
+
+    Args:
+        path (str | None, optional): file path. Defaults to get_snapshot_path().
+
+    Returns:
+        RoutingSnapshot | None | Exception: snapshot, None if there is no snapshot or exception if it is invalid.
+    """
+
+    path = path if path is not None else get_snapshot_path()
+    if not Path(path).exists(): return None
+
+    try:
+        with open(path) as f:
+            content: Any = loads(f.read())
+
+        if content.get("format") != SNAPSHOT_FORMAT:
+            return SnapshotException(exc=ValueError(f"unsupported format {content.get('format')}"), path=path)
+        if content.get("checksum") != get_checksum(content["payload"]):
+            return SnapshotException(exc=ValueError("checksum mismatch"), path=path)
+
+        data: Any = loads(content["payload"])
+        snapshot = RoutingSnapshot(
+            version=int(data["version"]),
+            channels=[ChannelData(**channel) for channel in data["channels"]],
+            connections=[(input_id, output_id) for input_id, output_id in data["connections"]],
+            filters=[FilterData(**filter_) for filter_ in data["filters"]],
+            peers={url: int(peer) for url, peer in data["peers"].items()}
+        )
+    except (OSError, JSONDecodeError, KeyError, TypeError, ValueError, AttributeError) as e:
+        return SnapshotException(exc=e, path=path)
+
+    current_snapshot[0] = snapshot
+    peer_cache.update(snapshot.peers)
+    return snapshot
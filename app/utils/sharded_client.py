@@ -0,0 +1,276 @@
+# pyright:reportMissingTypeStubs=false
+
+from asyncio import AbstractEventLoop, gather, sleep
+
+from dataclasses import dataclass, field
+
+from hashlib import blake2b
+
+from inspect import isawaitable
+
+from os import getenv
+
+from time import time
+
+from typing import Any, Callable, Sequence
+
+from telethon.errors import FloodWaitError
+
+from app.metrics.metrics import Counter, Gauge, register
+from app.utils.create_client import create_client
+from app.utils.get_client_data import ClientData
+from app.utils.routing_snapshot import peer_cache
+
+from classes.telethon_protocols import TelegramClientProtocol
+
+# seconds between checks of expired flood waits and newly resolved peers
+REBALANCE_INTERVAL: float = 30.0
+# seconds between reloads of the chats each account is a member of
+MEMBERS_REFRESH_INTERVAL: float = 600.0
+
+account_handlers = register(Gauge("forwarder_account_connection_handlers", "Connection handlers registered in each account.", ("account",)))
+account_flood_limits = register(Counter("forwarder_account_flood_limits_total", "Flood waits that moved work away from an account.", ("account",)))
+
+
+@dataclass(eq=False)
+class Account:
+    name: str
+    phone: str
+    client: TelegramClientProtocol
+    # peer ids of the chats the account is a member of
+    members: set[int] = field(default_factory=set)
+    # time() until which the account is flood limited
+    limited_until: float = 0.0
+
+    def is_limited(self: "Account", now: float) -> bool:
+        return self.limited_until > now
+
+
+def get_extra_phones() -> list[str]:
+    """Gets the phones of the extra accounts from the comma separated EXTRA_PHONES environment variable.
+
+    Returns:
+        list[str]: phones, empty if only the main account is used.
+    """
+
+    return [phone.strip() for phone in (getenv("EXTRA_PHONES") or "").split(",") if phone.strip() != ""]
+
+
+def get_session_name(phone: str) -> str:
+    # one session file per phone, so reordering EXTRA_PHONES keeps every login,
+    # hashed because the name labels the account metrics and logs
+    digits: str = "".join([char for char in phone if char.isdigit()])
+    return "session_" + blake2b(digits.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def get_weight(key: str, account: Account) -> int:
+    return int.from_bytes(blake2b(f"{account.name}:{key}".encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def rank_accounts(key: str, accounts: list[Account]) -> list[Account]:
+    """Orders accounts by rendezvous hashing, adding or removing an account only moves the keys it wins or held.
+
+    Args:
+        key (str): peer id of the chat.
+        accounts (list[Account]): candidate accounts.
+
+    Returns:
+        list[Account]: accounts, preferred first.
+    """
+
+    return sorted(accounts, key=lambda account: get_weight(key, account), reverse=True)
+
+
+def get_known_peer_id(chat: Any) -> int | None:
+    # urls are only known once resolved, until then the main account handles them
+    if isinstance(chat, int): return chat
+    if isinstance(chat, str): return peer_cache.get(chat)
+    return None
+
+
+def get_event_chat(event: Any) -> Any:
+    chats: list[Any] = list(getattr(event, "chats", None) or [])
+    return chats[0] if len(chats) > 0 else None
+
+
+class ShardedClient:
+    """Telegram client implementing TelegramClientProtocol over several accounts.
+
+    Commands and responses always use the main account. Each input channel is listened by one of the accounts that
+    are members of it, and each message is sent by one of the accounts that are members of the output.
+    """
+
+    def __init__(self: "ShardedClient", primary: Account, extras: list[Account]):
+        self.primary = primary
+        self.accounts: list[Account] = [primary, *extras]
+        self.session = primary.client.session
+        self.api_id = primary.client.api_id
+        self.api_hash = primary.client.api_hash
+        # (handler, event) of each connection handler -> account it is registered in
+        self.connections: dict[tuple[Callable[[Any], Any], Any], Account] = {}
+
+    def start(self: "ShardedClient", phone: Callable[[], str]) -> "ShardedClient":
+        self.primary.client.start(phone)
+        started: list[Account] = [self.primary]
+        for account in self.accounts[1:]:
+            try:
+                account.client.start(lambda phone=account.phone: phone)
+            except Exception as e:
+                # forwarding keeps working with the other accounts
+                print(f"Could not start account {account.name}: {repr(e)}")
+                continue
+            started.append(account)
+        self.accounts = started
+        return self
+
+    def disconnect(self: "ShardedClient") -> Any:
+        results: list[Any] = [account.client.disconnect() for account in self.accounts]  # type: ignore
+        # telethon returns coroutines when called from the running loop, awaited together
+        pending: list[Any] = [res for res in results if isawaitable(res)]
+        return gather(*pending) if len(pending) > 0 else None
+
+    def run_until_disconnected(self: "ShardedClient") -> Any:
+        # every account runs on the same loop, the bot stops with the main account
+        return self.primary.client.run_until_disconnected()
+
+    # handlers
+    def get_input_account(self: "ShardedClient", chat: Any, now: float) -> Account:
+        """Chooses the account listening to an input channel, among the members that are not flood limited.
+
+        Args:
+            chat (Any): url or peer id of the input channel.
+            now (float): current time.
+
+        Returns:
+            Account: account to register the handler in, the main account if no member is known.
+        """
+
+        peer_id: int | None = get_known_peer_id(chat)
+        if peer_id is None: return self.primary
+        members: list[Account] = [account for account in self.accounts if peer_id in account.members]
+        if len(members) == 0: return self.primary
+        available: list[Account] = [account for account in members if not account.is_limited(now)]
+        return rank_accounts(str(peer_id), available if len(available) > 0 else members)[0]
+
+    def add_event_handler(self: "ShardedClient", callback: Callable[[Any], Any], event: Any) -> None:
+        if not callback.__name__.startswith("connection_handler"):
+            return self.primary.client.add_event_handler(callback, event)
+        account: Account = self.get_input_account(get_event_chat(event), time())
+        account.client.add_event_handler(callback, event)
+        self.connections[(callback, event)] = account
+
+    def remove_event_handler(self: "ShardedClient", callback: Callable[[Any], Any], event: Any = None) -> int:
+        self.connections = {
+            (handler, builder): account for (handler, builder), account in self.connections.items()
+            if handler is not callback or (event is not None and builder is not event)
+        }
+        return sum([account.client.remove_event_handler(callback, event) for account in self.accounts])
+
+    def list_event_handlers(self: "ShardedClient") -> Sequence[tuple[Callable[[Any], Any], Any]]:
+        return [handler for account in self.accounts for handler in account.client.list_event_handlers()]
+
+    def on(self: "ShardedClient", event: Any) -> Callable[[Callable[[Any], Any]], Callable[[Any], Any]]:
+        def decorator(callback: Callable[[Any], Any]) -> Callable[[Any], Any]:
+            self.add_event_handler(callback, event)
+            return callback
+        return decorator
+
+    def rebalance(self: "ShardedClient") -> int:
+        """Moves the connection handlers whose input channel is now assigned to another account.
+
+        Returns:
+            int: number of handlers moved.
+        """
+
+        now: float = time()
+        moved: int = 0
+        for (handler, event), account in list(self.connections.items()):
+            owner: Account = self.get_input_account(get_event_chat(event), now)
+            if owner is account: continue
+            account.client.remove_event_handler(handler, event)
+            owner.client.add_event_handler(handler, event)
+            self.connections[(handler, event)] = owner
+            moved += 1
+
+        for account in self.accounts:
+            account_handlers.set(len([owner for owner in self.connections.values() if owner is account]), (account.name,))
+        return moved
+
+    async def load_members(self: "ShardedClient") -> None:
+        for account in self.accounts:
+            try:
+                dialogs: list[Any] = await account.client.get_dialogs()
+            except Exception as e:
+                print(f"Could not load the chats of account {account.name}: {repr(e)}")
+                continue
+            account.members = {dialog.id for dialog in dialogs}
+
+    async def run_rebalancer(self: "ShardedClient") -> None:
+        """Loads the chats of every account and keeps the handlers assigned as memberships, peers and flood waits change."""
+
+        refreshed: float = float("-inf")
+        while True:
+            if time() - refreshed >= MEMBERS_REFRESH_INTERVAL:
+                await self.load_members()
+                refreshed = time()
+            moved: int = self.rebalance()
+            if moved > 0: print(f"{moved} connection handlers moved between accounts.")
+            await sleep(REBALANCE_INTERVAL)
+
+    # requests
+    def get_output_accounts(self: "ShardedClient", entity: Any, now: float) -> list[Account]:
+        peer_id: int | None = get_known_peer_id(entity)
+        members: list[Account] = [account for account in self.accounts if peer_id is not None and peer_id in account.members]
+        if len(members) == 0: return [self.primary]
+        # limited accounts are only tried when every member is limited
+        ranked: list[Account] = rank_accounts(str(peer_id), members)
+        return [account for account in ranked if not account.is_limited(now)] + [account for account in ranked if account.is_limited(now)]
+
+    def limit(self: "ShardedClient", account: Account, seconds: int) -> None:
+        account.limited_until = time() + seconds
+        account_flood_limits.inc((account.name,))
+        self.rebalance()
+
+    async def send_message(self: "ShardedClient", entity: Any, message: Any) -> Any:
+        error: FloodWaitError | None = None
+        for account in self.get_output_accounts(entity, time()):
+            try:
+                return await account.client.send_message(entity, message)
+            except FloodWaitError as e:
+                # try the next member, the flood wait is only raised when longer than the client sleeps through
+                self.limit(account, e.seconds)
+                error = e
+        raise error  # type: ignore
+
+    async def send_file(self: "ShardedClient", entity: Any, file: Any) -> Any:
+        # files are only sent to the command chat
+        return await self.primary.client.send_file(entity, file)
+
+    async def get_peer_id(self: "ShardedClient", peer: Any) -> int:
+        return await self.primary.client.get_peer_id(peer)
+
+    async def get_dialogs(self: "ShardedClient") -> list[Any]:
+        return await self.primary.client.get_dialogs()
+
+    async def get_messages(self: "ShardedClient", entity: Any, min_id: int = 0, max_id: int = 0, limit: int | None = None) -> list[Any]:
+        return list(await self.primary.client.get_messages(entity, min_id=min_id, max_id=max_id, limit=limit))
+
+
+def create_sharded_client(primary: TelegramClientProtocol, client_data: ClientData, phones: list[str], loop: AbstractEventLoop) -> ShardedClient:
+    """Wraps the main client and one client per extra phone, all with the same api id and hash.
+
+    Args:
+        primary (TelegramClientProtocol): client of the main account, the one in the command chat.
+        client_data (ClientData): api credentials and phone of the main account.
+        phones (list[str]): phones of the extra accounts.
+        loop (AbstractEventLoop): asyncio loop.
+
+    Returns:
+        ShardedClient: client over every account.
+    """
+
+    extras: list[Account] = [
+        Account(get_session_name(phone), phone, create_client(get_session_name(phone), client_data.api_id, client_data.api_hash, loop))
+        for phone in phones
+    ]
+    return ShardedClient(Account("session", client_data.phone, primary), extras)
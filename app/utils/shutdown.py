@@ -0,0 +1,364 @@
+from asyncio import Lock, get_running_loop, sleep
+
+from dataclasses import dataclass, field
+
+from inspect import isawaitable
+
+from json import JSONDecodeError, dumps, loads
+
+from os import getenv, replace
+
+from pathlib import Path
+
+from time import perf_counter
+
+from typing import Any
+
+from app.utils.routing_snapshot import ChannelData, current_snapshot, peer_cache
+
+from classes.fatal_exceptions import SnapshotException
+from classes.telethon_protocols import MessageProtocol, TelegramClientProtocol
+
+# seconds given to the deliveries in progress when the bot is asked to stop
+DEFAULT_SHUTDOWN_TIMEOUT: float = 10.0
+DRAIN_POLL_INTERVAL: float = 0.05
+DEFAULT_CHECKPOINT_PATH: str = "snapshot/checkpoints.json"
+# seconds between saves of the checkpoints, so a crash replays at most the messages since the last save
+CHECKPOINT_INTERVAL: float = 5.0
+# messages fetched per request when replaying
+REPLAY_PAGE_SIZE: int = 100
+# messages of each input replayed at most, older ones are reported and skipped
+REPLAY_LIMIT: int = 1000
+
+
+@dataclass
+class InputProgress:
+    # message id -> handlers still delivering it, 0 for messages refused during the shutdown
+    pending: dict[int, int] = field(default_factory=dict)
+    # highest message id delivered by every handler
+    last_done: int = 0
+    # highest message id any handler started, its other handlers still deliver it during the shutdown
+    last_started: int = 0
+    # first message id any handler started since the start, the replay stops before it
+    first_started: int = 0
+
+    def get_checkpoint(self: "InputProgress") -> int:
+        # every message up to the checkpoint was delivered, the ones after it are replayed
+        return min(self.pending) - 1 if len(self.pending) > 0 else self.last_done
+
+
+@dataclass
+class ShutdownReport:
+    # deliveries finished after the shutdown started
+    flushed: int = 0
+    # deliveries still running at the deadline
+    dropped: int = 0
+    # messages received after the shutdown started, not delivered
+    refused: int = 0
+    # messages after the checkpoints, replayed on the next start
+    left_to_replay: int = 0
+
+    def __str__(self: "ShutdownReport") -> str:
+        return f"{self.flushed} deliveries flushed, {self.dropped} dropped at the deadline, {self.refused} messages refused, {self.left_to_replay} left to replay."
+
+
+@dataclass
+class ReplayEvent:
+    message: MessageProtocol
+    chat_id: int
+
+
+# input channel url -> delivery progress
+input_progress: dict[str, InputProgress] = {}
+# set when the shutdown starts, handlers then refuse new messages
+shutdown_report: list[ShutdownReport | None] = [None]
+# checkpoints read by the last replay, merged with the progress of this run when saving, None while this instance does not forward
+previous_checkpoints: list[dict[str, int] | None] = [None]
+# inputs whose missed messages are not replayed yet, their checkpoints stay the previous ones
+unreplayed: set[str] = set()
+# one save at a time, so a periodic save never lands after the one of the shutdown
+checkpoint_lock: Lock = Lock()
+
+
+def get_checkpoint_path() -> str:
+    return getenv("CHECKPOINT_PATH") or DEFAULT_CHECKPOINT_PATH
+
+
+def is_draining() -> bool:
+    return shutdown_report[0] is not None
+
+
+def get_progress(input_url: str) -> InputProgress:
+    progress: InputProgress | None = input_progress.get(input_url)
+    if progress is None:
+        progress = input_progress[input_url] = InputProgress()
+    return progress
+
+
+def accept_message(input_url: str, message_id: int) -> bool:
+    """Tells whether a handler delivers the message, once the shutdown started only the messages already being delivered are.
+
+    Refused messages stay after the checkpoint of their input, so the next start replays them.
+
+    Args:
+        input_url (str): url of the input channel.
+        message_id (int): telegram message id.
+
+    Returns:
+        bool: True if the handler delivers the message.
+    """
+
+    report: ShutdownReport | None = shutdown_report[0]
+    if report is None: return True
+    progress: InputProgress = get_progress(input_url)
+    if message_id <= progress.last_started: return True
+
+    # every handler of the input refuses the message, it is counted once
+    if message_id not in progress.pending:
+        progress.pending[message_id] = 0
+        report.refused += 1
+    return False
+
+
+def start_delivery(input_url: str, message_id: int) -> None:
+    progress: InputProgress = get_progress(input_url)
+    progress.pending[message_id] = progress.pending.get(message_id, 0) + 1
+    progress.last_started = max(progress.last_started, message_id)
+    if progress.first_started == 0: progress.first_started = message_id
+
+
+def finish_delivery(input_url: str, message_id: int) -> None:
+    progress: InputProgress = input_progress[input_url]
+    progress.pending[message_id] -= 1
+    if progress.pending[message_id] == 0:
+        del progress.pending[message_id]
+        progress.last_done = max(progress.last_done, message_id)
+    if shutdown_report[0] is not None: shutdown_report[0].flushed += 1
+
+
+def count_deliveries() -> int:
+    return sum([count for progress in input_progress.values() for count in progress.pending.values()])
+
+
+def get_checkpoints() -> dict[str, int] | None:
+    """Merges the progress of this run into the previous checkpoints, so the inputs without messages keep theirs.
+
+    A checkpoint never moves back, and the one of an input stays the previous one until its missed messages are replayed.
+
+    Returns:
+        dict[str, int] | None: input channel url -> last delivered message id, None while this instance does not forward.
+    """
+
+    previous: dict[str, int] | None = previous_checkpoints[0]
+    if previous is None: return None
+
+    checkpoints: dict[str, int] = dict(previous)
+    for url, progress in input_progress.items():
+        if url in unreplayed: continue
+        checkpoints[url] = max(checkpoints.get(url, 0), progress.get_checkpoint())
+    return checkpoints
+
+
+def disable_checkpoints() -> None:
+    """Stops saving the checkpoints, called when another instance takes over the inputs and saves its own."""
+
+    previous_checkpoints[0] = None
+    unreplayed.clear()
+    # the replay after the next takeover stops before the first message forwarded live then
+    for progress in input_progress.values():
+        progress.first_started = 0
+
+
+def save_checkpoints(checkpoints: dict[str, int], path: str | None = None) -> None | Exception:
+    """Writes the checkpoint of every input channel atomically.
+
+    Args:
+        checkpoints (dict[str, int]): input channel url -> last delivered message id, see get_checkpoints.
+        path (str | None, optional): file path. Defaults to get_checkpoint_path().
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+
+    path = path if path is not None else get_checkpoint_path()
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{path}.tmp", "w") as f:
+            f.write(dumps(checkpoints))
+        replace(f"{path}.tmp", path)
+    except OSError as e:
+        return SnapshotException(exc=e, path=path)
+
+
+def load_checkpoints(path: str | None = None) -> dict[str, int] | None | Exception:
+    """Reads the checkpoints saved by the last shutdown.
+
+    Args:
+        path (str | None, optional): file path. Defaults to get_checkpoint_path().
+
+    Returns:
+        dict[str, int] | None | Exception: input channel url -> last delivered message id, None if there is no file or exception if any.
+    """
+
+    path = path if path is not None else get_checkpoint_path()
+    if not Path(path).exists(): return None
+    try:
+        with open(path) as f:
+            return {str(url): int(message_id) for url, message_id in loads(f.read()).items()}
+    except (OSError, JSONDecodeError, AttributeError, ValueError) as e:
+        return SnapshotException(exc=e, path=path)
+
+
+async def drain(timeout: float) -> ShutdownReport:
+    """Refuses new messages and waits for the deliveries in progress until they finish or the deadline passes.
+
+    Args:
+        timeout (float): seconds to wait.
+
+    Returns:
+        ShutdownReport: counts of the shutdown, final once the checkpoints are saved.
+    """
+
+    report = shutdown_report[0] = ShutdownReport()
+    deadline: float = perf_counter() + timeout
+    while count_deliveries() > 0 and perf_counter() < deadline:
+        await sleep(DRAIN_POLL_INTERVAL)
+    report.dropped = count_deliveries()
+    report.left_to_replay = sum([len(progress.pending) for progress in input_progress.values()])
+    return report
+
+
+async def shutdown(client: TelegramClientProtocol) -> None:
+    """Drains the deliveries, saves the checkpoints and disconnects the client, called on SIGTERM.
+
+    The deadline is the SHUTDOWN_TIMEOUT environment variable, 10 seconds by default.
+
+    Args:
+        client (TelegramClientProtocol): telegram client instance.
+    """
+
+    if is_draining(): return
+    print("Shutting down, waiting for the messages being forwarded...")
+    report: ShutdownReport = await drain(float(getenv("SHUTDOWN_TIMEOUT") or DEFAULT_SHUTDOWN_TIMEOUT))
+
+    async with checkpoint_lock:
+        checkpoints: dict[str, int] | None = get_checkpoints()
+        if checkpoints is not None:
+            res: None | Exception = await get_running_loop().run_in_executor(None, save_checkpoints, checkpoints)
+            if isinstance(res, Exception): print(f"Could not save the checkpoints: {repr(res)}")
+    print(f"Shutdown: {report}")
+
+    # the telethon client returns a coroutine when the loop is running
+    disconnected: Any = client.disconnect()
+    if isawaitable(disconnected): await disconnected
+
+
+async def run_checkpoint_saver(interval: float = CHECKPOINT_INTERVAL) -> None:
+    """Saves the checkpoints when they change, so the messages missed after a crash are replayed too.
+
+    Args:
+        interval (float, optional): seconds between saves. Defaults to CHECKPOINT_INTERVAL.
+    """
+
+    loop = get_running_loop()
+    saved: dict[str, int] | None = None
+    while True:
+        await sleep(interval)
+        async with checkpoint_lock:
+            # the shutdown saves the final checkpoints
+            if is_draining(): return
+            checkpoints: dict[str, int] | None = get_checkpoints()
+            if checkpoints is None or checkpoints == saved: continue
+            res: None | Exception = await loop.run_in_executor(None, save_checkpoints, checkpoints)
+        if isinstance(res, Exception):
+            print(f"Could not save the checkpoints: {repr(res)}")
+            continue
+        saved = checkpoints
+
+
+async def fetch_missed_messages(client: TelegramClientProtocol, peer: Any, checkpoint: int, first_live: int) -> list[MessageProtocol]:
+    """Fetches the messages after the checkpoint and before the first one forwarded live, a page at a time.
+
+    Telegram returns the newest messages of the range first, so the pages go back until the checkpoint
+    or REPLAY_LIMIT, and the older messages left are reported.
+
+    Args:
+        client (TelegramClientProtocol): telegram client instance.
+        peer (Any): input channel.
+        checkpoint (int): last message id delivered.
+        first_live (int): first message id forwarded live, 0 when none was.
+
+    Returns:
+        list[MessageProtocol]: messages, oldest first.
+    """
+
+    messages: list[MessageProtocol] = []
+    max_id: int = first_live
+    while len(messages) < REPLAY_LIMIT:
+        page: list[MessageProtocol] = list(await client.get_messages(peer, min_id=checkpoint, max_id=max_id, limit=REPLAY_PAGE_SIZE))
+        messages += page
+        if len(page) < REPLAY_PAGE_SIZE: break
+        max_id = min([message.id for message in page])
+    else:
+        print(f"Messages {checkpoint + 1} to {max_id - 1} of {peer} are older than the last {REPLAY_LIMIT} missed and are not replayed.")
+    return sorted(messages, key=lambda message: message.id)
+
+
+async def replay_checkpoints(client: TelegramClientProtocol) -> int | Exception:
+    """Forwards the messages each input received after its checkpoint, missed while the bot was stopped.
+
+    Runs on start and when a standby takes the lease, the messages the handlers already got live are not replayed.
+    The checkpoints are then saved again with the progress of this run, see run_checkpoint_saver.
+
+    Args:
+        client (TelegramClientProtocol): telegram client instance.
+
+    Returns:
+        int | Exception: number of messages replayed or exception if any.
+    """
+
+    handlers: list[tuple[Any, Any]] = list(client.list_event_handlers())
+    # a standby keeps the checkpoints for the instance forwarding
+    if not any([handler.__name__.startswith("connection_handler") for handler, _ in handlers]): return 0
+
+    checkpoints: dict[str, int] | None | Exception = load_checkpoints()
+    if isinstance(checkpoints, Exception):
+        print(f"Ignoring checkpoints: {repr(checkpoints)}")
+        previous_checkpoints[0] = {}
+        return checkpoints
+    checkpoints = checkpoints if checkpoints is not None else {}
+    unreplayed.update(checkpoints)
+    previous_checkpoints[0] = checkpoints
+
+    channels: dict[str, ChannelData] = {channel.url: channel for channel in current_snapshot[0].channels} if current_snapshot[0] is not None else {}
+    replayed: int = 0
+    for url, checkpoint in checkpoints.items():
+        channel: ChannelData | None = channels.get(url)
+        input_handlers: list[Any] = [handler for handler, _ in handlers if channel is not None and handler.__name__.startswith(f"connection_handler - ({channel.id}) ->")]
+        # the checkpoint of an input without connections moves with its messages once it gets some
+        if len(input_handlers) == 0:
+            unreplayed.discard(url)
+            continue
+
+        peer: Any = peer_cache.get(url, url)
+        try:
+            chat_id: int = await client.get_peer_id(peer)
+            # the messages from the first one delivered live were already forwarded, 0 when none was
+            first_live: int = get_progress(url).first_started
+            messages: list[MessageProtocol] = await fetch_missed_messages(client, peer, checkpoint, first_live)
+        except Exception as e:
+            # the checkpoint is kept, the next start tries again
+            print(f"Could not replay the messages of {url}: {repr(e)}")
+            continue
+
+        for message in messages:
+            for handler in input_handlers:
+                try:
+                    await handler(ReplayEvent(message, chat_id))
+                except Exception as e:
+                    print(f"Could not replay message {message.id} of {url}: {repr(e)}")
+            replayed += 1
+        unreplayed.discard(url)
+
+    print(f"{replayed} messages received while stopped replayed.")
+    return replayed
@@ -0,0 +1,39 @@
+# telegram rejects messages longer than this
+MAX_MESSAGE_LENGTH: int = 4096
+
+
+def split_message(message: str, limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """Splits a message in chunks that fit in a telegram message, breaking on line boundaries when possible.
+
+    Args:
+        message (str): message to split.
+        limit (int, optional): max length of each chunk. Defaults to MAX_MESSAGE_LENGTH.
+
+    Returns:
+        list[str]: chunks of the message in order.
+    """
+    
+    if len(message) <= limit:
+        return [message]
+    
+    chunks: list[str] = []
+    current: list[str] = []
+    current_len: int = 0
+    
+    for line in message.split("\n"):
+        # lines longer than the limit are cut in pieces
+        pieces: list[str] = [line[i:i + limit] for i in range(0, len(line), limit)] or [""]
+        
+        for piece in pieces:
+            # + 1 for the new line joining it to the current chunk
+            if current_len + len(piece) + (1 if len(current) > 0 else 0) > limit:
+                chunks.append("\n".join(current))
+                current, current_len = [], 0
+            
+            current_len += len(piece) + (1 if len(current) > 0 else 0)
+            current.append(piece)
+    
+    if len(current) > 0:
+        chunks.append("\n".join(current))
+    
+    return [chunk for chunk in chunks if chunk.strip() != ""]
@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+
+from dataclasses import dataclass, field
+
+from time import perf_counter
+
+from typing import Iterator
+
+
+@dataclass
+class StartupProfile:
+    enabled: bool = False
+    start: float = field(default_factory=perf_counter)
+    # (phase name, seconds spent)
+    phases: list[tuple[str, float]] = field(default_factory=list)
+
+    @contextmanager
+    def phase(self: "StartupProfile", name: str) -> Iterator[None]:
+        """Measures the time spent inside the block as a startup phase.
+
+        Args:
+            name (str): name of the phase.
+        """
+        
+        phase_start: float = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, perf_counter() - phase_start))
+
+    def report(self: "StartupProfile", milestone: str) -> None:
+        """Prints the time of each phase and the total time until a milestone, if enabled.
+
+        Args:
+            milestone (str): name of the point reached, e.g. first forward.
+        """
+        
+        if not self.enabled: return
+        
+        width: int = max([len(name) for name, _ in self.phases] + [len(milestone)])
+        lines: list[str] = [f"  {name.ljust(width)}  {seconds * 1000:9.1f} ms" for name, seconds in self.phases]
+        lines.append(f"  {milestone.ljust(width)}  {(perf_counter() - self.start) * 1000:9.1f} ms")
+        print("Startup profile:\n" + "\n".join(lines))
@@ -1,31 +1,71 @@
+from dataclasses import dataclass
+
 from functools import reduce
 
-from db.schema import Filter
+from app.utils.routing_snapshot import FilterData
 from app.utils.link_remover import remove_link
 
+from app.metrics.tracing import trace_span
 
-def treat_message(message: str, filters: list[Filter]) -> str | None:  
-    """Uses filters to treat message.
+
+@dataclass(frozen=True)
+class CompiledFilters:
+    blacklist: list[str]
+    # (condition, replacement) pairs in the order they are applied
+    replacements: list[tuple[str, str]]
+    link_removers: list[str]
+
+
+def compile_filters(filters: list[FilterData]) -> CompiledFilters:
+    """Splits the filters by mode, once per filters version instead of once per message.
+
+    Args:
+        filters (list[FilterData]): filters from the filter cache.
+
+    Returns:
+        CompiledFilters: conditions of each mode.
+    """
+
+    return CompiledFilters(
+        [str(filter_.condition) for filter_ in filters if str(filter_.mode) == "blacklist"],
+        [(str(filter_.condition), str(filter_.replacement)) for filter_ in filters if str(filter_.mode) == "replacement"],
+        [str(filter_.condition) for filter_ in filters if str(filter_.mode) == "link_remover"]
+    )
+
+
+def treat_compiled_message(message: str, compiled: CompiledFilters) -> str | None:
+    """Uses compiled filters to treat message.
 
     Args:
         message (str): message to be treated.
-        filters (list[Filter]): filter objects from database to determine how the message should be treated.
+        compiled (CompiledFilters): filters split by mode.
 
     Returns:
         str | None: treated message or None if the message should be ignored.
     """
-    
-    # get list of operations that should be performed
-    blacklist: list[str] = [str(filter_.condition) for filter_ in filters if str(filter_.mode) == "blacklist"]
-    to_be_replaced: list[str] = [str(filter_.condition) for filter_ in filters if str(filter_.mode) == "replacement"]
-    replacements: list[str] = [str(filter_.replacement) for filter_ in filters if str(filter_.mode) == "replacement"]
-    link_removers: list[str] = [str(filter_.condition) for filter_ in filters if str(filter_.mode) == "link_remover"]
-    
+
     # treat blacklist
-    if any([expr in message for expr in blacklist]): return None
-    
+    with trace_span("blacklist"):
+        if any([expr in message for expr in compiled.blacklist]): return None
+
     # starts with the message and iterates through expressions and replacements returning the replaced message for the next iteration
-    message_: str = reduce(lambda prev, curr: prev.replace(curr[0], curr[1]), zip(to_be_replaced, replacements), message)
+    with trace_span("replacement"):
+        message_: str = reduce(lambda prev, curr: prev.replace(curr[0], curr[1]), compiled.replacements, message)
     # starts with de message and iterates through link removers returning the message without links for the next iteration
-    message_: str = reduce(lambda prev, curr: remove_link(prev, curr), link_removers, message_)
-    return message_
\ No newline at end of file
+    with trace_span("remove_link"):
+        message_: str = reduce(lambda prev, curr: remove_link(prev, curr), compiled.link_removers, message_)
+    return message_
+
+
+def treat_message(message: str, filters: list[FilterData]) -> str | None:
+    """Uses filters to treat message.
+
+    Args:
+        message (str): message to be treated.
+        filters (list[FilterData]): filters from the filter cache to determine how the message should be treated.
+
+    Returns:
+        str | None: treated message or None if the message should be ignored.
+    """
+
+    return treat_compiled_message(message, compile_filters(filters))
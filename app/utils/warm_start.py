@@ -0,0 +1,86 @@
+from asyncio import get_running_loop, sleep
+
+from app.utils.remanage_connections import apply_snapshot
+from app.utils.routing_snapshot import RoutingSnapshot, build_snapshot, current_snapshot, is_same_configuration, peer_cache, save_snapshot
+
+from classes.telethon_protocols import TelegramClientProtocol
+from classes.sqlalchemy_protocols import EngineProtocol, SessionProtocol
+
+from db.init_db import create_session
+
+# seconds between attempts to reach the database while it is down
+RECONCILE_RETRY_INTERVAL: float = 5.0
+
+
+def build_snapshot_in_new_session(engine: EngineProtocol) -> RoutingSnapshot | Exception:
+    """Builds a snapshot with its own session, so it can run in a worker thread.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+
+    Returns:
+        RoutingSnapshot | Exception: snapshot of the configuration in the database or exception if any.
+    """
+    
+    session: SessionProtocol = create_session(engine)
+    try:
+        return build_snapshot(session)
+    finally:
+        session.close()
+
+
+async def resolve_peers(client: TelegramClientProtocol) -> None | Exception:
+    """Resolves the peer id of every channel in the current snapshot that is not resolved yet and saves it.
+
+    Args:
+        client (TelegramClientProtocol): telegram client instance.
+
+    Returns:
+        None | Exception: None if everything went well or exception if any.
+    """
+    
+    snapshot: RoutingSnapshot | None = current_snapshot[0]
+    if snapshot is None: return
+    
+    resolved: int = 0
+    for channel in snapshot.channels:
+        if channel.url in snapshot.peers: continue
+        try:
+            peer_id: int = await client.get_peer_id(channel.url)
+        except Exception:
+            # channels that cannot be resolved keep using their url
+            continue
+        peer_cache[channel.url] = peer_id
+        snapshot.peers[channel.url] = peer_id
+        resolved += 1
+    
+    if resolved == 0: return
+    return save_snapshot(snapshot)
+
+
+async def reconcile_snapshot(engine: EngineProtocol, client: TelegramClientProtocol, loaded_snapshot: RoutingSnapshot) -> None:
+    """Waits for the database and replaces the handlers built from the snapshot on disk if the configuration changed.
+
+    Args:
+        engine (EngineProtocol): sqlalchemy engine instance.
+        client (TelegramClientProtocol): telegram client instance.
+        loaded_snapshot (RoutingSnapshot): snapshot the handlers were built from.
+    """
+    
+    while True:
+        # the query may block while the database is unreachable, keep it off the event loop
+        snapshot: RoutingSnapshot | Exception = await get_running_loop().run_in_executor(None, build_snapshot_in_new_session, engine)
+        if not isinstance(snapshot, Exception): break
+        print(f"Database not available, forwarding from snapshot version {loaded_snapshot.version}.")
+        await sleep(RECONCILE_RETRY_INTERVAL)
+    
+    if not is_same_configuration(snapshot, loaded_snapshot):
+        res: str | Exception = apply_snapshot(snapshot, client)
+        if isinstance(res, Exception):
+            print(f"Could not reconcile snapshot: {repr(res)}")
+            return
+    
+    save_snapshot(snapshot)
+    print("Snapshot reconciled with database!")
+    
+    await resolve_peers(client)
@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+
+from json import dumps, loads
+
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class Limit:
+    # result field compared with the baseline
+    field: str
+    unit: str
+    # prefix of the field in the regression message, e.g. p99
+    label: str = ""
+    # throughputs regress when they drop, times and counts when they grow
+    higher_is_better: bool = False
+    # counts like queries regress on any increase, times within the tolerance are noise
+    exact: bool = False
+
+    def is_regression(self: "Limit", value: float, base: float, tolerance: float) -> bool:
+        if self.higher_is_better: return value < base * (1 - tolerance)
+        if self.exact: return value > base
+        return value > base * (1 + tolerance)
+
+
+def find_regressions(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    get_key: Callable[[dict[str, Any]], str],
+    limits: list[Limit],
+    tolerance: float
+) -> list[str]:
+    """Finds the results worse than the baseline result with the same key.
+
+    Args:
+        results (list[dict[str, Any]]): current results.
+        baseline (list[dict[str, Any]]): baseline results.
+        get_key (Callable[[dict[str, Any]], str]): function identifying the case of a result.
+        limits (list[Limit]): fields compared.
+        tolerance (float): allowed relative slowdown, e.g. 0.1.
+
+    Returns:
+        list[str]: description of each regression.
+    """
+
+    baseline_by_key: dict[str, dict[str, Any]] = {get_key(result): result for result in baseline}
+    regressions: list[str] = []
+    for result in results:
+        base: dict[str, Any] | None = baseline_by_key.get(get_key(result))
+        if base is None: continue
+        for limit in limits:
+            if limit.is_regression(result[limit.field], base[limit.field], tolerance):
+                label: str = f"{limit.label} " if limit.label != "" else ""
+                regressions.append(f"{get_key(result)}: {label}{base[limit.field]} -> {result[limit.field]} {limit.unit}")
+    return regressions
+
+
+def report_results(
+    results: list[dict[str, Any]],
+    args: Any,
+    get_key: Callable[[dict[str, Any]], str],
+    limits: list[Limit]
+) -> int:
+    """Writes the results to --output and compares them with --baseline.
+
+    Args:
+        results (list[dict[str, Any]]): current results.
+        args (Any): parsed arguments with output, baseline and tolerance.
+        get_key (Callable[[dict[str, Any]], str]): function identifying the case of a result.
+        limits (list[Limit]): fields compared.
+
+    Returns:
+        int: exit code, 1 if there is any regression.
+    """
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            f.write(dumps(results, indent=2))
+
+    if args.baseline is None: return 0
+    with open(args.baseline) as f:
+        regressions: list[str] = find_regressions(results, loads(f.read()), get_key, limits, args.tolerance)
+    if len(regressions) == 0:
+        print("No regressions against the baseline.")
+        return 0
+    print("Regressions against the baseline:\n" + "\n".join(regressions))
+    return 1
@@ -0,0 +1,60 @@
+from random import Random
+
+from bench.seed import EMOJIS, WORDS
+
+# generated corpora, the links removed in all of them are to target.com
+CORPORA: tuple[str, ...] = ("long_links", "emoji", "repeated_urls")
+
+
+def long_links(random: Random, count: int) -> list[str]:
+    # long posts, one sentence in three has a link, a third of them to the removed domain
+    messages: list[str] = []
+    for _ in range(count):
+        sentences: list[str] = []
+        for index in range(random.randint(40, 80)):
+            words: list[str] = [random.choice(WORDS) for _ in range(random.randint(5, 15))]
+            if index % 3 == 0:
+                domain: str = "target.com" if random.random() < 0.33 else f"other{random.randint(0, 20)}.com"
+                words.insert(random.randint(0, len(words)), f"https://{domain}/{random.randint(1, 10 ** 6)}")
+            sentences.append(" ".join(words) + random.choice([".", "!", "?", "\n"]))
+        messages.append(" ".join(sentences))
+    return messages
+
+
+def emoji(random: Random, count: int) -> list[str]:
+    # short posts where most tokens are emojis, with a single link
+    messages: list[str] = []
+    for _ in range(count):
+        tokens: list[str] = [random.choice(EMOJIS) * random.randint(1, 3) if random.random() < 0.7 else random.choice(WORDS) for _ in range(random.randint(20, 60))]
+        tokens.insert(random.randint(0, len(tokens)), f"https://target.com/{random.randint(1, 1000)}")
+        messages.append(" ".join(tokens) + "\n" + " ".join(random.choice(EMOJIS) for _ in range(10)))
+    return messages
+
+
+def repeated_urls(random: Random, count: int) -> list[str]:
+    # the same url repeated in many lines, the case get_link_positions only detects once
+    messages: list[str] = []
+    for _ in range(count):
+        url: str = f"https://target.com/{random.randint(1, 1000)}"
+        lines: list[str] = [
+            f"{' '.join(random.choice(WORDS) for _ in range(random.randint(3, 8)))} {url if random.random() < 0.5 else ''}"
+            for _ in range(random.randint(10, 30))
+        ]
+        messages.append("\n".join(lines))
+    return messages
+
+
+def generate_corpus(name: str, count: int, seed: int = 0) -> list[str]:
+    """Generates a reproducible corpus.
+
+    Args:
+        name (str): long_links, emoji or repeated_urls.
+        count (int): number of messages.
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        list[str]: messages, the removed domain in all of them is target.com.
+    """
+
+    generators = {"long_links": long_links, "emoji": emoji, "repeated_urls": repeated_urls}
+    return generators[name](Random(seed), count)
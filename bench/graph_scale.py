@@ -0,0 +1,186 @@
+from argparse import ArgumentParser
+
+from asyncio import new_event_loop, set_event_loop
+
+from concurrent.futures import ProcessPoolExecutor
+
+from itertools import product
+
+from multiprocessing import get_context
+
+from os import environ
+
+from random import Random
+
+from tempfile import mkdtemp
+
+from time import perf_counter
+
+from typing import Any, Callable
+
+from sqlalchemy import event
+
+from app.auth.auth_cache import auth_cache
+from app.routes.channel_routes import connect_channels, view_connections
+from app.routes.channel_routes.disconnect_channels import disconnect_channels
+from app.utils.fake_client import FakeSettings, FakeTelegramClient
+from app.utils.get_loop import get_loop
+from app.utils.paginate import PageOptions
+from app.utils.remanage_connections import get_channel_pairs, query_channels, remanage_connections
+
+from bench.compare import Limit, report_results
+from bench.seed import create_bench_db, get_chain_edges, get_dag_edges, get_url, seed_channels, seed_connections
+
+from db.schema import Channel
+
+DEFAULT_TOLERANCE: float = 0.1
+# chat authorized to run the routes
+BENCH_CHAT_ID: int = 1
+# any extra query is a regression, the time is noisy
+LIMITS: list[Limit] = [Limit("ms", "ms"), Limit("queries", "queries", exact=True)]
+
+
+def configure_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog = "graph_scale",
+        description = "Times remanage_connections and the channel graph routes over generated graphs, with the number of queries of each.",
+        epilog = "Example: python -m bench.graph_scale --shapes dag,chain --channels 100,1000,5000 --degree 5"
+    )
+    parser.add_argument("--shapes", type=str, default="dag,chain", help="Comma separated graph shapes: dag (random, no loop) or chain.")
+    parser.add_argument("--channels", type=str, default="100,1000", help="Comma separated numbers of channels.")
+    parser.add_argument("--degree", type=int, default=3, help="Average outputs per channel of the dags.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated dags.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each case, the fastest timing of each operation is kept.")
+    parser.add_argument("--output", type=str, default=None, help="File to write the JSON results to.")
+    parser.add_argument("--baseline", type=str, default=None, help="JSON results to compare with, exits with 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown against the baseline.")
+    return parser
+
+
+def get_case_key(case: dict[str, Any]) -> str:
+    return f"shape={case['shape']} channels={case['channels']} edges={case['edges']}"
+
+
+def get_result_key(result: dict[str, Any]) -> str:
+    return f"{get_case_key(result['case'])} {result['operation']}"
+
+
+def get_edges(case: dict[str, Any], ids: list[str]) -> list[tuple[str, str]]:
+    if case["shape"] == "chain": return get_chain_edges(ids)
+    return get_dag_edges(Random(case["seed"]), ids, case["edges"])
+
+
+def run_case(case: dict[str, Any]) -> list[dict[str, Any]]:
+    """Seeds a new database with a generated graph and times each operation once, starting from an empty session cache.
+
+    Runs in its own process, so module caches belong to the case.
+
+    Args:
+        case (dict[str, Any]): shape, channels, edges and seed.
+
+    Returns:
+        list[dict[str, Any]]: milliseconds and queries of each operation, with the name of the exception if it failed.
+    """
+
+    # keep the snapshot written by remanage_connections out of the working tree
+    environ["SNAPSHOT_PATH"] = f"{mkdtemp()}/routing.json"
+
+    loop = new_event_loop()
+    set_event_loop(loop)
+
+    db = create_bench_db()
+    if isinstance(db, Exception): raise db
+    engine, session = db
+    ids: list[str] = seed_channels(session, case["channels"])
+    edges: list[tuple[str, str]] = get_edges(case, ids)
+    seed_connections(session, edges)
+
+    client = FakeTelegramClient("bench", 0, "", loop, FakeSettings(keep_sent=False))
+    auth_cache.chat_ids = {BENCH_CHAT_ID: 1}
+    auth_cache.loaded = True
+
+    queries: list[int] = [0]
+    def count_query(*args: Any) -> None:
+        queries[0] += 1
+    event.listen(engine, "before_cursor_execute", count_query)
+
+    results: list[dict[str, Any]] = []
+    def measure(operation: str, function: Callable[[], Any]) -> Any:
+        queries[0] = 0
+        start: float = perf_counter()
+        try:
+            res: Any = function()
+        except RecursionError as e:
+            res = e
+        elapsed: float = perf_counter() - start
+        results.append({
+            "case": case,
+            "operation": operation,
+            "ms": round(elapsed * 1000, 3),
+            "queries": queries[0],
+            "error": type(res).__name__ if isinstance(res, Exception) else None,
+        })
+        return res
+
+    def get_channel(index: int) -> Channel:
+        return session.query(Channel).filter(Channel.id == ids[index]).first()
+
+    measure("remanage_connections", lambda: remanage_connections(session, client))
+
+    session.expire_all()
+    channels = query_channels(session)
+    if isinstance(channels, Exception): raise channels
+    measure("get_channel_pairs", lambda: get_channel_pairs(channels))
+
+    # walks from the first channel, the whole graph in a chain
+    session.expire_all()
+    first: Channel = get_channel(0)
+    measure("get_loop", lambda: get_loop([first]))
+
+    # last -> first closes a loop through the whole chain, in a dag only if the last channel is reachable
+    session.expire_all()
+    last, first = get_channel(-1), get_channel(0)
+    measure("connect_channels.validate", lambda: connect_channels.validate(last, first))
+    session.rollback()
+
+    session.expire_all()
+    measure("view_connections.query_database", lambda: view_connections.query_database(PageOptions(), session))
+    page = view_connections.query_database(PageOptions(), session)
+    if isinstance(page, Exception): raise page
+    measure("view_connections.format_message", lambda: view_connections.format_message(*page))
+
+    input_id, output_id = edges[len(edges) // 2]
+    command: str = f"/disconnect_channels --input={get_url(ids.index(input_id))} --output={get_url(ids.index(output_id))}"
+    session.expire_all()
+    measure("disconnect_channels", lambda: disconnect_channels(command, BENCH_CHAT_ID, session, client))
+
+    return results
+
+
+def main(args: Any) -> int:
+    cases: list[dict[str, Any]] = [
+        {"shape": shape, "channels": channels, "edges": channels - 1 if shape == "chain" else channels * args.degree, "seed": args.seed}
+        for shape, channels in product(args.shapes.split(","), [int(value) for value in args.channels.split(",")])
+    ]
+
+    results: list[dict[str, Any]] = []
+    for case in cases:
+        runs: list[list[dict[str, Any]]] = []
+        for _ in range(args.repeat):
+            # a new process per run, so the identity map and caches are not shared between runs
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                runs.append(executor.submit(run_case, case).result())
+        # the number of queries is the same in every run
+        fastest: list[dict[str, Any]] = [min(operation_runs, key=lambda run: run["ms"]) for operation_runs in zip(*runs)]
+        results += fastest
+        for result in fastest:
+            error: str = f" ({result['error']})" if result["error"] is not None else ""
+            print(f"{get_result_key(result)}: {result['ms']} ms, {result['queries']} queries{error}")
+
+    return report_results(results, args, get_result_key, LIMITS)
+
+
+if __name__ == "__main__":
+    parser = configure_parser()
+    args = parser.parse_args()
+    exit(main(args))
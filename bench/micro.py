@@ -0,0 +1,143 @@
+from argparse import ArgumentParser
+
+from timeit import Timer
+
+from typing import Any, Callable
+
+from app.cmd.parse import parse_command
+from app.cmd.tokenize import tokenize_command
+from app.validations.validate_command import validate_command
+from app.utils.link_remover import (
+    assemble_message, get_indices_of_delimiters, get_indices_of_segments, get_link_positions,
+    remove_link, remove_link_segments, remove_poctuation_from_links, replace_link_for_placeholder
+)
+from app.utils.routing_snapshot import FilterData
+from app.utils.treat_message import treat_message
+
+from bench.compare import Limit, report_results
+from bench.corpus import CORPORA, generate_corpus
+
+DOMAIN: str = "target.com"
+PONCTUATION: list[str] = [".", ",", "!", "?"]
+DELIMITERS: list[str] = ["\n", ".", "?", "!"]
+CORPUS_SIZE: int = 20
+DEFAULT_TOLERANCE: float = 0.15
+LIMITS: list[Limit] = [Limit("us_per_call", "us")]
+
+
+def configure_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog = "micro",
+        description = "Times treat_message, each stage of remove_link and the command parser over generated corpora.",
+        epilog = "Example: python -m bench.micro --filters 1,10,100,1000 --output micro.json"
+    )
+    parser.add_argument("--filters", type=str, default="1,10,100,1000", help="Comma separated numbers of filters per mode for treat_message.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timings of each benchmark, the fastest is kept.")
+    parser.add_argument("--output", type=str, default=None, help="File to write the JSON results to.")
+    parser.add_argument("--baseline", type=str, default=None, help="JSON results to compare with, exits with 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown against the baseline.")
+    return parser
+
+
+def time_call(function: Callable[[], Any], repeat: int) -> float:
+    """Times a function with enough calls to last at least 0.2 seconds per timing.
+
+    Args:
+        function (Callable[[], Any]): function without arguments.
+        repeat (int): number of timings, the fastest is kept.
+
+    Returns:
+        float: microseconds per call.
+    """
+
+    timer = Timer(function)
+    calls, _ = timer.autorange()
+    return min(timer.repeat(repeat, calls)) / calls * 10 ** 6
+
+
+def get_filters(per_mode: int) -> list[FilterData]:
+    # one link remover is the domain in the corpora, the others never match
+    return [FilterData(f"forbidden{index}", None, "blacklist") for index in range(per_mode)] \
+        + [FilterData(f"absent{index}", f"word{index}", "replacement") for index in range(per_mode)] \
+        + [FilterData(DOMAIN if index == 0 else f"domain{index}.com", None, "link_remover") for index in range(per_mode)]
+
+
+def bench_treat_message(corpus: list[str], filters: list[FilterData], repeat: int) -> float:
+    return time_call(lambda: [treat_message(message, filters) for message in corpus], repeat) / len(corpus)
+
+
+def bench_link_remover(corpus: list[str], repeat: int) -> dict[str, float]:
+    # inputs of each stage are computed once, so each stage is timed alone
+    links: list[Any] = [get_link_positions(message, DOMAIN) for message in corpus]
+    links = [remove_poctuation_from_links(message, positions, PONCTUATION) for message, positions in zip(corpus, links)]
+    placeholders: list[str] = [replace_link_for_placeholder(message, positions) for message, positions in zip(corpus, links)]
+    delimiters: list[Any] = [get_indices_of_delimiters(placeholder, DELIMITERS) for placeholder in placeholders]
+    segments: list[Any] = [get_indices_of_segments(placeholder, positions) for placeholder, positions in zip(placeholders, delimiters)]
+    remaining: list[Any] = [remove_link_segments(segment, positions) for segment, positions in zip(segments, links)]
+
+    stages: dict[str, Callable[[], Any]] = {
+        "get_link_positions": lambda: [get_link_positions(message, DOMAIN) for message in corpus],
+        "remove_poctuation_from_links": lambda: [remove_poctuation_from_links(message, positions, PONCTUATION) for message, positions in zip(corpus, links)],
+        "replace_link_for_placeholder": lambda: [replace_link_for_placeholder(message, positions) for message, positions in zip(corpus, links)],
+        "get_indices_of_delimiters": lambda: [get_indices_of_delimiters(placeholder, DELIMITERS) for placeholder in placeholders],
+        "get_indices_of_segments": lambda: [get_indices_of_segments(placeholder, positions) for placeholder, positions in zip(placeholders, delimiters)],
+        "remove_link_segments": lambda: [remove_link_segments(segment, positions) for segment, positions in zip(segments, links)],
+        "assemble_message": lambda: [assemble_message(message, segment) for message, segment in zip(corpus, remaining)],
+        "remove_link": lambda: [remove_link(message, DOMAIN) for message in corpus],
+    }
+    return {name: time_call(stage, repeat) / len(corpus) for name, stage in stages.items()}
+
+
+def get_commands() -> dict[str, tuple[str, int]]:
+    # name -> (command, number of flags)
+    return {
+        "short": ("/add_channel --name=news --url=https://t.me/news", 2),
+        "long_values": (f"/add_replacement --condition={'word ' * 200}--replacement={'other ' * 200}", 2),
+        "many_flags": ("/view_connections " + " ".join([f"--flag{index}=value{index}" for index in range(20)]), 20),
+    }
+
+
+def bench_commands(repeat: int) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    for name, (command, flags) in get_commands().items():
+        tokens: list[str] = tokenize_command(command)
+        stages: dict[str, Callable[[], Any]] = {
+            "tokenize_command": lambda: tokenize_command(command),
+            "parse_command": lambda: parse_command(tokens),
+            "validate_command": lambda: validate_command(command, flags),
+        }
+        results += [{"benchmark": stage, "input": name, "us_per_call": round(time_call(function, repeat), 3)} for stage, function in stages.items()]
+    return results
+
+
+def get_result_key(result: dict[str, Any]) -> str:
+    return f"{result['benchmark']} {result['input']}" + (f" filters={result['filters']}" if "filters" in result else "")
+
+
+def main(args: Any) -> int:
+    results: list[dict[str, Any]] = []
+    for corpus_name in CORPORA:
+        corpus: list[str] = generate_corpus(corpus_name, CORPUS_SIZE)
+        for filters in [int(value) for value in args.filters.split(",")]:
+            results.append({
+                "benchmark": "treat_message",
+                "input": corpus_name,
+                "filters": filters,
+                "us_per_call": round(bench_treat_message(corpus, get_filters(filters), args.repeat), 3)
+            })
+        results += [
+            {"benchmark": stage, "input": corpus_name, "us_per_call": round(us, 3)}
+            for stage, us in bench_link_remover(corpus, args.repeat).items()
+        ]
+    results += bench_commands(args.repeat)
+
+    for result in results:
+        print(f"{get_result_key(result)}: {result['us_per_call']} us")
+
+    return report_results(results, args, get_result_key, LIMITS)
+
+
+if __name__ == "__main__":
+    parser = configure_parser()
+    args = parser.parse_args()
+    exit(main(args))
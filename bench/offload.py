@@ -0,0 +1,131 @@
+from argparse import ArgumentParser
+
+from asyncio import Task, create_task, gather, new_event_loop, set_event_loop, sleep
+
+from itertools import product
+
+from json import dumps
+
+from random import Random
+
+from time import perf_counter
+
+from typing import Any
+
+from app.utils.filter_pool import get_cost, get_pool, set_filter_pool, treat_in_worker, treat_message_offloaded
+from app.utils.routing_snapshot import FilterData
+
+from bench.micro import DOMAIN, get_filters
+from bench.seed import generate_text
+
+# seconds between heartbeats measuring how long the loop was blocked
+HEARTBEAT_INTERVAL: float = 0.001
+
+
+def configure_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog = "offload",
+        description = "Compares treating messages inline with offloading them to the filter process pool, to choose FILTER_OFFLOAD_COST.",
+        epilog = "Example: python -m bench.offload --chars 500,5000,50000 --filters 10,100,1000 --workers 4"
+    )
+    parser.add_argument("--chars", type=str, default="500,5000,50000", help="Comma separated message sizes in characters.")
+    parser.add_argument("--filters", type=str, default="10,100,1000", help="Comma separated numbers of filters per mode.")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes of the pool.")
+    parser.add_argument("--messages", type=int, default=200, help="Messages treated per case and mode.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated messages.")
+    parser.add_argument("--output", type=str, default=None, help="File to write the JSON results to.")
+    return parser
+
+
+def generate_message(random: Random, chars: int) -> str:
+    parts: list[str] = []
+    while sum([len(part) + 1 for part in parts]) < chars:
+        parts.append(generate_text(random, "long", [DOMAIN]))
+    return " ".join(parts)[:chars]
+
+
+async def run_mode(messages: list[str], filters: list[FilterData]) -> tuple[float, float]:
+    """Treats the messages in concurrent tasks, like handlers of different messages, while measuring the loop lag.
+
+    Args:
+        messages (list[str]): messages to treat.
+        filters (list[FilterData]): filters.
+
+    Returns:
+        tuple[float, float]: messages per second and longest time the loop was blocked in seconds.
+    """
+
+    lags: list[float] = [0.0]
+    done: list[bool] = [False]
+
+    async def heartbeat() -> None:
+        while not done[0]:
+            due: float = perf_counter() + HEARTBEAT_INTERVAL
+            await sleep(HEARTBEAT_INTERVAL)
+            lags[0] = max(lags[0], perf_counter() - due)
+
+    monitor = gather(heartbeat())
+    start: float = perf_counter()
+    tasks: list[Task[str | None]] = []
+    for message in messages:
+        tasks.append(create_task(treat_message_offloaded(message, filters)))
+        # messages arrive one by one, the heartbeat can run between them
+        await sleep(0)
+    await gather(*tasks)
+    elapsed: float = perf_counter() - start
+    done[0] = True
+    await monitor
+    return len(messages) / elapsed, lags[0]
+
+
+def run_case(chars: int, per_mode: int, args: Any) -> dict[str, Any]:
+    random = Random(args.seed)
+    messages: list[str] = [generate_message(random, chars) for _ in range(args.messages)]
+    filters: list[FilterData] = get_filters(per_mode)
+
+    loop = new_event_loop()
+    set_event_loop(loop)
+
+    set_filter_pool(0, 0)
+    inline_rate, inline_lag = loop.run_until_complete(run_mode(messages, filters))
+
+    # every message is offloaded, the workers are started and given the filters before timing
+    set_filter_pool(args.workers, 0)
+    loop.run_until_complete(gather(*[loop.run_in_executor(get_pool(filters), treat_in_worker, "") for _ in range(args.workers)]))
+    pool_rate, pool_lag = loop.run_until_complete(run_mode(messages, filters))
+    set_filter_pool(0, 0)
+    loop.close()
+
+    return {
+        "chars": chars,
+        "filters": per_mode * 3,
+        "cost": get_cost(messages[0], filters),
+        "inline_messages_per_second": round(inline_rate, 1),
+        "pool_messages_per_second": round(pool_rate, 1),
+        "inline_max_lag_ms": round(inline_lag * 1000, 2),
+        "pool_max_lag_ms": round(pool_lag * 1000, 2),
+    }
+
+
+def main(args: Any) -> int:
+    results: list[dict[str, Any]] = []
+    for chars, per_mode in product([int(value) for value in args.chars.split(",")], [int(value) for value in args.filters.split(",")]):
+        result: dict[str, Any] = run_case(chars, per_mode, args)
+        results.append(result)
+        faster: str = "pool" if result["pool_messages_per_second"] > result["inline_messages_per_second"] else "inline"
+        print(
+            f"chars={chars} filters={result['filters']} cost={result['cost']}: "
+            f"inline {result['inline_messages_per_second']} msg/s, max lag {result['inline_max_lag_ms']} ms | "
+            f"pool {result['pool_messages_per_second']} msg/s, max lag {result['pool_max_lag_ms']} ms | faster: {faster}"
+        )
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            f.write(dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = configure_parser()
+    args = parser.parse_args()
+    exit(main(args))
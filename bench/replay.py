@@ -0,0 +1,118 @@
+from argparse import ArgumentParser
+
+from asyncio import new_event_loop, set_event_loop, sleep
+
+from gzip import open as gzip_open
+
+from hashlib import sha256
+
+from json import dumps, loads
+
+from time import perf_counter
+
+from typing import Any
+
+from app.utils.capture import read_capture
+from app.utils.fake_client import FakeSettings, FakeTelegramClient
+from app.utils.remanage_connections import apply_snapshot
+from app.utils.routing_snapshot import RoutingSnapshot, load_snapshot
+
+
+def configure_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog = "replay",
+        description = "Feeds a capture recorded with CAPTURE_PATH through the handlers of a routing snapshot, using the fake telegram client.",
+        epilog = "Example: python -m bench.replay capture.jsonl.gz --speed 10 --output out.jsonl.gz --expected previous.jsonl.gz"
+    )
+    parser.add_argument("capture", type=str, help="Compressed JSONL capture.")
+    parser.add_argument("--snapshot", type=str, default=None, help="Routing snapshot with the channels, connections and filters. Defaults to SNAPSHOT_PATH.")
+    parser.add_argument("--speed", type=float, default=0, help="1 keeps the recorded pace, 10 is ten times faster and 0 is as fast as possible.")
+    parser.add_argument("--output", type=str, default=None, help="Compressed JSONL file to write the sent messages to.")
+    parser.add_argument("--expected", type=str, default=None, help="Output of a previous replay to compare with, exits with 1 if different.")
+    return parser
+
+
+def read_outputs(path: str) -> list[dict[str, Any]]:
+    with gzip_open(path, "rt", encoding="utf-8") as f:
+        return [loads(line) for line in f]
+
+
+def compare_outputs(outputs: list[dict[str, Any]], expected: list[dict[str, Any]]) -> list[str]:
+    """Compares the sent messages with the ones of a previous replay, in order.
+
+    Args:
+        outputs (list[dict[str, Any]]): sent messages of this replay.
+        expected (list[dict[str, Any]]): sent messages of the previous replay.
+
+    Returns:
+        list[str]: description of each difference.
+    """
+
+    differences: list[str] = [
+        f"message {index}: expected {dumps(old, ensure_ascii=False)[:200]}, got {dumps(new, ensure_ascii=False)[:200]}"
+        for index, (new, old) in enumerate(zip(outputs, expected))
+        if new != old
+    ]
+    if len(outputs) != len(expected):
+        differences.append(f"expected {len(expected)} messages, got {len(outputs)}")
+    return differences
+
+
+def main(args: Any) -> int:
+    snapshot: RoutingSnapshot | None | Exception = load_snapshot(args.snapshot)
+    if snapshot is None: raise FileNotFoundError("No routing snapshot, run the bot once or pass --snapshot.")
+    if isinstance(snapshot, Exception): raise snapshot
+    urls: dict[str, str] = {channel.id: channel.url for channel in snapshot.channels}
+
+    loop = new_event_loop()
+    set_event_loop(loop)
+    client = FakeTelegramClient("replay", 0, "", loop, FakeSettings())
+    res = apply_snapshot(snapshot, client)
+    if isinstance(res, Exception): raise res
+
+    async def replay() -> tuple[int, int]:
+        injected, skipped = 0, 0
+        first_date: float | None = None
+        start: float = perf_counter()
+        for record in read_capture(args.capture):
+            url: str | None = urls.get(record.input_id)
+            if url is None:
+                skipped += 1
+                continue
+            # keep the recorded gaps between messages, divided by the speed
+            first_date = first_date if first_date is not None else record.date
+            if args.speed > 0:
+                delay: float = start + (record.date - first_date) / args.speed - perf_counter()
+                if delay > 0: await sleep(delay)
+            await client.inject(url, record.text)
+            injected += 1
+        return injected, skipped
+
+    start: float = perf_counter()
+    injected, skipped = loop.run_until_complete(replay())
+    elapsed: float = perf_counter() - start
+
+    outputs: list[dict[str, Any]] = [{"output": str(entity), "text": str(text)} for entity, text in client.sent]
+    digest: str = sha256("".join([dumps(output, ensure_ascii=False) + "\n" for output in outputs]).encode("utf-8")).hexdigest()
+    print(
+        f"{injected} messages replayed ({skipped} from unknown channels skipped), {len(outputs)} sent in {elapsed:.2f} s "
+        f"({injected / elapsed if elapsed > 0 else 0:.0f} msg/s). Output sha256: {digest}"
+    )
+
+    if args.output is not None:
+        with gzip_open(args.output, "wt", encoding="utf-8") as f:
+            f.write("".join([dumps(output, ensure_ascii=False) + "\n" for output in outputs]))
+
+    if args.expected is None: return 0
+    differences: list[str] = compare_outputs(outputs, read_outputs(args.expected))
+    if len(differences) == 0:
+        print("Output identical to the expected one.")
+        return 0
+    print(f"{len(differences)} differences with the expected output:\n" + "\n".join(differences[:20]))
+    return 1
+
+
+if __name__ == "__main__":
+    parser = configure_parser()
+    args = parser.parse_args()
+    exit(main(args))
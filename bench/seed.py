@@ -0,0 +1,163 @@
+from random import Random
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from db.init_db import init_db
+from db.schema import Base, Channel, Filter, input_output
+
+from classes.sqlalchemy_protocols import EngineProtocol, SessionProtocol
+
+# text used to build synthetic messages
+WORDS: list[str] = "the of channel new offer today price update free join now limited deal read more best".split()
+EMOJIS: list[str] = ["\U0001F525", "\U0001F680", "✅", "\U0001F4B0", "\U0001F449", "⭐"]
+# message size name -> (min words, max words)
+SIZES: dict[str, tuple[int, int]] = {"short": (5, 30), "long": (300, 700), "mixed": (5, 700)}
+
+
+def create_bench_db(path: str | None = None) -> tuple[EngineProtocol, SessionProtocol] | Exception:
+    """Creates a SQLite database with every table.
+
+    Args:
+        path (str | None, optional): database file. Defaults to an in memory database.
+
+    Returns:
+        tuple[EngineProtocol, SessionProtocol] | Exception: engine and session or exception if any.
+    """
+
+    db: tuple[EngineProtocol, SessionProtocol] | Exception = init_db(f"sqlite:///{path}" if path is not None else "sqlite://")
+    if isinstance(db, Exception): return db
+
+    engine, _ = db
+    try:
+        Base.metadata.create_all(engine)  # type: ignore
+    except SQLAlchemyError as e:
+        return e
+    return db
+
+
+def get_url(index: int) -> str:
+    return f"https://t.me/bench_channel_{index}"
+
+
+def seed_channels(session: SessionProtocol, count: int) -> list[str]:
+    """Adds channels with predictable ids, names and urls.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+        count (int): number of channels.
+
+    Returns:
+        list[str]: ids of the channels, the index is the one used in the url.
+    """
+
+    ids: list[str] = [f"channel-{index}" for index in range(count)]
+    session.execute(Channel.__table__.insert(), [  # type: ignore
+        {"id": id_, "name": f"bench_channel_{index}", "url": get_url(index)}
+        for index, id_ in enumerate(ids)
+    ])
+    session.commit()
+    return ids
+
+
+def seed_connections(session: SessionProtocol, edges: list[tuple[str, str]]) -> None:
+    if len(edges) > 0:
+        session.execute(input_output.insert(), [{"input_id": input_id, "output_id": output_id} for input_id, output_id in edges])
+    session.commit()
+
+
+def get_chain_edges(ids: list[str]) -> list[tuple[str, str]]:
+    # each channel forwards to the next one
+    return [(input_id, output_id) for input_id, output_id in zip(ids, ids[1:])]
+
+
+def get_dag_edges(random: Random, ids: list[str], count: int) -> list[tuple[str, str]]:
+    """Generates distinct random edges that only go from a channel to a later one, so there is no loop.
+
+    Args:
+        random (Random): seeded random instance, for reproducible graphs.
+        ids (list[str]): channel ids, in topological order.
+        count (int): number of edges, capped by the number of possible ones.
+
+    Returns:
+        list[tuple[str, str]]: input and output ids.
+    """
+
+    count = min(count, len(ids) * (len(ids) - 1) // 2)
+    edges: set[tuple[int, int]] = set()
+    while len(edges) < count:
+        input_index, output_index = sorted(random.sample(range(len(ids)), 2))
+        edges.add((input_index, output_index))
+    return [(ids[input_index], ids[output_index]) for input_index, output_index in sorted(edges)]
+
+
+def seed_fan_out(session: SessionProtocol, inputs: int, fan_out: int) -> list[str]:
+    """Adds inputs that all forward to the same fan_out outputs.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+        inputs (int): number of input channels.
+        fan_out (int): number of outputs of each input.
+
+    Returns:
+        list[str]: urls of the input channels.
+    """
+
+    ids: list[str] = seed_channels(session, inputs + fan_out)
+    seed_connections(session, [(input_id, output_id) for input_id in ids[:inputs] for output_id in ids[inputs:]])
+    return [get_url(index) for index in range(inputs)]
+
+
+def get_domains(count: int) -> list[str]:
+    return [f"domain{index}.com" for index in range(count)]
+
+
+def seed_filters(session: SessionProtocol, per_mode: int) -> None:
+    """Adds the same number of blacklist, replacement and link remover filters.
+
+    The blacklist words are never in the generated messages, so every message still goes through the other filters.
+
+    Args:
+        session (SessionProtocol): sqlalchemy session instance.
+        per_mode (int): filters of each mode.
+    """
+
+    rows: list[dict[str, str | None]] = []
+    for index in range(per_mode):
+        rows.append({"id": f"blacklist-{index}", "condition": f"forbidden{index}", "replacement": None, "mode": "blacklist"})
+        # the first replacements match generated words, the rest never do
+        condition: str = WORDS[index] if index < len(WORDS) else f"{WORDS[index % len(WORDS)]}{index}"
+        rows.append({"id": f"replacement-{index}", "condition": condition, "replacement": f"word{index}", "mode": "replacement"})
+    rows += [
+        {"id": f"link_remover-{index}", "condition": domain, "replacement": None, "mode": "link_remover"}
+        for index, domain in enumerate(get_domains(per_mode))
+    ]
+    if len(rows) > 0:
+        session.execute(Filter.__table__.insert(), rows)  # type: ignore
+    session.commit()
+
+
+def generate_text(random: Random, size: str, domains: list[str]) -> str:
+    """Generates a message with words, emojis, line breaks and links, some of them to the given domains.
+
+    Args:
+        random (Random): seeded random instance, for reproducible corpora.
+        size (str): short, long or mixed.
+        domains (list[str]): link remover domains.
+
+    Returns:
+        str: message text.
+    """
+
+    low, high = SIZES[size]
+    tokens: list[str] = []
+    for index in range(random.randint(low, high)):
+        roll: float = random.random()
+        if roll < 0.04:
+            domain: str = random.choice(domains) if len(domains) > 0 and random.random() < 0.5 else "example.org"
+            tokens.append(f"https://{domain}/post/{random.randint(1, 10 ** 6)}")
+        elif roll < 0.1:
+            tokens.append(random.choice(EMOJIS))
+        else:
+            tokens.append(random.choice(WORDS))
+        if index % 25 == 24: tokens.append(random.choice([".\n", "!\n", "\n\n"]))
+    return " ".join(tokens)
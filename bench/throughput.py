@@ -0,0 +1,147 @@
+from argparse import ArgumentParser
+
+from asyncio import new_event_loop, set_event_loop
+
+from concurrent.futures import ProcessPoolExecutor
+
+from itertools import product
+
+from multiprocessing import get_context
+
+from os import environ
+
+from random import Random
+
+from resource import RUSAGE_SELF, getrusage
+
+from tempfile import mkdtemp
+
+from time import perf_counter
+
+from typing import Any
+
+from app.metrics.metrics import percentile
+from app.utils.fake_client import FakeSettings, FakeTelegramClient
+from app.utils.remanage_connections import remanage_connections
+
+from bench.compare import Limit, report_results
+from bench.seed import create_bench_db, generate_text, get_domains, seed_fan_out, seed_filters
+
+DEFAULT_TOLERANCE: float = 0.1
+WARM_UP_MESSAGES: int = 100
+CORPUS_SIZE: int = 200
+LIMITS: list[Limit] = [Limit("messages_per_second", "msg/s", higher_is_better=True), Limit("p99_ms", "ms", label="p99")]
+
+
+def configure_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog = "throughput",
+        description = "Measures the forwarding throughput with the fake telegram client and a SQLite database.",
+        epilog = "Example: python -m bench.throughput --inputs 1,10 --fan-out 1,5 --filters 0,50 --sizes short,long"
+    )
+    parser.add_argument("--inputs", type=str, default="1,10", help="Comma separated numbers of input channels.")
+    parser.add_argument("--fan-out", type=str, default="1,5", help="Comma separated numbers of outputs per input.")
+    parser.add_argument("--filters", type=str, default="0,10,100", help="Comma separated numbers of filters per mode.")
+    parser.add_argument("--sizes", type=str, default="short,mixed", help="Comma separated message sizes: short, long or mixed.")
+    parser.add_argument("--messages", type=int, default=2000, help="Messages injected per case.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated messages.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each case, the fastest is kept to reduce noise.")
+    parser.add_argument("--output", type=str, default=None, help="File to write the JSON results to.")
+    parser.add_argument("--baseline", type=str, default=None, help="JSON results to compare with, exits with 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown against the baseline.")
+    return parser
+
+
+def get_case_key(case: dict[str, Any]) -> str:
+    return f"inputs={case['inputs']} fan_out={case['fan_out']} filters={case['filters']} size={case['size']}"
+
+
+def run_case(case: dict[str, Any]) -> dict[str, Any]:
+    """Seeds a new database, builds the handlers with remanage_connections and injects the messages of one case.
+
+    Runs in its own process, so module caches and peak RSS belong to the case.
+
+    Args:
+        case (dict[str, Any]): inputs, fan_out, filters, size, messages and seed.
+
+    Returns:
+        dict[str, Any]: case and its results.
+    """
+
+    # keep the snapshot written by remanage_connections out of the working tree
+    environ["SNAPSHOT_PATH"] = f"{mkdtemp()}/routing.json"
+
+    loop = new_event_loop()
+    set_event_loop(loop)
+
+    db = create_bench_db()
+    if isinstance(db, Exception): raise db
+    _, session = db
+    inputs: list[str] = seed_fan_out(session, case["inputs"], case["fan_out"])
+    seed_filters(session, case["filters"])
+
+    client = FakeTelegramClient("bench", 0, "", loop, FakeSettings(keep_sent=False))
+    res = remanage_connections(session, client)
+    if isinstance(res, Exception): raise res
+
+    random = Random(case["seed"])
+    corpus: list[str] = [generate_text(random, case["size"], get_domains(case["filters"])) for _ in range(CORPUS_SIZE)]
+
+    async def inject(count: int) -> list[float]:
+        latencies: list[float] = []
+        for index in range(count):
+            start: float = perf_counter()
+            await client.inject(inputs[index % len(inputs)], corpus[index % len(corpus)])
+            latencies.append(perf_counter() - start)
+        return latencies
+
+    loop.run_until_complete(inject(WARM_UP_MESSAGES))
+    sent_before: int = client.sent_count
+    start: float = perf_counter()
+    latencies: list[float] = loop.run_until_complete(inject(case["messages"]))
+    elapsed: float = perf_counter() - start
+    latencies.sort()
+
+    return {
+        "case": case,
+        "messages_per_second": round(case["messages"] / elapsed, 1),
+        "sends_per_second": round((client.sent_count - sent_before) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        # kilobytes on linux
+        "peak_rss_kib": getrusage(RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def main(args: Any) -> int:
+    cases: list[dict[str, Any]] = [
+        {"inputs": inputs, "fan_out": fan_out, "filters": filters, "size": size, "messages": args.messages, "seed": args.seed}
+        for inputs, fan_out, filters, size in product(
+            [int(value) for value in args.inputs.split(",")],
+            [int(value) for value in args.fan_out.split(",")],
+            [int(value) for value in args.filters.split(",")],
+            args.sizes.split(","),
+        )
+    ]
+
+    results: list[dict[str, Any]] = []
+    for case in cases:
+        runs: list[dict[str, Any]] = []
+        for _ in range(args.repeat):
+            # a new process per run, so peak RSS and caches are not shared between runs
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                runs.append(executor.submit(run_case, case).result())
+        result: dict[str, Any] = max(runs, key=lambda run: run["messages_per_second"])
+        results.append(result)
+        print(
+            f"{get_case_key(case)}: {result['messages_per_second']} msg/s, "
+            f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, peak RSS {result['peak_rss_kib']} KiB"
+        )
+
+    return report_results(results, args, lambda result: get_case_key(result["case"]), LIMITS)
+
+
+if __name__ == "__main__":
+    parser = configure_parser()
+    args = parser.parse_args()
+    exit(main(args))
@@ -156,4 +156,83 @@ class LogException(FatalException):
             "type": __class__.__name__, 
             "message": self.message, 
             "exc": self.exc
-        })
\ No newline at end of file
+        })
+
+# snapshot exceptions
+class SnapshotException(FatalException):
+    def __init__(
+        self: "SnapshotException", 
+        exc: Exception, 
+        message: str = "Could not read or write the routing snapshot.", 
+        path: str | None = None
+    ):
+        super().__init__(exc, message)
+        self.path = path
+        
+    def __repr__(self: "SnapshotException") -> str:
+        return str({
+            "type": __class__.__name__, 
+            "message": self.message, 
+            "path": self.path, 
+            "exc": str(self.exc)
+        })
+
+# capture exceptions
+class CaptureException(FatalException):
+    def __init__(
+        self: "CaptureException", 
+        exc: Exception, 
+        message: str = "Could not write the message capture.", 
+        path: str | None = None
+    ):
+        super().__init__(exc, message)
+        self.path = path
+        
+    def __repr__(self: "CaptureException") -> str:
+        return str({
+            "type": __class__.__name__, 
+            "message": self.message, 
+            "path": self.path, 
+            "exc": str(self.exc)
+        })
+
+# metrics exceptions
+class MetricsServerException(FatalException):
+    def __init__(
+        self: "MetricsServerException", 
+        exc: Exception, 
+        message: str = "Could not start the metrics server.", 
+        address: str | None = None
+    ):
+        super().__init__(exc, message)
+        self.address = address
+        
+    def __repr__(self: "MetricsServerException") -> str:
+        return str({
+            "type": __class__.__name__, 
+            "message": self.message, 
+            "address": self.address, 
+            "exc": str(self.exc)
+        })
+
+# event loop exceptions
+class LoopStallException(FatalException):
+    def __init__(
+        self: "LoopStallException", 
+        exc: Exception, 
+        message: str = "The event loop was blocked for too long, messages are being delayed.", 
+        stalled_seconds: float | None = None, 
+        stalls: int | None = None
+    ):
+        super().__init__(exc, message)
+        self.stalled_seconds = stalled_seconds
+        self.stalls = stalls
+        
+    def __repr__(self: "LoopStallException") -> str:
+        return str({
+            "type": __class__.__name__, 
+            "message": self.message, 
+            "stalled_seconds": self.stalled_seconds, 
+            "stalls": self.stalls, 
+            "exc": str(self.exc)
+        })
@@ -1,4 +1,4 @@
-from typing import Protocol, Any
+from typing import Iterator, Protocol, Any
 
 
 class EngineProtocol(Protocol):
@@ -18,6 +18,27 @@ class QueryProtocol(Protocol):
         
     def all(self: "QueryProtocol") -> list[Any]:
         ...
+    
+    def order_by(self: "QueryProtocol", *clauses: Any) -> "QueryProtocol":
+        ...
+    
+    def offset(self: "QueryProtocol", offset: int) -> "QueryProtocol":
+        ...
+    
+    def limit(self: "QueryProtocol", limit: int) -> "QueryProtocol":
+        ...
+    
+    def options(self: "QueryProtocol", *args: Any) -> "QueryProtocol":
+        ...
+    
+    def execution_options(self: "QueryProtocol", **kwargs: Any) -> "QueryProtocol":
+        ...
+    
+    def yield_per(self: "QueryProtocol", count: int) -> "QueryProtocol":
+        ...
+    
+    def __iter__(self: "QueryProtocol") -> Iterator[Any]:
+        ...
 
 
 class SessionProtocol(Protocol):
@@ -36,6 +57,18 @@ class SessionProtocol(Protocol):
     def add(self: "SessionProtocol", instance: Any):
         ...
         
+    def add_all(self: "SessionProtocol", instances: Any):
+        ...
+        
     def delete(self: "SessionProtocol", instance: Any):
         ... 
+        
+    def execute(self: "SessionProtocol", statement: Any, params: Any = None) -> Any:
+        ...
+        
+    def expire_all(self: "SessionProtocol"):
+        ...
+        
+    def close(self: "SessionProtocol"):
+        ...
         
\ No newline at end of file
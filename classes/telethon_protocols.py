@@ -5,7 +5,12 @@ from datetime import datetime
 @runtime_checkable
 class MessageProtocol(Protocol):
     def __init__(self: "MessageProtocol", id: int, peer_id: Any, date: datetime, message: str) -> None:
+        self.id: int
         self.message: str
+        self.date: datetime
+        ...
+    
+    async def download_media(self: "MessageProtocol", file: Any = None) -> Any:
         ...
 
 
@@ -63,4 +68,16 @@ class TelegramClientProtocol(Protocol):
         
     async def send_file(self: "TelegramClientProtocol", entity: Any, file: Any) -> MessageProtocol:
         ...
+        
+    async def get_peer_id(self: "TelegramClientProtocol", peer: Any) -> int:
+        ...
+    
+    async def get_dialogs(self: "TelegramClientProtocol") -> Sequence[Any]:
+        ...
+    
+    async def get_messages(self: "TelegramClientProtocol", entity: Any, min_id: int = 0, max_id: int = 0, limit: int | None = None) -> Sequence[MessageProtocol]:
+        ...
+    
+    def disconnect(self: "TelegramClientProtocol") -> Coroutine[Any, Any, None] | None:
+        ...
         
\ No newline at end of file
@@ -86,7 +86,27 @@ class AuthorizationException(ValidationException):
             "login": self.login, 
             "password": self.password
         })
-    
+
+
+class TooManyAttemptsException(ValidationException):
+    def __init__(
+        self: "TooManyAttemptsException", 
+        message: str = "Too many authorization attempts. Try again later.", 
+        chat_id: int | None = None, 
+        retry_after: float | None = None
+    ):
+        super().__init__(message)
+        self.chat_id = chat_id
+        self.retry_after = retry_after
+
+    def __repr__(self: "TooManyAttemptsException") -> str:
+        return str({
+            "type": __class__.__name__, 
+            "message": self.message, 
+            "chat_id": self.chat_id, 
+            "retry_after": self.retry_after
+        })
+
 
 # command parsing exceptions
 class InvalidCommandException(ValidationException):
@@ -106,6 +126,23 @@ class InvalidCommandException(ValidationException):
         })
 
 
+
+class InvalidDocumentException(ValidationException):
+    def __init__(
+        self: "InvalidDocumentException", 
+        message: str = "Mal-formed document.", 
+        line: int | None = None
+    ):
+        super().__init__(message)
+        self.line = line
+
+    def __repr__(self: "InvalidDocumentException") -> str:
+        return str({
+            "type": __class__.__name__, 
+            "message": self.message, 
+            "line": self.line
+        })
+
 # channel validation exceptions
 class ChannelAlreadyExistsException(ValidationException):
     def __init__(
@@ -361,3 +398,21 @@ class ConnectionsNotSyncronizedException(ValidationException):
             "input_id": self.input_id, 
             "output_id": self.output_id
         })
+
+
+# diagnostics exceptions
+class DiagnosticsRunningException(ValidationException):
+    def __init__(
+        self: "DiagnosticsRunningException", 
+        message: str = "Another diagnostics session is already running, wait for it to finish.", 
+        command: str | None = None
+    ):
+        super().__init__(message)
+        self.command = command
+
+    def __repr__(self: "DiagnosticsRunningException") -> str:
+        return str({
+            "type": __class__.__name__, 
+            "message": self.message, 
+            "command": self.command
+        })
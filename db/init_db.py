@@ -21,3 +21,27 @@ def init_db(connection_str: str) -> tuple[EngineProtocol, SessionProtocol] | Exc
         return ConnectionException(connection_str=connection_str, exc=e)
     
     return engine, session
+
+
+def create_session(engine: EngineProtocol) -> SessionProtocol:
+
+    """ Create a new session bound to an existing engine, for work done outside the main session.
+    :param engine: sqlalchemy engine object.
+    :return: session sqlalchemy object.
+    """
+    
+    return sessionmaker()(bind=engine)
+
+
+def warm_up_db(engine: EngineProtocol) -> None | Exception:
+
+    """ Open and return a connection to the pool, so the first query does not pay for the handshake.
+    :param engine: sqlalchemy engine object.
+    :return: None or exception if the database could not be reached.
+    """
+    
+    try:
+        with engine.connect():  # type: ignore
+            pass
+    except SQLAlchemyError as e:
+        return ConnectionException(exc=e)
@@ -70,4 +70,30 @@ class Filter(Base):
     id = Column(String(), primary_key=True)
     condition = Column(String(), nullable=False, unique=True)
     replacement = Column(String(), nullable=True)
-    mode = Column(String(), nullable=False)
\ No newline at end of file
+    mode = Column(String(), nullable=False)
+
+
+class ConfigVersion(Base):
+    __tablename__ = "ConfigVersion"
+
+    # single row, incremented with every channel, connection or filter change
+    id = Column(Integer(), primary_key=True)
+    version = Column(BigInteger(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"ConfigVersion(version={self.version})"
+
+
+class LeaderLease(Base):
+    __tablename__ = "LeaderLease"
+
+    # lengths are required for VARCHAR keys and columns on MySQL
+    name = Column(String(255), primary_key=True)
+    # instance holding the lease, hostname-pid-suffix
+    holder = Column(String(255), nullable=False)
+    # incremented every time the lease changes hands, a deposed holder can no longer renew it
+    token = Column(BigInteger(), nullable=False)
+    expires_at = Column(DateTime(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"LeaderLease(name={self.name}, holder={self.holder}, token={self.token}, expires_at={self.expires_at})"
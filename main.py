@@ -7,25 +7,43 @@ from telethon.sync import events
 
 from asyncio import new_event_loop, set_event_loop, AbstractEventLoop
 
+from signal import SIGINT, SIGTERM
+
 from typing import TypeAlias, Callable, Coroutine, Any
 
 from functools import partial
 
-from db.init_db import init_db
+from db.init_db import init_db, warm_up_db
 
 from classes.telethon_protocols import EventProtocol, TelegramClientProtocol
 from classes.sqlalchemy_protocols import EngineProtocol, SessionProtocol
 from classes.validation_exceptions import InvalidEnvironmentException
 
 from app.utils.create_client import create_client
+from app.utils.sharded_client import ShardedClient, create_sharded_client, get_extra_phones
 from app.utils.get_client_data import get_client_data
-from app.utils.remanage_connections import remanage_connections
+from app.utils.remanage_connections import apply_snapshot, refresh_snapshot, remanage_connections
+from app.utils.routing_snapshot import RoutingSnapshot, load_snapshot
+from app.utils.warm_start import reconcile_snapshot, resolve_peers
 from app.utils.handle_response import handle_response
+from app.utils.handle_log import flush_logs, run_log_flusher
+from app.utils.capture import close_capture, run_capture_flusher
+from app.utils.config_version import run_config_watcher
+from app.utils.leader_lease import LeaseState, close_leader_lease, enter_standby, get_lease_name, prepare_standby, run_leader_lease
+from app.utils.filter_pool import close_filter_pool, configure_filter_pool
+from app.utils.shutdown import replay_checkpoints, run_checkpoint_saver, shutdown
 from app.utils.env import get_env_var, load_env
+from app.utils.lazy_route import lazy_route
+from app.cmd.command_registry import register_commands
+from app.utils.startup_profile import StartupProfile
+from app.metrics.tracing import close_tracing, configure_tracing, run_trace_flusher, trace_span, traced
+from app.metrics.loop_watchdog import run_loop_watchdog
+from app.metrics.metrics_server import register_runtime_gauges, start_metrics_server
 
 from app.routes.utility_routes.auth import auth as auth_route
 from app.routes.utility_routes.help_ import help_ as help_route
 from app.routes.utility_routes.sync import sync as sync_route
+from app.routes.utility_routes.stats import stats as stats_route
 
 from app.routes.channel_routes.add_channel import add_channel as add_channel_route
 from app.routes.channel_routes.remove_channel import (
@@ -53,6 +71,15 @@ handler_type: TypeAlias = Callable[[EventProtocol], Coroutine[Any, Any, None]]
 response_handler_type: TypeAlias = Callable[
     [str | Exception], Coroutine[Any, Any, None]
 ]
+send_file_type: TypeAlias = Callable[[str], Coroutine[Any, Any, Any]]
+
+# rarely used admin routes, only imported the first time they are called
+logs_route = lazy_route("app.routes.utility_routes.logs", "logs")
+profile_route = lazy_route("app.routes.utility_routes.profile", "profile")
+memory_route = lazy_route("app.routes.utility_routes.memory", "memory")
+import_channels_route = lazy_route("app.routes.channel_routes.import_channels", "import_channels")
+import_filters_route = lazy_route("app.routes.filter_routes.import_filters", "import_filters")
+export_filters_route = lazy_route("app.routes.filter_routes.export_filters", "export_filters")
 
 
 def configure_parser() -> ArgumentParser:
@@ -62,78 +89,165 @@ def configure_parser() -> ArgumentParser:
         epilog="",
     )
     parser.add_argument("env", type=str, help="Environment to load. [dev or prod]")
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Print how long each startup phase took.",
+    )
     return parser
 
 
 # route function names starting with connection_handler are restricted to only be used as a connection between two telegram channels
 
 
-def main(env: str) -> None | Exception:
+def main(env: str, startup_profile: bool = False) -> None | Exception:
     """Main function of the client.
 
     Args:
         env (str): environment to load [dev or prod].
+        startup_profile (bool, optional): print the time of each startup phase. Defaults to False.
 
     Returns:
         None | Exception: None if everything went well or exception if any.
     """
 
+    profile = StartupProfile(enabled=startup_profile)
+
     # start loop
     loop: AbstractEventLoop = new_event_loop()
     set_event_loop(loop)
 
-    load_env(env)
+    with profile.phase("load env"):
+        load_env(env)
+    configure_tracing()
+    configure_filter_pool()
 
     # start database
     database_url: str | Exception = get_env_var("DATABASE_URL")
     if isinstance(database_url, Exception):
         return database_url
 
-    db: tuple[EngineProtocol, SessionProtocol] | Exception = init_db(database_url)
+    with profile.phase("init db"):
+        db: tuple[EngineProtocol, SessionProtocol] | Exception = init_db(database_url)
     if isinstance(db, Exception):
         return db
-    session: SessionProtocol = db[1]
+    engine, session = db
 
-    print("Database connected!")
+    # with LEADER_LEASE set, only the instance holding the lease forwards and answers commands,
+    # so forwarding is disabled before the first connection handler is registered
+    lease_name: str | None = get_lease_name()
+    if lease_name is not None:
+        prepare_standby()
+
+    # connect to the database in a worker thread while telegram logs in
+    db_warm_up = loop.run_in_executor(None, warm_up_db, engine)
 
     # start client
-    client_data = get_client_data(env)
+    client_data = get_client_data()
     if isinstance(client_data, Exception):
         return client_data
     client: TelegramClientProtocol = create_client(
         "session", client_data.api_id, client_data.api_hash, loop
     )
-    client.start(lambda: client_data.phone)
+    # spread the input channels over the accounts of EXTRA_PHONES when there are any
+    extra_phones: list[str] = get_extra_phones()
+    if len(extra_phones) > 0:
+        client = create_sharded_client(client, client_data, extra_phones, loop)
+    with profile.phase("telegram login"):
+        client.start(lambda: client_data.phone)
 
     print("Client started!")
 
-    # manage initial connections
-    res: str | Exception = remanage_connections(session, client)
-    if isinstance(res, Exception):
-        return res
+    # manage initial connections from the snapshot on disk when there is one, so forwarding does not wait for the database
+    with profile.phase("load snapshot"):
+        snapshot: RoutingSnapshot | None | Exception = load_snapshot()
+    if isinstance(snapshot, RoutingSnapshot):
+        with profile.phase("register handlers"):
+            res: str | Exception = apply_snapshot(snapshot, client)
+        if isinstance(res, Exception):
+            return res
+        loop.create_task(reconcile_snapshot(engine, client, snapshot))
+
+        print(f"Initial connections loaded from snapshot version {snapshot.version}!")
+    else:
+        if isinstance(snapshot, Exception):
+            print(f"Ignoring snapshot: {repr(snapshot)}")
+
+        # without a snapshot forwarding needs the database
+        with profile.phase("wait db connection"):
+            warm_up_res: None | Exception = loop.run_until_complete(db_warm_up)
+        if isinstance(warm_up_res, Exception):
+            return warm_up_res
+
+        print("Database connected!")
+
+        with profile.phase("register handlers"):
+            res: str | Exception = remanage_connections(session, client)
+        if isinstance(res, Exception):
+            return res
+        loop.create_task(resolve_peers(client))
+
+        print("Initial connections managed!")
+
+    profile.report("first forward ready")
+
+    # move the connection handlers to the accounts that are members of each input
+    if isinstance(client, ShardedClient):
+        loop.create_task(client.run_rebalancer())
+
+    # create the version row bumped by the configuration routes, then apply the changes made by other instances sharing the database
+    loop.create_task(run_config_watcher(engine, client))
 
-    print("Initial connections managed!")
+    # persist logged errors in batches in the background
+    loop.create_task(run_log_flusher(engine))
+    # write recorded messages to the capture file when CAPTURE_PATH is set
+    loop.create_task(run_capture_flusher())
+    # write the spans of sampled traces when TRACE_SAMPLE_RATE is set
+    loop.create_task(run_trace_flusher())
+
+    # expose metrics locally when METRICS_PORT is set
+    register_runtime_gauges(client, engine)
+    metrics_server = loop.run_until_complete(start_metrics_server())
+    if isinstance(metrics_server, Exception):
+        return metrics_server
 
     response_handler: response_handler_type = partial(
         handle_response, client=client, url=client_data.url
     )
+    send_file: send_file_type = lambda file: client.send_file(client_data.url, file)
+
+    # measure loop lag and alert the chat when sync work blocks forwarding
+    loop.create_task(run_loop_watchdog(response_handler))
+
+    def on_config_change(res: str | Exception) -> str | Exception:
+        # reload filters and write a new snapshot after a route changes the configuration
+        if isinstance(res, Exception):
+            return res
+        with trace_span("refresh_snapshot"):
+            snapshot_res: RoutingSnapshot | Exception = refresh_snapshot(session)
+        if isinstance(snapshot_res, Exception):
+            return snapshot_res
+        return res
 
     # utility routes
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/help"))
+    @traced
     async def help_(event: EventProtocol) -> None:
-        """Utility:\n\n/help"""
-        message: str = help_route(main)
+        """Utility:\n\n/help\n\nShows a list with all commands, or the details of one command with /help <command>."""
+        message: str = help_route(event.message.message)
         await client.send_message(client_data.url, message)
 
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/auth"))
+    @traced
     async def auth(event: EventProtocol) -> None:
-        """/auth --login=<admin_username> --password=<admin_password>"""
-        res: str | Exception = auth_route(event.message.message, event.chat_id, session)
+        """/auth --login=<admin_username> --password=<admin_password>\n\nAuthorizes this chat to run every command other than /help."""
+        res: str | Exception = await auth_route(event.message.message, event.chat_id, session)
         await response_handler(res)
 
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/sync"))
+    @traced
     async def sync(event: EventProtocol) -> None:
-        """/sync"""
+        """/sync\n\nSyncronizes the telegram connections with the database."""
         res1: str | Exception = sync_route(event.chat_id, session)
         # if routing succeeds remanage connections
         if isinstance(res1, str):
@@ -150,18 +264,62 @@ def main(env: str) -> None | Exception:
 
         await response_handler(res)
 
+    @client.on(events.NewMessage(chats=[client_data.url], pattern="^/logs"))
+    @traced
+    async def logs(event: EventProtocol) -> None:
+        """/logs --limit=<number_of_entries>\n\nSends a file with the most recent errors. The limit is optional."""
+        res: str | Exception = await logs_route(
+            event.message.message,
+            event.chat_id,
+            session,
+            send_file,
+        )
+        await response_handler(res)
+
+    @client.on(events.NewMessage(chats=[client_data.url], pattern="^/stats"))
+    @traced
+    async def stats(event: EventProtocol) -> None:
+        """/stats\n\nShows the messages received, blocked, modified and forwarded by each connection and the p50 and p99 delay over the last 1m, 15m and 1h."""
+        res: str | Exception = stats_route(event.chat_id, session)
+        await response_handler(res)
+
+    @client.on(events.NewMessage(chats=[client_data.url], pattern="^/profile"))
+    @traced
+    async def profile(event: EventProtocol) -> None:
+        """/profile <seconds>\n\nSamples the bot for some seconds (10 by default, at most 60) and sends the collapsed stacks as a file to open as a flamegraph."""
+        res: str | Exception = await profile_route(
+            event.message.message,
+            event.chat_id,
+            session,
+            send_file,
+        )
+        await response_handler(res)
+
+    @client.on(events.NewMessage(chats=[client_data.url], pattern="^/memory"))
+    @traced
+    async def memory(event: EventProtocol) -> None:
+        """/memory <report_reset_or_stop>\n\nShows the size of every cache and, after the first call starts tracing, the allocation sites that grew the most. The action is optional."""
+        res: str | Exception = await memory_route(
+            event.message.message, event.chat_id, session, client
+        )
+        await response_handler(res)
+
     # channel managing routes
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/add_channel"))
+    @traced
     async def add_channel(event: EventProtocol) -> None:
-        """Managing Channels:\n\n/add_channel --name=<channel_name> --url=<channel_url>"""
-        res: str | Exception = add_channel_route(
-            event.message.message, event.chat_id, session
+        """Managing Channels:\n\n/add_channel --name=<channel_name> --url=<channel_url>\n\nAdds a channel to the database."""
+        res: str | Exception = on_config_change(
+            add_channel_route(
+                event.message.message, event.chat_id, session
+            )
         )
         await response_handler(res)
 
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/remove_channel"))
+    @traced
     async def remove_channel(event: EventProtocol) -> None:
-        """/remove_channel --filter=<channel_name_or_url>"""
+        """/remove_channel --filter=<channel_name_or_url>\n\nRemoves a channel and all its connections."""
         res: str | Exception = remove_channel_route(
             event.message.message, event.chat_id, session
         )
@@ -169,66 +327,104 @@ def main(env: str) -> None | Exception:
         await response_handler(res)
 
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/view_channel"))
+    @traced
     async def view_channel(event: EventProtocol) -> None:
-        """/view_channel --filter=<channel_name_or_url>"""
+        """/view_channel --filter=<channel_name_or_url>\n\nShows a channel with its inputs and outputs."""
         res: str | Exception = view_channel_route(
             event.message.message, event.chat_id, session
         )
         await response_handler(res)
 
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/view_all_channel"))
+    @traced
     async def view_all_channel(event: EventProtocol) -> None:
-        """/view_all_channel"""
-        res: str | Exception = view_all_channels_route(event.chat_id, session)
+        """/view_all_channel --after=<channel_name> --page=<page_number> --file=<true_or_false>\n\nShows all channels, 50 per page. All arguments are optional."""
+        res: str | Exception = await view_all_channels_route(
+            event.message.message, event.chat_id, session, send_file
+        )
         await response_handler(res)
 
     # connection managing routes
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/view_connections"))
+    @traced
     async def view_connections(event: EventProtocol) -> None:
-        """/view_connections"""
-        res: str | Exception = view_connections_route(event.chat_id, session)
+        """/view_connections --after=<channel_name> --page=<page_number> --file=<true_or_false>\n\nShows all channels and their outputs, 50 channels per page. All arguments are optional."""
+        res: str | Exception = await view_connections_route(
+            event.message.message, event.chat_id, session, send_file
+        )
         await response_handler(res)
 
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/connect_channels"))
+    @traced
     async def connect_channels(event: EventProtocol) -> None:
-        """/connect_channels --input=<input_channel_name_or_url> --output=<output_channel_name_or_url>"""
-        res: str | Exception = connect_channels_route(
-            event.message.message, event.chat_id, session, client
+        """/connect_channels --input=<input_channel_name_or_url> --output=<output_channel_name_or_url>\n\nForwards every message of the input channel to the output channel."""
+        res: str | Exception = on_config_change(
+            connect_channels_route(
+                event.message.message, event.chat_id, session, client
+            )
         )
         await response_handler(res)
 
     @client.on(
         events.NewMessage(chats=[client_data.url], pattern="^/disconnect_channels")
     )
+    @traced
     async def disconnect_channels(event: EventProtocol) -> None:
-        """/disconnect_channels --input=<input_channel_name_or_url> --output=<output_channel_name_or_url>"""
-        res: str | Exception = disconnect_channels_route(
-            event.message.message, event.chat_id, session, client
+        """/disconnect_channels --input=<input_channel_name_or_url> --output=<output_channel_name_or_url>\n\nStops forwarding messages of the input channel to the output channel."""
+        res: str | Exception = on_config_change(
+            disconnect_channels_route(
+                event.message.message, event.chat_id, session, client
+            )
         )
         await response_handler(res)
 
+    @client.on(events.NewMessage(chats=[client_data.url], pattern="^/import_channels"))
+    @traced
+    async def import_channels(event: EventProtocol) -> None:
+        """/import_channels\n\nAdds the channels and connections of a json or csv document sent with the command as caption."""
+        res1: str | Exception = await import_channels_route(
+            lambda: event.message.download_media(file=bytes), event.chat_id, session
+        )
+        # rebuild the handlers once for the whole import
+        if isinstance(res1, str):
+            res2: str | Exception = remanage_connections(session, client)
+            res = f"{res1}\n{res2}" if isinstance(res2, str) else res2
+        else:
+            res = res1
+
+        await response_handler(res)
+
     # filter add routes
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/add_to_blacklist"))
+    @traced
     async def add_to_blacklist(event: EventProtocol) -> None:
-        """Managing Filters:\n\n/add_to_blacklist --condition=<condition>"""
-        res: str | Exception = add_filter_route(
-            event.message.message, event.chat_id, session, "blacklist"
+        """Managing Filters:\n\n/add_to_blacklist --condition=<condition>\n\nMessages containing the condition are not forwarded."""
+        res: str | Exception = on_config_change(
+            add_filter_route(
+                event.message.message, event.chat_id, session, "blacklist"
+            )
         )
         await response_handler(res)
 
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/add_replacement"))
+    @traced
     async def add_replacement(event: EventProtocol) -> None:
-        """/add_replacement --condition=<condition> --replacement=<replacement>"""
-        res: str | Exception = add_filter_route(
-            event.message.message, event.chat_id, session, "replacement"
+        """/add_replacement --condition=<condition> --replacement=<replacement>\n\nEvery occurrence of the condition is replaced by the replacement."""
+        res: str | Exception = on_config_change(
+            add_filter_route(
+                event.message.message, event.chat_id, session, "replacement"
+            )
         )
         await response_handler(res)
 
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/add_link_remover"))
+    @traced
     async def add_link_remover(event: EventProtocol) -> None:
-        """/add_link_remover --condition=<condition>"""
-        res: str | Exception = add_filter_route(
-            event.message.message, event.chat_id, session, "link_remover"
+        """/add_link_remover --condition=<condition>\n\nPhrases or lines with links of the condition domain are removed."""
+        res: str | Exception = on_config_change(
+            add_filter_route(
+                event.message.message, event.chat_id, session, "link_remover"
+            )
         )
         await response_handler(res)
 
@@ -236,67 +432,143 @@ def main(env: str) -> None | Exception:
     @client.on(
         events.NewMessage(chats=[client_data.url], pattern="^/remove_from_blacklist")
     )
+    @traced
     async def remove_from_blacklist(event: EventProtocol) -> None:
-        """/remove_from_blacklist --condition=<condition>"""
-        res: str | Exception = remove_filter_route(
-            event.message.message, event.chat_id, session, "blacklist"
+        """/remove_from_blacklist --condition=<condition>\n\nRemoves a condition from the blacklist."""
+        res: str | Exception = on_config_change(
+            remove_filter_route(
+                event.message.message, event.chat_id, session, "blacklist"
+            )
         )
         await response_handler(res)
 
     @client.on(
         events.NewMessage(chats=[client_data.url], pattern="^/remove_replacement")
     )
+    @traced
     async def remove_replacement(event: EventProtocol) -> None:
-        """/remove_replacement --condition=<condition>"""
-        res: str | Exception = remove_filter_route(
-            event.message.message, event.chat_id, session, "replacement"
+        """/remove_replacement --condition=<condition>\n\nRemoves a replacement."""
+        res: str | Exception = on_config_change(
+            remove_filter_route(
+                event.message.message, event.chat_id, session, "replacement"
+            )
         )
         await response_handler(res)
 
     @client.on(
         events.NewMessage(chats=[client_data.url], pattern="^/remove_link_remover")
     )
+    @traced
     async def remove_link_remover(event: EventProtocol) -> None:
-        """/remove_link_remover --condition=<condition>"""
-        res: str | Exception = remove_filter_route(
-            event.message.message, event.chat_id, session, "link_remover"
+        """/remove_link_remover --condition=<condition>\n\nRemoves a link remover."""
+        res: str | Exception = on_config_change(
+            remove_filter_route(
+                event.message.message, event.chat_id, session, "link_remover"
+            )
         )
         await response_handler(res)
 
     # filter view routes
     @client.on(events.NewMessage(chats=[client_data.url], pattern="^/view_blacklist"))
+    @traced
     async def view_blacklist(event: EventProtocol) -> None:
-        """/view_blacklist"""
-        res: str | Exception = view_filters_route(event.chat_id, session, "blacklist")
+        """/view_blacklist --after=<condition> --page=<page_number> --file=<true_or_false>\n\nShows the blacklist, 50 per page. All arguments are optional."""
+        res: str | Exception = await view_filters_route(
+            event.message.message, event.chat_id, session, "blacklist", send_file
+        )
         await response_handler(res)
 
     @client.on(
         events.NewMessage(chats=[client_data.url], pattern="^/view_replacements")
     )
+    @traced
     async def view_replacements(event: EventProtocol) -> None:
-        """/view_replacements"""
-        res: str | Exception = view_filters_route(event.chat_id, session, "replacement")
+        """/view_replacements --after=<condition> --page=<page_number> --file=<true_or_false>\n\nShows the replacements, 50 per page. All arguments are optional."""
+        res: str | Exception = await view_filters_route(
+            event.message.message, event.chat_id, session, "replacement", send_file
+        )
         await response_handler(res)
 
     @client.on(
         events.NewMessage(chats=[client_data.url], pattern="^/view_link_removers")
     )
+    @traced
     async def view_link_removers(event: EventProtocol) -> None:
-        """/view_link_removers"""
-        res: str | Exception = view_filters_route(
-            event.chat_id, session, "link_remover"
+        """/view_link_removers --after=<condition> --page=<page_number> --file=<true_or_false>\n\nShows the link removers, 50 per page. All arguments are optional."""
+        res: str | Exception = await view_filters_route(
+            event.message.message, event.chat_id, session, "link_remover", send_file
         )
         await response_handler(res)
 
+    # filter bulk routes
+    @client.on(events.NewMessage(chats=[client_data.url], pattern="^/import_filters"))
+    @traced
+    async def import_filters(event: EventProtocol) -> None:
+        """/import_filters\n\nAdds the filters of a json or csv document sent with the command as caption."""
+        res: str | Exception = on_config_change(
+            await import_filters_route(
+                lambda: event.message.download_media(file=bytes), event.chat_id, session
+            )
+        )
+        await response_handler(res)
+
+    @client.on(events.NewMessage(chats=[client_data.url], pattern="^/export_filters"))
+    @traced
+    async def export_filters(event: EventProtocol) -> None:
+        """/export_filters\n\nSends a csv document with every filter, in the format read by /import_filters."""
+        res: str | Exception = await export_filters_route(
+            event.chat_id,
+            session,
+            send_file,
+        )
+        await response_handler(res)
+
+    # collect the help of every route once, from the docstrings above
+    register_commands(client.list_event_handlers())
+
+    # connection handlers are only registered while holding the lease, taken in the background
+    if lease_name is not None:
+        lease: LeaseState | Exception = enter_standby(client, lease_name)
+        if isinstance(lease, Exception):
+            return lease
+        loop.create_task(run_leader_lease(engine, client, lease, response_handler))
+
+    # forward the messages received while the bot was stopped, after the last checkpoints
+    loop.create_task(replay_checkpoints(client))
+    # save the checkpoints every few seconds too, so the messages missed after a crash are replayed
+    loop.create_task(run_checkpoint_saver())
+
+    # drain the deliveries in progress instead of dropping them when the process is stopped
+    for signal in (SIGTERM, SIGINT):
+        loop.add_signal_handler(signal, lambda: loop.create_task(shutdown(client)))
+
     print("Server running!")
     client.run_until_disconnected()
 
+    close_filter_pool()
+
+    # let the standby take over without waiting for the lease to expire
+    lease_res: None | Exception = close_leader_lease(engine, client)
+    if isinstance(lease_res, Exception):
+        return lease_res
+
+    # persist the errors logged since the last flush
+    logs_res: int | Exception = flush_logs(engine)
+    if isinstance(logs_res, Exception):
+        print(f"Could not persist the last logs: {repr(logs_res)}")
+
+    # keep the spans and messages recorded since the last flush
+    close_tracing()
+    capture_res: None | Exception = close_capture()
+    if isinstance(capture_res, Exception):
+        return capture_res
+
 
 if __name__ == "__main__":
     parser = configure_parser()
     args = parser.parse_args()
     if args.env in ["dev", "prod"]:
-        res = main(args.env)
+        res = main(args.env, args.startup_profile)
     else:
         raise InvalidEnvironmentException(env=args.env)
 
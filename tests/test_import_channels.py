@@ -0,0 +1,62 @@
+from app.routes.channel_routes.import_channels import graph_type, parse_csv, validate
+from app.utils.get_loop import get_graph_loop
+
+from classes.validation_exceptions import ChannelAlreadyExistsException, ChannelDoesNotExistException, ChannelLoopException
+from classes.validation_exceptions import ChannelsAlreadyConnectedException, InvalidDocumentException, SameInputAndOutputException
+
+# a -> b in the database
+GRAPH: graph_type = ([("1", "a", "https://t.me/a"), ("2", "b", "https://t.me/b")], [("1", "2")])
+
+
+def test_graph_without_loop() -> None:
+    assert get_graph_loop({"a": {"b", "c"}, "b": {"c"}, "c": set()}) is None
+
+
+def test_graph_with_loop() -> None:
+    assert get_graph_loop({"a": {"b"}, "b": {"c"}, "c": {"a"}}) in [("a", "b", "c", "a"), ("b", "c", "a", "b"), ("c", "a", "b", "c")]
+
+
+def test_graph_with_self_loop() -> None:
+    assert get_graph_loop({"a": {"a"}}) == ("a", "a")
+
+
+def test_graph_with_long_chain() -> None:
+    # deeper than the recursion limit
+    graph: dict[str, set[str]] = {str(i): {str(i + 1)} for i in range(5000)}
+    assert get_graph_loop(graph) is None
+    graph["5000"] = {"0"}
+    assert get_graph_loop(graph) is not None
+
+
+def test_parse_csv() -> None:
+    text: str = "# comment\nchannel,c,https://t.me/c\nconnection,b,c\n"
+    assert parse_csv(text) == ([("c", "https://t.me/c")], [("b", "c")])
+    assert isinstance(parse_csv("channel,c\n"), InvalidDocumentException)
+    assert isinstance(parse_csv("group,c,https://t.me/c\n"), InvalidDocumentException)
+
+
+def test_validate_new_channel_and_connections() -> None:
+    rows = validate(([("c", "https://t.me/c")], [("b", "c"), ("https://t.me/a", "c")]), GRAPH)
+    assert not isinstance(rows, Exception)
+
+    channel_rows, connection_rows = rows
+    assert [(row["name"], row["url"]) for row in channel_rows] == [("c", "https://t.me/c")]
+    assert connection_rows == [{"input_id": "2", "output_id": channel_rows[0]["id"]}, {"input_id": "1", "output_id": channel_rows[0]["id"]}]
+
+
+def test_validate_rejects_existing_channel() -> None:
+    assert isinstance(validate(([("a", "https://t.me/other")], []), GRAPH), ChannelAlreadyExistsException)
+    assert isinstance(validate(([("other", "https://t.me/b")], []), GRAPH), ChannelAlreadyExistsException)
+
+
+def test_validate_rejects_invalid_connections() -> None:
+    assert isinstance(validate(([], [("a", "missing")]), GRAPH), ChannelDoesNotExistException)
+    assert isinstance(validate(([], [("a", "a")]), GRAPH), SameInputAndOutputException)
+    assert isinstance(validate(([], [("a", "b")]), GRAPH), ChannelsAlreadyConnectedException)
+
+
+def test_validate_rejects_loop_through_database() -> None:
+    # b -> a closes the loop with a -> b in the database
+    res = validate(([], [("b", "a")]), GRAPH)
+    assert isinstance(res, ChannelLoopException)
+    assert res.loop in [("b", "a", "b"), ("a", "b", "a")]
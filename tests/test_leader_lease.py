@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from time import sleep
+
+from bench.seed import create_bench_db
+
+from app.utils.leader_lease import hold_lease, release_lease
+
+
+def create_engine(tmp_path: Path):
+    # a file, so every session of hold_lease sees the same database
+    db = create_bench_db(str(tmp_path / "lease.db"))
+    assert not isinstance(db, Exception)
+    return db[0]
+
+
+def test_first_holder_creates_lease(tmp_path: Path) -> None:
+    engine = create_engine(tmp_path)
+    assert hold_lease(engine, "bot", "a", None, 15) == 1
+    # renewal keeps the token
+    assert hold_lease(engine, "bot", "a", 1, 15) == 1
+
+
+def test_lease_is_not_taken_while_held(tmp_path: Path) -> None:
+    engine = create_engine(tmp_path)
+    assert hold_lease(engine, "bot", "a", None, 15) == 1
+    assert hold_lease(engine, "bot", "b", None, 15) is None
+
+
+def test_expired_lease_is_taken_with_new_token(tmp_path: Path) -> None:
+    engine = create_engine(tmp_path)
+    assert hold_lease(engine, "bot", "a", None, 0.1) == 1
+    sleep(0.2)
+    assert hold_lease(engine, "bot", "b", None, 15) == 2
+    # the old holder is fenced out by its stale token
+    assert hold_lease(engine, "bot", "a", 1, 15) is None
+    assert hold_lease(engine, "bot", "b", 2, 15) == 2
+
+
+def test_released_lease_is_taken_at_once(tmp_path: Path) -> None:
+    engine = create_engine(tmp_path)
+    assert hold_lease(engine, "bot", "a", None, 15) == 1
+    assert release_lease(engine, "bot", "a", 1) is None
+    assert hold_lease(engine, "bot", "b", None, 15) == 2
+
+
+def test_release_with_stale_token_keeps_lease(tmp_path: Path) -> None:
+    engine = create_engine(tmp_path)
+    assert hold_lease(engine, "bot", "a", None, 0.1) == 1
+    sleep(0.2)
+    assert hold_lease(engine, "bot", "b", None, 15) == 2
+    assert release_lease(engine, "bot", "a", 1) is None
+    assert hold_lease(engine, "bot", "a", None, 15) is None
@@ -0,0 +1,23 @@
+from app.utils.link_remover import get_indices_of_segments, remove_link
+
+
+def test_segments_without_delimiters() -> None:
+    assert get_indices_of_segments("no delimiters here", []) == [(0, 18)]
+
+
+def test_segments_with_delimiters() -> None:
+    message: str = "first. second"
+    assert get_indices_of_segments(message, [(5, 6)]) == [(0, 6), (6, 13)]
+
+
+def test_remove_link_without_delimiters() -> None:
+    # used to raise IndexError, the whole message is the segment holding the link
+    assert remove_link("see spam.com/offer for more", "spam.com") == ""
+
+
+def test_remove_link_keeps_other_segments() -> None:
+    assert remove_link("Hello there. Buy at spam.com/offer now", "spam.com") == "Hello there."
+
+
+def test_remove_link_without_matching_link() -> None:
+    assert remove_link("see other.com/page", "spam.com") == "see other.com/page"
@@ -0,0 +1,69 @@
+from bench.seed import create_bench_db
+
+from app.utils.paginate import PAGE_SIZE, PageOptions, decode_cursor, encode_cursor, format_page_footer, get_page_options, paginate
+from app.utils.split_message import split_message
+
+from classes.validation_exceptions import InvalidCommandException
+
+from db.schema import Channel
+
+
+def create_channels(count: int):
+    db = create_bench_db()
+    assert not isinstance(db, Exception)
+    _, session = db
+    session.add_all([Channel(id=f"{i:04d}", name=f"channel_{i:04d}", url=f"https://t.me/c{i}") for i in range(count)])
+    session.commit()
+    return session
+
+
+def test_keyset_pages_cover_every_row_once() -> None:
+    session = create_channels(PAGE_SIZE * 2 + 1)
+    seen: list[str] = []
+    options: PageOptions = PageOptions()
+
+    while True:
+        items, has_more = paginate(session.query(Channel), Channel.name, options)
+        seen.extend([str(channel.name) for channel in items])
+        if not has_more: break
+        options = PageOptions(after=str(items[-1].name))
+
+    assert seen == [f"channel_{i:04d}" for i in range(PAGE_SIZE * 2 + 1)]
+
+
+def test_offset_page() -> None:
+    session = create_channels(PAGE_SIZE + 1)
+    items, has_more = paginate(session.query(Channel), Channel.name, PageOptions(page=2))
+    assert [str(channel.name) for channel in items] == [f"channel_{PAGE_SIZE:04d}"]
+    assert not has_more
+
+
+def test_cursor_round_trip() -> None:
+    key: str = "name--with=separators"
+    footer: str = format_page_footer("/view_channels", key, True)
+    cursor: str = footer.rsplit("--cursor=", 1)[1]
+
+    assert decode_cursor(encode_cursor(key)) == key
+    options = get_page_options(f"/view_channels --cursor={cursor}")
+    assert isinstance(options, PageOptions) and options.after == key
+    assert format_page_footer("/view_channels", key, False) == ""
+
+
+def test_page_options_are_exclusive() -> None:
+    assert isinstance(get_page_options("/view_channels --after=a --page=2"), InvalidCommandException)
+    assert isinstance(get_page_options("/view_channels --cursor=zz"), InvalidCommandException)
+    assert isinstance(get_page_options("/view_channels --page=0"), InvalidCommandException)
+
+
+def test_split_short_message() -> None:
+    assert split_message("short", 10) == ["short"]
+
+
+def test_split_on_line_boundaries() -> None:
+    assert split_message("aaaa\nbbbb\ncccc", 9) == ["aaaa\nbbbb", "cccc"]
+
+
+def test_split_long_line() -> None:
+    chunks: list[str] = split_message("a" * 25, 10)
+    assert chunks == ["a" * 10, "a" * 10, "a" * 5]
+    assert all([len(chunk) <= 10 for chunk in split_message("x\n" + "y" * 30 + "\nz", 10)])
@@ -0,0 +1,57 @@
+from app.metrics.rolling_stats import SLOT_SECONDS, RollingCounter, RollingHistogram, get_weight
+
+# start of a minute, far from zero so no slot starts at minute -1
+START: float = 1000 * SLOT_SECONDS
+
+
+def test_weight_inside_and_outside_window() -> None:
+    now: float = START + 15
+    assert get_weight(1000, 1, now) == 1.0
+    assert get_weight(999, 15, now) == 1.0
+    assert get_weight(1001, 15, now) == 0.0
+    assert get_weight(980, 15, now) == 0.0
+
+
+def test_weight_of_oldest_slot() -> None:
+    # a quarter of the current minute passed, so three quarters of the oldest one are still in the window
+    assert get_weight(999, 1, START + 15) == 0.75
+    assert get_weight(999, 1, START) == 1.0
+
+
+def test_counter_window_does_not_restart_at_minute() -> None:
+    counter: RollingCounter = RollingCounter()
+    for _ in range(60): counter.inc(START + 30)
+
+    assert counter.total(1, START + 59) == 60
+    # half of the previous minute is still in the last minute window
+    assert counter.total(1, START + SLOT_SECONDS + 30) == 30
+    assert counter.total(1, START + 2 * SLOT_SECONDS) == 0
+    assert counter.total(15, START + 2 * SLOT_SECONDS) == 60
+
+
+def test_counter_reuses_expired_slots() -> None:
+    counter: RollingCounter = RollingCounter()
+    counter.inc(START)
+    # same slot one lap of the ring later
+    counter.inc(START + len(counter.counts) * SLOT_SECONDS)
+    assert counter.total(60, START + len(counter.counts) * SLOT_SECONDS) == 1
+
+
+def test_histogram_quantiles() -> None:
+    histogram: RollingHistogram = RollingHistogram(buckets=(0.1, 1.0, 10.0))
+    assert histogram.quantile(0.5, 1, START) is None
+
+    for _ in range(90): histogram.observe(0.05, START)
+    for _ in range(10): histogram.observe(5.0, START)
+
+    assert histogram.quantile(0.5, 1, START + 1) == 0.1
+    assert histogram.quantile(0.99, 1, START + 1) == 10.0
+    histogram.observe(50.0, START)
+    assert histogram.quantile(1.0, 1, START + 1) == float("inf")
+
+
+def test_histogram_forgets_old_observations() -> None:
+    histogram: RollingHistogram = RollingHistogram(buckets=(0.1, 1.0))
+    histogram.observe(0.5, START)
+    assert histogram.quantile(0.5, 1, START + 2 * SLOT_SECONDS) is None
+    assert histogram.quantile(0.5, 15, START + 2 * SLOT_SECONDS) == 1.0
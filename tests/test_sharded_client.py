@@ -0,0 +1,73 @@
+from asyncio import new_event_loop
+
+from time import time
+
+from telethon import events
+
+from app.utils.fake_client import FakeTelegramClient
+from app.utils.sharded_client import Account, ShardedClient, rank_accounts
+
+LOOP = new_event_loop()
+
+
+def create_account(name: str, members: set[int] | None = None) -> Account:
+    return Account(name, "+1", FakeTelegramClient(name, 1, "hash", LOOP), members if members is not None else set())
+
+
+def connection_handler(event: object) -> None:
+    pass
+
+
+def test_rank_is_stable_when_accounts_change() -> None:
+    accounts: list[Account] = [create_account(f"session_{i}") for i in range(5)]
+    keys: list[str] = [str(key) for key in range(200)]
+    winners: dict[str, Account] = {key: rank_accounts(key, accounts)[0] for key in keys}
+
+    # keys only move away from the removed account
+    removed: Account = accounts[2]
+    for key in keys:
+        winner: Account = rank_accounts(key, [account for account in accounts if account is not removed])[0]
+        assert winner is winners[key] or winners[key] is removed
+
+    # keys only move to the added account
+    added: Account = create_account("session_new")
+    for key in keys:
+        winner = rank_accounts(key, [*accounts, added])[0]
+        assert winner is winners[key] or winner is added
+
+    assert rank_accounts("7", accounts) == rank_accounts("7", list(reversed(accounts)))
+
+
+def test_handler_goes_to_member_account() -> None:
+    primary: Account = create_account("session_main")
+    member: Account = create_account("session_member", {10})
+    client: ShardedClient = ShardedClient(primary, [member])
+
+    client.add_event_handler(connection_handler, events.NewMessage(chats=[10]))
+    assert len(member.client.list_event_handlers()) == 1
+    # unknown peers stay in the main account
+    client.add_event_handler(connection_handler, events.NewMessage(chats=[11]))
+    assert len(primary.client.list_event_handlers()) == 1
+
+
+def test_rebalance_moves_away_from_limited_account() -> None:
+    first: Account = create_account("session_a", {10})
+    second: Account = create_account("session_b", {10})
+    client: ShardedClient = ShardedClient(create_account("session_main"), [first, second])
+    event: events.NewMessage = events.NewMessage(chats=[10])
+
+    client.add_event_handler(connection_handler, event)
+    owner: Account = client.connections[(connection_handler, event)]
+    assert client.rebalance() == 0
+
+    owner.limited_until = time() + 60
+    assert client.rebalance() == 1
+    other: Account = second if owner is first else first
+    assert client.connections[(connection_handler, event)] is other
+    assert len(owner.client.list_event_handlers()) == 0
+    assert len(other.client.list_event_handlers()) == 1
+
+    # back once the flood wait expires
+    owner.limited_until = 0.0
+    assert client.rebalance() == 1
+    assert client.connections[(connection_handler, event)] is owner
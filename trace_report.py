@@ -0,0 +1,47 @@
+from argparse import ArgumentParser
+
+from json import loads, JSONDecodeError
+
+from app.metrics.metrics import percentile
+from app.metrics.tracing import DEFAULT_TRACE_PATH
+
+
+def configure_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog = "trace_report",
+        description = "Shows the latency of each stage from the spans recorded with TRACE_SAMPLE_RATE.",
+        epilog = ""
+    )
+    parser.add_argument("path", type=str, nargs="?", default=DEFAULT_TRACE_PATH, help="JSONL file with the spans.")
+    return parser
+
+
+def main(path: str) -> str | Exception:
+    durations: dict[str, list[float]] = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                span = loads(line)
+                durations.setdefault(span["name"], []).append(float(span["duration"]))
+    except (OSError, JSONDecodeError, KeyError, ValueError) as e:
+        return e
+
+    if len(durations) == 0: return "No spans recorded."
+
+    width: int = max([len(name) for name in durations] + [len("stage")])
+    lines: list[str] = [f"{'stage'.ljust(width)}  {'count':>7}  {'mean ms':>9}  {'p50 ms':>9}  {'p95 ms':>9}  {'max ms':>9}"]
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+        lines.append(
+            f"{name.ljust(width)}  {len(values):>7}  {sum(values) / len(values) * 1000:9.2f}  "
+            f"{percentile(values, 0.5) * 1000:9.2f}  {percentile(values, 0.95) * 1000:9.2f}  {values[-1] * 1000:9.2f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = configure_parser()
+    args = parser.parse_args()
+    res = main(args.path)
+    if isinstance(res, Exception): raise res
+    print(res)